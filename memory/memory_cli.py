@@ -9,6 +9,9 @@
         --where "date>='2025-11-14' AND tags CONTAINS 'architecture'" \
         --order-by "timestamp desc" \
         --limit 20
+
+    # 游标分页：上一页末尾输出的 next cursor 传给 --after
+    python3 .ai-runtime/memory/memory_cli.py query --limit 20 --after <cursor>
 """
 
 from __future__ import annotations
@@ -24,6 +27,14 @@ sys.path.insert(0, str(CURRENT_DIR))
 from memory_discovery import MemoryDiscovery  # type: ignore
 
 
+def _non_negative_int(value: str) -> int:
+    """argparse 类型：非负整数"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"需要非负整数: {value}")
+    return number
+
+
 class MemoryCLI:
     """Episodic 记忆查询 CLI 接口"""
 
@@ -87,7 +98,7 @@ class MemoryCLI:
         )
         query.add_argument(
             "--limit",
-            type=int,
+            type=_non_negative_int,
             default=50,
             help="LIMIT 结果数量 (默认 50)",
         )
@@ -95,7 +106,11 @@ class MemoryCLI:
             "--offset",
             type=int,
             default=0,
-            help="OFFSET 偏移量 (默认 0)",
+            help="OFFSET 偏移量 (默认 0)，大结果集建议使用 --after",
+        )
+        query.add_argument(
+            "--after",
+            help="游标分页：从上一页输出的 next cursor 之后继续 (与 --offset 互斥)",
         )
         query.add_argument(
             "--format",
@@ -111,15 +126,35 @@ class MemoryCLI:
         # 解析 select 字段
         select_fields = [f.strip() for f in (args.select or "").split(",") if f.strip()]
 
-        events = self.discovery.query(
-            where=args.where,
-            order_by=args.order_by,
-            limit=args.limit,
-            offset=args.offset,
-        )
+        if args.offset:
+            if args.after:
+                print("❌ --after 与 --offset 不能同时使用", file=sys.stderr)
+                return 1
+            events = self.discovery.query(
+                where=args.where,
+                order_by=args.order_by,
+                limit=args.limit,
+                offset=args.offset,
+            )
+            next_cursor = None
+        else:
+            # 无 OFFSET 时统一走游标分页：首页同样返回游标，后续以 --after 翻页
+            try:
+                events, next_cursor = self.discovery.query_page(
+                    where=args.where,
+                    order_by=args.order_by,
+                    limit=args.limit,
+                    after=args.after,
+                )
+            except ValueError as exc:
+                print(f"❌ {exc}", file=sys.stderr)
+                return 1
 
         output = self.discovery.format_events(events, select=select_fields, format_type=args.format)
         print(output)
+        if next_cursor:
+            # 输出到 stderr，保证 json 模式下 stdout 仍为合法 JSON
+            print(f"next cursor: {next_cursor}", file=sys.stderr)
         return 0
 
 
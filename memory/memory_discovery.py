@@ -3,6 +3,7 @@
 
 - 加载 `.ai-runtime/memory/episodic/index.yml`
 - 提供 SQL 风格 (WHERE / ORDER BY / LIMIT) 的事件查询接口
+- 提供基于游标 (keyset) 的分页接口，避免 OFFSET 重复扫描
 - 提供 table/json 两种格式化输出
 
 依赖：PyYAML（项目中已作为核心依赖使用）
@@ -10,12 +11,14 @@
 
 from __future__ import annotations
 
+import base64
+import bisect
 import datetime as dt
 import json
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import yaml
 
@@ -59,6 +62,10 @@ class MemoryEvent:
         }
 
 
+# 可直接走时间索引的排序字段（date 与 timestamp 同序，均以 id 作为次序键）
+TIME_ORDER_FIELDS = ("timestamp", "date")
+
+
 class MemoryDiscovery:
     """Episodic 记忆索引加载与查询"""
 
@@ -67,6 +74,9 @@ class MemoryDiscovery:
         self.episodic_root = memory_root / "episodic"
         self.index_path = self.episodic_root / "index.yml"
         self.events: List[MemoryEvent] = []
+        # 时间索引：按 (timestamp, id) 升序排列，供游标分页二分定位
+        self._time_index: List[MemoryEvent] = []
+        self._time_keys: List[Tuple[dt.datetime, str]] = []
         self.refresh()
 
     # ------------------------------------------------------------------
@@ -76,6 +86,13 @@ class MemoryDiscovery:
         """重新加载索引文件。"""
 
         self.events = self._load_events()
+        self._build_time_index()
+
+    def _build_time_index(self) -> None:
+        """构建 (timestamp, id) 有序索引。"""
+
+        self._time_index = sorted(self.events, key=self._time_sort_key)
+        self._time_keys = [self._time_sort_key(e) for e in self._time_index]
 
     def _load_events(self) -> List[MemoryEvent]:
         """从 episodic 目录扫描 Markdown 事件文件并解析元信息。"""
@@ -319,6 +336,166 @@ class MemoryDiscovery:
 
         return events
 
+    def query_page(
+        self,
+        where: Optional[str] = None,
+        order_by: Optional[str] = None,
+        limit: int = 50,
+        after: Optional[str] = None,
+    ) -> Tuple[List[MemoryEvent], Optional[str]]:
+        """基于游标 (keyset) 的分页查询。
+
+        返回 `(events, next_cursor)`；`next_cursor` 为 None 表示没有更多结果。
+        游标编码上一页最后一条记录的 (排序键, id)，与 order_by 绑定。
+        未指定 order_by 时默认按 `timestamp asc` 分页，保证顺序稳定。
+
+        - timestamp/date 排序：通过时间索引二分定位起点，按需过滤，取满即停
+        - 其他字段排序：过滤 + 排序后二分定位到游标之后
+        """
+
+        field, descending = self._parse_order_by(order_by or "timestamp asc")
+        cursor_key: Optional[Tuple[Any, str]] = None
+        if after:
+            cursor_key = self._decode_cursor(after, field, descending)
+
+        if field in TIME_ORDER_FIELDS:
+            events = self._page_by_time_index(where, descending, limit, cursor_key)
+        else:
+            events = self._page_by_sort(where, field, descending, limit, cursor_key)
+
+        next_cursor: Optional[str] = None
+        if len(events) == limit and events:
+            next_cursor = self._encode_cursor(events[-1], field, descending)
+        return events, next_cursor
+
+    def _page_by_time_index(
+        self,
+        where: Optional[str],
+        descending: bool,
+        limit: int,
+        cursor_key: Optional[Tuple[Any, str]],
+    ) -> List[MemoryEvent]:
+        if limit <= 0:
+            return []
+
+        conditions = self._split_conditions(where) if where else []
+        index = self._time_index
+
+        if descending:
+            stop = len(index) if cursor_key is None else bisect.bisect_left(self._time_keys, cursor_key)
+            positions: Iterable[int] = range(stop - 1, -1, -1)
+        else:
+            start = 0 if cursor_key is None else bisect.bisect_right(self._time_keys, cursor_key)
+            positions = range(start, len(index))
+
+        page: List[MemoryEvent] = []
+        for pos in positions:
+            event = index[pos]
+            if all(self._eval_condition(event, cond) for cond in conditions):
+                page.append(event)
+                if len(page) >= limit:
+                    break
+        return page
+
+    def _page_by_sort(
+        self,
+        where: Optional[str],
+        field: str,
+        descending: bool,
+        limit: int,
+        cursor_key: Optional[Tuple[Any, str]],
+    ) -> List[MemoryEvent]:
+        events: List[MemoryEvent] = list(self.events)
+        if where:
+            events = list(self._apply_where(events, where))
+
+        events.sort(key=lambda e: self._sort_key(e, field))
+        keys = [self._sort_key(e, field) for e in events]
+
+        if descending:
+            stop = len(events) if cursor_key is None else bisect.bisect_left(keys, cursor_key)
+            return events[max(stop - limit, 0) : stop][::-1]
+
+        start = 0 if cursor_key is None else bisect.bisect_right(keys, cursor_key)
+        return events[start : start + limit]
+
+    # ------------------------------------------------------------------
+    # 排序与游标
+    # ------------------------------------------------------------------
+    def _apply_order_by(self, events: List[MemoryEvent], order_by: str) -> List[MemoryEvent]:
+        """按单个字段排序，字段值相同时以 id 作为次序键。"""
+
+        field, descending = self._parse_order_by(order_by)
+        if field in TIME_ORDER_FIELDS:
+            key_fn = self._time_sort_key
+        else:
+            key_fn = lambda e: self._sort_key(e, field)  # noqa: E731
+        return sorted(events, key=key_fn, reverse=descending)
+
+    @staticmethod
+    def _parse_order_by(order_by: str) -> Tuple[str, bool]:
+        parts = order_by.strip().split()
+        if not parts:
+            return "timestamp", False
+        field = parts[0].lower()
+        descending = len(parts) > 1 and parts[1].lower() == "desc"
+        return field, descending
+
+    @staticmethod
+    def _normalize_time(value: dt.datetime) -> dt.datetime:
+        """统一为 UTC 时区的 datetime：无时区的值按本地时间解释，避免与带时区的值比较时报错。"""
+
+        return value.astimezone(dt.timezone.utc)
+
+    @staticmethod
+    def _time_sort_key(event: MemoryEvent) -> Tuple[dt.datetime, str]:
+        """时间字段的排序键 (归一化时间, id)，时间索引、排序与游标共用。"""
+
+        return MemoryDiscovery._normalize_time(event.timestamp), event.id
+
+    @staticmethod
+    def _sort_key(event: MemoryEvent, field: str) -> Tuple[Any, str]:
+        """排序键：时间字段用归一化时间，其余字段统一转为字符串以避免混合类型比较。"""
+
+        if field in TIME_ORDER_FIELDS:
+            return MemoryDiscovery._time_sort_key(event)
+        if field in ("id", "type", "level", "title", "date_bucket"):
+            value = getattr(event, field)
+        else:
+            value = event.meta.get(field, "")
+        return ("" if value is None else str(value), event.id)
+
+    @staticmethod
+    def _encode_cursor(event: MemoryEvent, field: str, descending: bool) -> str:
+        if field in TIME_ORDER_FIELDS:
+            value: str = event.timestamp.isoformat()
+        else:
+            value = MemoryDiscovery._sort_key(event, field)[0]
+        payload = {"o": field, "d": "desc" if descending else "asc", "k": value, "id": event.id}
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, field: str, descending: bool) -> Tuple[Any, str]:
+        """解析游标，返回与排序字段对应的 (排序键, id)。"""
+
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            order, direction, value, event_id = payload["o"], payload["d"], payload["k"], payload["id"]
+        except Exception as exc:
+            raise ValueError(f"无效的游标: {cursor}") from exc
+
+        if order != field or direction != ("desc" if descending else "asc"):
+            raise ValueError(f"游标排序 '{order} {direction}' 与当前 --order-by 不一致")
+
+        if field in TIME_ORDER_FIELDS:
+            ts = MemoryDiscovery._parse_datetime(value)
+            if ts is None:
+                raise ValueError(f"无效的游标: {cursor}")
+            return MemoryDiscovery._normalize_time(ts), str(event_id)
+        return str(value), str(event_id)
+
     def _apply_where(
         self, events: Iterable[MemoryEvent], where: str
     ) -> Iterable[MemoryEvent]:
@@ -330,7 +507,7 @@ class MemoryDiscovery:
         - 通过 AND 连接多个条件（不支持 OR / 括号）
         """
 
-        conditions = [part.strip() for part in re.split(r"\s+AND\s+", where, flags=re.I) if part.strip()]
+        conditions = self._split_conditions(where)
 
         def match(event: MemoryEvent) -> bool:
             for cond in conditions:
@@ -340,6 +517,10 @@ class MemoryDiscovery:
 
         return (e for e in events if match(e))
 
+    @staticmethod
+    def _split_conditions(where: str) -> List[str]:
+        return [part.strip() for part in re.split(r"\s+AND\s+", where, flags=re.I) if part.strip()]
+
     def _eval_condition(self, event: MemoryEvent, cond: str) -> bool:
         # tags CONTAINS 'tag'
         if re.search(r"\bCONTAINS\b", cond, flags=re.I):
@@ -385,6 +566,7 @@ class MemoryDiscovery:
             rhs = self._parse_datetime(value)
             if rhs is None:
                 return False
+            lhs, rhs = self._normalize_time(lhs), self._normalize_time(rhs)
         else:
             rhs = value
 
@@ -4,146 +4,910 @@ AI Runtime - 依赖关系图谱构建器
 扫描代码库并构建模块依赖关系图，识别核心节点和网络拓扑
 """
 
+import argparse
+import ast
+import hashlib
 import os
+import posixpath
 import re
 import json
 import sys
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import time
 import networkx as nx
 
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # 未安装时退回 networkx 的实现
+    np = None
+    sparse = None
+
+try:
+    import dependency_graph_store as graph_store
+except ImportError:  # 紧凑存储依赖 numpy，未安装时只输出 JSON
+    graph_store = None
+
+# JavaScript / TypeScript 的相对导入可省略的扩展名与目录索引文件
+JS_EXTENSIONS = ['.js', '.ts', '.jsx', '.tsx', '.mjs', '.cjs']
+JS_INDEX_FILES = ['index' + ext for ext in JS_EXTENSIONS]
+
+# 扫描的源码扩展名，其中提取导入的 JS/TS 扩展名
+SOURCE_SUFFIXES = {'.js', '.ts', '.jsx', '.tsx', '.py', '.java', '.go'}
+JS_SOURCE_SUFFIXES = {'.js', '.ts', '.jsx', '.tsx'}
+
+# 文件数达到该阈值时才启用进程池（进程启动有固定开销）
+PARALLEL_THRESHOLD = 256
+
+# 每个任务分片包含的文件数
+PARALLEL_CHUNK_SIZE = 128
+
+# 逐文件导入缓存（相对于扫描根目录）与格式版本
+DEFAULT_CACHE_FILE = 'cognition/graphs/.dependency-cache.json'
+CACHE_VERSION = 1
+
+# analyze_centrality 写入的节点属性
+CENTRALITY_KEYS = ('pagerank', 'betweenness', 'degree')
+
+# 节点数不超过该值时计算精确介数中心性，否则按枢纽源点抽样
+BETWEENNESS_EXACT_LIMIT = 2000
+
+# 抽样介数中心性的默认枢纽源点数
+DEFAULT_BETWEENNESS_SAMPLES = 256
+
+# 介数中心性每批并行做 BFS 的源点数（稀疏矩阵 × 稠密矩阵的列数）
+BETWEENNESS_BATCH_SIZE = 32
+
+# PageRank 参数（与 networkx 默认值一致）
+PAGERANK_ALPHA = 0.85
+PAGERANK_MAX_ITER = 100
+PAGERANK_TOL = 1e-06
+
+# 循环依赖采样：总环数上限、每个强连通分量的环数上限、环长上限
+MAX_REPORTED_CYCLES = 100
+CYCLES_PER_COMPONENT = 5
+MAX_CYCLE_LENGTH = 12
+
+# 每个分量最多尝试的起点数 = 环数上限 × 该系数
+CYCLE_START_FACTOR = 4
+
+# 默认输出文件（相对于工作目录）；JSON/GraphML 导出与其同名、扩展名不同
+DEFAULT_OUTPUT_FILE = 'cognition/graphs/dependency-graph.npz'
+
+# 可选的导出格式
+EXPORT_FORMATS = ('json', 'graphml')
+
+# 扫描时跳过的目录名
+EXCLUDE_DIRS = {
+    'node_modules', '.git', 'dist', 'build', 'coverage',
+    '__pycache__', '.venv', '.ai-runtime'
+}
+
+# 单遍扫描 JS/TS 源码的 token：注释与字符串整体跳过，避免其中的 import 被误识别
+# 各分支首字符互斥、无嵌套量词，匹配时间与文件长度线性相关
+JS_TOKEN_RE = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*(?:[^*]|\*(?!/))*\*/)
+  | (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+  | (?P<template>`(?:[^`\\]|\\.)*`)
+  | (?P<word>[A-Za-z_$][\w$]*)
+  | (?P<punct>[().;{}=,])
+""", re.VERBOSE)
+
+# 单遍扫描 Python 源码：跳过字符串与注释，只定位行首的 import / from ... import 语句
+# 匹配次数只与字符串、注释和导入语句的数量相关，无需对整个文件建立语法树
+PY_IMPORT_SCAN_RE = re.compile(r"""
+    (?P<skip>'''(?:[^'\\]|\\[\s\S]|'(?!''))*'''
+           |\"\"\"(?:[^"\\]|\\[\s\S]|"(?!""))*\"\"\"
+           |'(?:[^'\\\n]|\\[\s\S])*'
+           |"(?:[^"\\\n]|\\[\s\S])*"
+           |\#[^\n]*)
+  | ^[ \t]*(?P<statement>(?:import|from)\b(?:[^\n#\\(]|\\\n|\([^)]*\))*)
+""", re.VERBOSE | re.MULTILINE)
+
+
+def scan_js_specifiers(content):
+    """
+    提取 JS/TS 源码中的模块说明符
+
+    识别 import ... from 'x'、export ... from 'x'、import 'x'、import('x')、require('x')，
+    忽略注释、字符串与模板字符串中的同名文本以及 obj.require() 之类的成员调用。
+
+    Args:
+        content: 源码文本
+
+    Returns:
+        list: 模块说明符（按出现顺序）
+    """
+    specifiers = []
+    in_module_statement = False  # 处于 import/export 语句中，等待 from 'x'
+    prev = prev2 = None          # 前两个有效 token（成员访问的关键字记为 None）
+
+    for match in JS_TOKEN_RE.finditer(content):
+        kind = match.lastgroup
+        if kind == 'comment' or kind == 'template':
+            continue
+
+        token = match.group()
+        if kind == 'string':
+            if (prev == 'from' and in_module_statement) or prev == 'import' \
+                    or (prev == '(' and prev2 in ('require', 'import')):
+                specifiers.append(token[1:-1])
+                in_module_statement = False
+            prev2, prev = prev, token
+            continue
+
+        if kind == 'word':
+            if prev == '.':
+                token = None  # 成员访问（如 obj.import、module.require）
+            elif token in ('import', 'export'):
+                in_module_statement = True
+        elif token == ';':
+            in_module_statement = False
+
+        prev2, prev = prev, token
+
+    return specifiers
+
+
+def iter_python_imports(content):
+    """
+    提取 Python 源码中的导入（含缩进、条件与函数内的导入）
+
+    定位行首的导入语句后逐条交给 ast 解析，字符串与注释中的同名文本不会被识别；
+    无法解析的语句（如 Python 2 语法）跳过。
+
+    Args:
+        content: 源码文本
+
+    Returns:
+        list: [(相对层级, 模块名, 导入的名称列表)]，import 语句的名称列表为空
+    """
+    imports = []
+    for match in PY_IMPORT_SCAN_RE.finditer(content):
+        statement = match.group('statement')
+        if not statement:
+            continue
+        try:
+            node = ast.parse(statement.rstrip()).body[0]
+        except (SyntaxError, ValueError, IndexError):
+            continue
+        if isinstance(node, ast.Import):
+            imports.extend((0, alias.name, []) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append((node.level, node.module or '', [alias.name for alias in node.names]))
+    return imports
+
+
+def read_source_file(file_path, suffix):
+    """
+    读取一次文件，从同一缓冲区得到大小、行数与未解析的导入
+
+    Args:
+        file_path: 文件路径
+        suffix: 文件扩展名
+
+    Returns:
+        tuple: (字节数, 行数, 导入列表, 内容哈希)；导入列表对 JS/TS 为相对模块说明符，
+               对 Python 为 iter_python_imports 的结果
+
+    Raises:
+        OSError: 文件读取失败
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    content = raw.decode('utf-8', errors='ignore')
+
+    if suffix in JS_SOURCE_SUFFIXES:
+        refs = [spec for spec in scan_js_specifiers(content) if spec.startswith('.')]
+    elif suffix == '.py':
+        refs = iter_python_imports(content)
+    else:
+        refs = []
+    digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+    return len(raw), len(content.splitlines()), refs, digest
+
+
+def _read_chunk(chunk):
+    """进程池任务：读取一个分片的文件，错误以字符串返回由主进程统一报告"""
+    results = []
+    for file_path, suffix in chunk:
+        try:
+            results.append((read_source_file(file_path, suffix), None))
+        except OSError as e:
+            results.append((None, str(e)))
+    return results
+
+
+class PythonModuleResolver:
+    """
+    把 Python 导入解析为项目内的文件
+
+    - 绝对导入按 sys.path 根目录依次查找 a/b/c.py 或 a/b/c/__init__.py，取最深的存在模块
+    - from a.b import c：c 是子模块时指向子模块，否则指向 a.b 本身
+    - 相对导入按层级从当前包向上定位
+    - 非包目录中的脚本（目录无 __init__.py）的所在目录也在 sys.path 上
+    """
+
+    def __init__(self, files, roots):
+        """
+        Args:
+            files: 项目内文件相对路径集合（posix 格式）
+            roots: sys.path 根目录相对路径前缀列表（'' 表示项目根目录，其他以 / 结尾）
+        """
+        self.files = files
+        self.roots = roots
+
+    def module_file(self, prefix, parts):
+        """恰好对应 parts 的模块文件，不存在时返回None"""
+        base = prefix + '/'.join(parts)
+        if base + '.py' in self.files:
+            return base + '.py'
+        if base + '/__init__.py' in self.files:
+            return base + '/__init__.py'
+        return None
+
+    def package_init(self, prefix):
+        """前缀目录对应包的 __init__.py"""
+        init_file = prefix + '__init__.py'
+        return init_file if init_file in self.files else None
+
+    def resolve_under(self, prefix, parts):
+        """在给定前缀下取最深的存在模块"""
+        for depth in range(len(parts), 0, -1):
+            found = self.module_file(prefix, parts[:depth])
+            if found:
+                return found
+        return None
+
+    def resolve(self, rel_path, level, module, names):
+        """
+        解析一条导入语句
+
+        Args:
+            rel_path: 导入所在文件的相对路径
+            level: 相对导入层级（0 为绝对导入）
+            module: 模块名（from . import x 时为空）
+            names: from 导入的名称列表
+
+        Returns:
+            list: 被导入的项目内文件相对路径
+        """
+        parts = module.split('.') if module else []
+
+        if level:
+            package = rel_path.split('/')[:-1]
+            if level > 1:
+                if level - 1 > len(package):
+                    return []
+                package = package[:len(package) - (level - 1)]
+            prefixes = ['/'.join(package) + '/' if package else '']
+        else:
+            directory = rel_path.rsplit('/', 1)[0] + '/' if '/' in rel_path else ''
+            prefixes = list(self.roots)
+            if directory + '__init__.py' not in self.files and directory not in prefixes:
+                prefixes.insert(0, directory)
+
+        wanted = [name for name in names if name != '*']
+        resolved = []
+        for prefix in prefixes:
+            found = [f for f in (self.module_file(prefix, parts + [name]) for name in wanted) if f]
+            if not wanted or len(found) < len(wanted):
+                # import a.b，或 from a.b import 非子模块名称：依赖 a.b 本身
+                target = self.resolve_under(prefix, parts) if parts else self.package_init(prefix)
+                if target:
+                    found.append(target)
+            if found:
+                resolved = found
+                break
+        return [path for path in resolved if path != rel_path]
+
+
+class ImportCache:
+    """
+    逐文件导入缓存：相对路径 → (mtime, size, 内容哈希, 行数, 原始导入, 解析后的导入)
+
+    解析结果依赖于文件集合与 Python 搜索路径，二者的指纹（context）变化时
+    未修改文件的导入需要重新解析，但无需重新读取。
+    分析参数与文件以外输入的指纹（analysis）变化时，不沿用上次的分析结果。
+    """
+
+    def __init__(self, cache_file, root_dir):
+        self.cache_file = Path(cache_file)
+        self.root_dir = str(root_dir)
+        self.entries = {}
+        self.seen = {}
+        self.context = None
+        self.analysis = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if data.get('version') == CACHE_VERSION and data.get('root') == self.root_dir:
+            self.entries = data.get('files', {})
+            self.context = data.get('context')
+            self.analysis = data.get('analysis')
+
+    def lookup(self, key, st):
+        """mtime 与 size 均未变化时直接返回缓存记录"""
+        entry = self.entries.get(key)
+        if entry and entry['mtime'] == st.st_mtime_ns and entry['size'] == st.st_size:
+            self.hits += 1
+            self.seen[key] = entry
+            return entry
+        return None
+
+    def lookup_hash(self, key, st, digest):
+        """mtime 变化但内容哈希一致（如 touch / checkout）时复用记录"""
+        entry = self.entries.get(key)
+        if entry and entry['hash'] == digest:
+            self.hits += 1
+            entry = dict(entry, mtime=st.st_mtime_ns)
+            self.seen[key] = entry
+            return entry
+        return None
+
+    def store(self, key, st, digest, lines, refs):
+        """写入新读取的文件，返回新记录（解析后的导入由调用方填入 imports）"""
+        self.misses += 1
+        entry = {
+            'mtime': st.st_mtime_ns,
+            'size': st.st_size,
+            'hash': digest,
+            'lines': lines,
+            'refs': refs,
+            'imports': None
+        }
+        self.seen[key] = entry
+        return entry
+
+    def previous_imports(self, key):
+        """上次运行时该文件解析后的导入，新文件返回None"""
+        entry = self.entries.get(key)
+        return entry.get('imports') if entry else None
+
+    def removed(self):
+        """上次存在、本次未出现的文件"""
+        return [key for key in self.entries if key not in self.seen]
+
+    def save(self, context, analysis):
+        """只保存本次出现过的文件（已删除文件的条目随之淘汰）"""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps({
+                'version': CACHE_VERSION,
+                'root': self.root_dir,
+                'context': context,
+                'analysis': analysis,
+                'files': self.seen
+            }), encoding='utf-8')
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            print(f"⚠️  警告: 无法写入缓存 {self.cache_file}: {e}")
+
+
+class CentralityEngine:
+    """
+    基于稀疏邻接矩阵的中心性计算
+
+    - PageRank：CSR 矩阵上的幂迭代，与 networkx 的定义一致（均匀悬挂节点分配）
+    - 介数中心性：Brandes 算法，每批多个源点同时做逐层 BFS；节点较多时
+      按固定种子抽样 k 个枢纽源点并按 networkx 的抽样方式缩放
+    - 时间预算：PageRank 超时时取当前迭代结果，介数中心性按已处理的源点缩放
+    """
+
+    def __init__(self, graph, samples=None, time_budget=None, seed=42):
+        """
+        Args:
+            graph: networkx.DiGraph
+            samples: 介数中心性枢纽源点数，None 为自动（小图精确、大图抽样），0 为精确
+            time_budget: 总时间预算（秒），None 表示不限
+            seed: 抽样随机种子（保证多次运行结果一致）
+        """
+        self.graph = graph
+        self.samples = samples
+        self.time_budget = time_budget
+        self.seed = seed
+        self.nodes = list(graph)
+        self.info = {}
+        self._deadline = None
+
+    def run(self):
+        """
+        计算 PageRank、介数中心性与度数中心性
+
+        Returns:
+            dict: 属性名 → {节点: 值}
+        """
+        self._deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        if np is None:
+            return self._run_networkx()
+
+        n = len(self.nodes)
+        index = {node: i for i, node in enumerate(self.nodes)}
+        sources, targets, weights = [], [], []
+        for u, v, weight in self.graph.edges(data='weight', default=1):
+            sources.append(index[u])
+            targets.append(index[v])
+            weights.append(weight)
+        adjacency = sparse.csr_array(
+            (np.asarray(weights, dtype=float), (np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64))),
+            shape=(n, n)
+        )
+
+        pagerank = self.pagerank(adjacency)
+        betweenness = self.betweenness(adjacency)
+        degree = self.degree(adjacency)
+        return {
+            'pagerank': dict(zip(self.nodes, pagerank.tolist())),
+            'betweenness': dict(zip(self.nodes, betweenness.tolist())),
+            'degree': dict(zip(self.nodes, degree.tolist()))
+        }
+
+    def _out_of_time(self):
+        return self._deadline is not None and time.monotonic() > self._deadline
+
+    def pagerank(self, adjacency):
+        """加权 PageRank（幂迭代，L1 误差小于 n × tol 时收敛）"""
+        n = adjacency.shape[0]
+        if n == 0:
+            return np.zeros(0)
+
+        out_weight = np.asarray(adjacency.sum(axis=1)).ravel()
+        dangling = out_weight == 0
+        inverse = np.zeros(n)
+        inverse[~dangling] = 1.0 / out_weight[~dangling]
+        # 行归一化后转置：x @ P 等价于 P^T @ x
+        transition = (sparse.diags_array(inverse) @ adjacency).T.tocsr()
+
+        x = np.full(n, 1.0 / n)
+        teleport = (1 - PAGERANK_ALPHA) / n
+        converged = False
+        iterations = 0
+        for iterations in range(1, PAGERANK_MAX_ITER + 1):
+            last = x
+            x = PAGERANK_ALPHA * (transition @ last + last[dangling].sum() / n) + teleport
+            if np.abs(x - last).sum() < n * PAGERANK_TOL:
+                converged = True
+                break
+            if self._out_of_time():
+                break
+
+        self.info['pagerank_iterations'] = iterations
+        self.info['pagerank_converged'] = converged
+        return x
+
+    def betweenness(self, adjacency):
+        """归一化介数中心性（有向、不计端点），按需抽样枢纽源点"""
+        n = adjacency.shape[0]
+        result = np.zeros(n)
+        if n < 3:
+            self.info['betweenness_sources'] = n
+            return result
+
+        samples = self.samples
+        if samples is None:
+            samples = 0 if n <= BETWEENNESS_EXACT_LIMIT else DEFAULT_BETWEENNESS_SAMPLES
+        exact = samples == 0 or samples >= n
+        order = np.random.default_rng(self.seed).permutation(n)
+        pivots = order if exact else order[:samples]
+
+        # 无权最短路径只看连通关系
+        forward = (adjacency != 0).astype(float).tocsr()
+        backward = forward.T.tocsr()
+
+        processed = 0
+        for start in range(0, len(pivots), BETWEENNESS_BATCH_SIZE):
+            batch = pivots[start:start + BETWEENNESS_BATCH_SIZE]
+            result += self._brandes_batch(forward, backward, batch)
+            processed += len(batch)
+            if self._out_of_time() and processed < len(pivots):
+                break
+
+        self.info['betweenness_sources'] = processed
+        self.info['betweenness_exact'] = processed == n
+
+        # 与 networkx 的归一化一致：精确时除以 (n-1)(n-2)，抽样时源点与非源点分别缩放
+        if processed == n:
+            return result / ((n - 1) * (n - 2))
+        sampled = np.zeros(n, dtype=bool)
+        sampled[pivots[:processed]] = True
+        scale = np.full(n, 1.0 / (processed * (n - 2)))
+        scale[sampled] = 1.0 / ((processed - 1) * (n - 2)) if processed > 1 else 0.0
+        return result * scale
+
+    @staticmethod
+    def _brandes_batch(forward, backward, batch):
+        """对一批源点做逐层 BFS 计数最短路径，再逐层回溯累加依赖值"""
+        n = forward.shape[0]
+        width = len(batch)
+        columns = np.arange(width)
+
+        sigma = np.zeros((n, width))
+        dist = np.full((n, width), -1, dtype=np.int32)
+        sigma[batch, columns] = 1.0
+        dist[batch, columns] = 0
+
+        frontier = sigma.copy()
+        depth = 0
+        while True:
+            reached = backward @ frontier
+            reached[dist >= 0] = 0.0
+            if not reached.any():
+                break
+            depth += 1
+            dist[reached > 0] = depth
+            sigma += reached
+            frontier = reached
+
+        delta = np.zeros((n, width))
+        for level in range(depth - 1, -1, -1):
+            below = dist == level + 1
+            coefficient = np.zeros((n, width))
+            coefficient[below] = (1.0 + delta[below]) / sigma[below]
+            contribution = forward @ coefficient
+            here = dist == level
+            delta[here] += sigma[here] * contribution[here]
+
+        delta[batch, columns] = 0.0
+        return delta.sum(axis=1)
+
+    def degree(self, adjacency):
+        """度数中心性：(入度 + 出度) / (n - 1)"""
+        n = adjacency.shape[0]
+        if n <= 1:
+            return np.ones(n)
+        connected = adjacency != 0
+        counts = np.asarray(connected.sum(axis=0)).ravel() + np.asarray(connected.sum(axis=1)).ravel()
+        return counts / (n - 1)
+
+    def _run_networkx(self):
+        """未安装 numpy/scipy 时使用 networkx 的实现（抽样参数同样生效，时间预算不生效）"""
+        n = len(self.nodes)
+        samples = self.samples
+        if samples is None:
+            samples = 0 if n <= BETWEENNESS_EXACT_LIMIT else DEFAULT_BETWEENNESS_SAMPLES
+        k = samples if 0 < samples < n else None
+        self.info['betweenness_sources'] = k or n
+        self.info['betweenness_exact'] = k is None
+        return {
+            'pagerank': nx.pagerank(self.graph, weight='weight'),
+            'betweenness': nx.betweenness_centrality(self.graph, k=k, seed=self.seed),
+            'degree': nx.degree_centrality(self.graph)
+        }
+
+
 class DependencyGraphBuilder:
-    def __init__(self, root_dir='.'):
+    # 默认加入 Python 模块搜索路径的目录（存在时）
+    DEFAULT_PYTHON_PATHS = ['src', 'lib']
+
+    def __init__(self, root_dir='.', python_paths=None, jobs=1, verbose=False, cache_file=None,
+                 betweenness_samples=None, time_budget=None,
+                 max_cycles=MAX_REPORTED_CYCLES, max_cycle_length=MAX_CYCLE_LENGTH):
         self.root_dir = Path(root_dir).resolve()
+        # 逐文件导入缓存（相对路径相对于根目录），None 表示每次全量构建
+        self.cache = None
+        if cache_file:
+            cache_path = Path(cache_file)
+            if not cache_path.is_absolute():
+                cache_path = self.root_dir / cache_path
+            self.cache = ImportCache(cache_path, self.root_dir)
+        # 本次构建的变化：新增/修改/删除的文件，依赖拓扑与分析参数是否变化
+        self.changes = {'added': [], 'modified': [], 'removed': []}
+        self.topology_changed = True
+        self.analysis_changed = True
+        self._context = None
+        self._analysis = None
+        # 中心性参数与最近一次计算的信息（写入 metadata）
+        self.betweenness_samples = betweenness_samples
+        self.time_budget = time_budget
+        self.centrality_info = None
+        # 循环依赖采样上限
+        self.max_cycles = max_cycles
+        self.cycles_per_component = CYCLES_PER_COMPONENT
+        self.max_cycle_length = max_cycle_length
+        # 并行读取文件的进程数
+        self.jobs = jobs
+        # 逐条打印依赖边
+        self.verbose = verbose
         self.graph = nx.DiGraph()
         self.files = []
         self.imports = defaultdict(list)
         self.imported_by = defaultdict(list)
+        # Python 模块搜索路径（相对于根目录）
+        self.python_paths = list(python_paths or [])
+        # 相对路径（posix） → 文件，scan_files 时建立，用于 O(1) 解析导入
+        self.file_index = {}
+        self.python_resolver = None
+        # 扫描到的 package.json（相对路径），用于识别架构模式
+        self.package_manifests = []
+        # JS/TS 相对导入解析缓存：(目录, 说明符) → 相对路径或None
+        self._js_resolved = {}
 
     def scan_files(self):
-        """扫描所有代码文件"""
-        exclude_dirs = {
-            'node_modules', '.git', 'dist', 'build', 'coverage',
-            '__pycache__', '.venv', '.ai-runtime'
-        }
-
-        file_patterns = ['*.js', '*.ts', '*.jsx', '*.tsx', '*.py', '*.java', '*.go']
-
-        for pattern in file_patterns:
-            for file_path in self.root_dir.rglob(pattern):
-                # 跳过排除目录
-                if any(exclude in str(file_path) for exclude in exclude_dirs):
-                    continue
-
-                self.files.append(file_path)
+        """扫描所有代码文件（单次目录遍历，排除目录整棵剪枝）"""
+        stack = [(str(self.root_dir), '')]
+        while stack:
+            directory, rel_dir = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                print(f"⚠️  无法读取目录 {directory}: {e}")
+                continue
+
+            subdirs = []
+            for entry in entries:
+                rel_path = rel_dir + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDE_DIRS:
+                        subdirs.append((entry.path, rel_path + '/'))
+                elif os.path.splitext(entry.name)[1] in SOURCE_SUFFIXES:
+                    self.file_index[rel_path] = Path(entry.path)
+                elif entry.name == 'package.json':
+                    self.package_manifests.append(rel_path)
+            # 逆序入栈，保证按路径顺序深度优先遍历
+            stack.extend(reversed(subdirs))
+
+        self.files = list(self.file_index.values())
+        self.python_resolver = PythonModuleResolver(set(self.file_index), self.python_roots())
 
         print(f"📂 扫描到 {len(self.files)} 个代码文件")
 
+    def python_roots(self):
+        """Python 模块搜索根目录（相对路径前缀）：项目根目录、src/、lib/ 与 --python-path 指定的目录"""
+        roots = ['']
+        candidates = [p for p in self.DEFAULT_PYTHON_PATHS if (self.root_dir / p).is_dir()]
+        for path in candidates + self.python_paths:
+            prefix = Path(path).as_posix().strip('/') + '/'
+            if prefix not in roots and prefix != './':
+                roots.append(prefix)
+        return roots
+
     def extract_imports(self, file_path):
-        """从文件中提取import语句"""
+        """从文件中提取导入，解析为项目内文件的相对路径"""
         try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            imports = []
-            rel_path = file_path.relative_to(self.root_dir)
-
-            # JavaScript/TypeScript imports
-            if file_path.suffix in ['.js', '.ts', '.jsx', '.tsx']:
-                # import ... from './module'
-                js_imports = re.findall(
-                    r"(?:import|export)\s+.*?\s+from\s+['\"]([^'\"]+)['\"]",
-                    content
-                )
-                # require('./module')
-                js_imports += re.findall(
-                    r"require\s*\(\s*['\"]([^'\"]+)['\"]\s*\)",
-                    content
-                )
-                # import('./module')
-                js_imports += re.findall(
-                    r"import\s*\(\s*['\"]([^'\"]+)['\"]\s*\)",
-                    content
-                )
-
-                for imp in js_imports:
-                    # 解析相对路径
-                    if imp.startswith('.'):
-                        resolved = self.resolve_import_path(file_path, imp)
-                        if resolved and resolved in self.files:
-                            imports.append(resolved.relative_to(self.root_dir))
-
-            # Python imports
-            elif file_path.suffix == '.py':
-                # import module
-                py_imports = re.findall(r"^import\s+(\w+)", content, re.MULTILINE)
-                # from module import ...
-                py_imports += re.findall(r"^from\s+(\w+)\s+import", content, re.MULTILINE)
-
-                for imp in py_imports:
-                    # 尝试解析为本地文件
-                    possible_file = file_path.parent / f"{imp.replace('.', '/')}.py"
-                    if possible_file.exists():
-                        imports.append(possible_file.relative_to(self.root_dir))
-
-            return list(set(imports))
-
-        except Exception as e:
+            _, _, refs, _ = read_source_file(file_path, file_path.suffix)
+        except OSError as e:
             print(f"⚠️  读取文件失败 {file_path}: {e}")
             return []
+        return self.resolve_imports(file_path.relative_to(self.root_dir).as_posix(), file_path.suffix, refs)
+
+    def resolve_imports(self, rel_path, suffix, refs):
+        """
+        把 read_source_file 得到的导入解析为项目内文件
+
+        Args:
+            rel_path: 导入所在文件的相对路径（posix）
+            suffix: 文件扩展名
+            refs: 未解析的导入列表
+
+        Returns:
+            list: 被导入文件的相对路径（去重、排序，不含自身）
+        """
+        imports = set()
+        if suffix == '.py':
+            for level, module, names in refs:
+                imports.update(self.python_resolver.resolve(rel_path, level, module, names))
+        else:
+            for specifier in refs:
+                resolved = self.resolve_import_path(rel_path, specifier)
+                if resolved:
+                    imports.add(resolved)
+
+        imports.discard(rel_path)
+        return sorted(imports)
 
     def resolve_import_path(self, current_file, import_path):
-        """解析相对导入路径"""
-        base = current_file.parent
+        """
+        解析 JS/TS 相对导入路径
+
+        Args:
+            current_file: 导入所在文件的相对路径（posix）
+            import_path: 相对模块说明符（如 ./utils、../lib/index.js）
+
+        Returns:
+            str: 项目内文件的相对路径，无法解析时返回None
+        """
+        # 同一目录下的文件常导入相同的说明符，按 (目录, 说明符) 缓存解析结果
+        key = (posixpath.dirname(current_file), import_path)
+        if key not in self._js_resolved:
+            self._js_resolved[key] = self._resolve_js_target(*key)
+        return self._js_resolved[key]
+
+    def _resolve_js_target(self, directory, import_path):
+        import_path = import_path.split('?', 1)[0].split('#', 1)[0]
+        target = posixpath.normpath(posixpath.join(directory, import_path))
+        if target == '..' or target.startswith('../'):
+            return None
+        if target == '.':
+            target = ''
+
+        if target in self.file_index:
+            return target
+        for ext in JS_EXTENSIONS:
+            if target + ext in self.file_index:
+                return target + ext
+        prefix = target + '/' if target else ''
+        for index in JS_INDEX_FILES:
+            if prefix + index in self.file_index:
+                return prefix + index
+        # TypeScript ESM 写法：import './x.js' 实际指向 x.ts
+        stem, ext = posixpath.splitext(target)
+        if ext in ('.js', '.jsx', '.mjs', '.cjs'):
+            for ts_ext in ('.ts', '.tsx', '.mts', '.cts'):
+                if stem + ts_ext in self.file_index:
+                    return stem + ts_ext
+        return None
 
-        # 处理 .js, .ts 扩展名
-        extensions = ['', '.js', '.ts', '.jsx', '.tsx']
+    def read_files(self):
+        """
+        读取扫描到的文件，文件较多时分片并行读取；启用缓存时只读取 mtime/size 变化的文件
+
+        Returns:
+            iterator: 按扫描顺序产出 (相对路径, 文件路径, 记录, 是否重新读取)，
+                      记录含 size/lines/refs，来自缓存时另含上次解析的 imports
+        """
+        items = list(self.file_index.items())
+        records = [None] * len(items)
+        stats = [None] * len(items)
+        if self.cache is not None:
+            for position, (rel_path, file_path) in enumerate(items):
+                try:
+                    stats[position] = os.stat(file_path)
+                except OSError:
+                    continue
+                records[position] = self.cache.lookup(rel_path, stats[position])
+
+        pending = [position for position, record in enumerate(records) if record is None]
+        chunks = [
+            [(str(items[p][1]), items[p][1].suffix) for p in pending[i:i + PARALLEL_CHUNK_SIZE]]
+            for i in range(0, len(pending), PARALLEL_CHUNK_SIZE)
+        ]
+
+        results = None
+        executor = None
+        if self.jobs > 1 and len(pending) >= PARALLEL_THRESHOLD:
+            try:
+                executor = ProcessPoolExecutor(max_workers=self.jobs)
+                results = executor.map(_read_chunk, chunks)
+            except (OSError, RuntimeError) as e:
+                # 进程池不可用（受限环境等）时退回串行
+                print(f"⚠️  并行读取不可用，改为串行: {e}")
+                executor = None
+        if results is None:
+            results = map(_read_chunk, chunks)
+        # 展平分片结果，与 pending 中的位置一一对应
+        fresh = (result for chunk_results in results for result in chunk_results)
 
-        for ext in extensions:
-            if import_path.endswith('/'):
-                # 目录导入，尝试 index.js
-                test_path = base / import_path / 'index' / ext
-            else:
-                test_path = base / f"{import_path}{ext}"
+        try:
+            for position, (rel_path, file_path) in enumerate(items):
+                record = records[position]
+                if record is not None:
+                    yield rel_path, file_path, record, False
+                    continue
 
-            if test_path.exists():
-                return test_path
+                info, error = next(fresh)
+                if error is not None:
+                    print(f"⚠️  读取文件失败 {file_path}: {error}")
+                    yield rel_path, file_path, {'size': 0, 'lines': 0, 'refs': []}, True
+                    continue
 
-        return None
+                size, lines, refs, digest = info
+                st = stats[position]
+                if self.cache is None or st is None:
+                    yield rel_path, file_path, {'size': size, 'lines': lines, 'refs': refs}, True
+                    continue
+
+                record = self.cache.lookup_hash(rel_path, st, digest)
+                if record is not None:
+                    yield rel_path, file_path, record, False
+                else:
+                    yield rel_path, file_path, self.cache.store(rel_path, st, digest, lines, refs), True
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def resolution_context(self):
+        """导入解析上下文指纹：文件集合与 Python 搜索路径"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update('\0'.join(self.python_resolver.roots).encode('utf-8', 'surrogateescape'))
+        for rel_path in self.file_index:
+            digest.update(b'\n' + rel_path.encode('utf-8', 'surrogateescape'))
+        return digest.hexdigest()
+
+    def analysis_context(self):
+        """分析结果指纹：中心性与循环采样参数，以及架构模式用到的 package.json 集合"""
+        raw = json.dumps([
+            self.betweenness_samples,
+            self.time_budget,
+            self.max_cycles,
+            self.cycles_per_component,
+            self.max_cycle_length,
+            self.package_manifests
+        ])
+        return hashlib.blake2b(raw.encode('utf-8', 'surrogateescape'), digest_size=16).hexdigest()
 
     def build_graph(self):
-        """构建依赖图"""
+        """
+        构建依赖图：工作进程读取文件并提取导入，主进程解析路径并合并到图中
+
+        启用缓存时只重新读取变化的文件；文件集合与搜索路径不变时，
+        未变化文件直接复用上次解析的导入。
+        """
         print("🕸️  构建依赖关系图...")
 
-        # 添加所有节点
-        for file_path in self.files:
-            rel_path = file_path.relative_to(self.root_dir)
+        context = self.resolution_context() if self.cache is not None else None
+        reuse_imports = self.cache is not None and context == self.cache.context
+        self.topology_changed = self.cache is None or not reuse_imports
+        if self.cache is not None:
+            self._analysis = self.analysis_context()
+            self.analysis_changed = self._analysis != self.cache.analysis
+
+        total = len(self.file_index)
+        show_progress = sys.stdout.isatty() and not self.verbose
+        edges = []
+        for done, (rel_path, file_path, record, reread) in enumerate(self.read_files(), 1):
             self.graph.add_node(
-                str(rel_path),
+                rel_path,
                 type=self.get_file_type(file_path),
-                size=file_path.stat().st_size,
-                lines=self.count_lines(file_path)
+                size=record['size'],
+                lines=record['lines']
             )
 
-        # 提取并添加边
-        for file_path in self.files:
-            rel_path = file_path.relative_to(self.root_dir)
-            imports = self.extract_imports(file_path)
+            imports = record.get('imports') if reuse_imports and not reread else None
+            if imports is None:
+                imports = self.resolve_imports(rel_path, file_path.suffix, record['refs'])
+                if self.cache is not None:
+                    if imports != self.cache.previous_imports(rel_path):
+                        self.topology_changed = True
+                    record['imports'] = imports
+            if reread and self.cache is not None:
+                kind = 'modified' if rel_path in self.cache.entries else 'added'
+                self.changes[kind].append(rel_path)
 
             for imp in imports:
-                self.imports[str(rel_path)].append(str(imp))
-                self.imported_by[str(imp)].append(str(rel_path))
+                self.imports[rel_path].append(imp)
+                self.imported_by[imp].append(rel_path)
+                edges.append((rel_path, imp))
 
-                # 添加边
-                self.graph.add_edge(
-                    str(rel_path),
-                    str(imp),
-                    weight=1,
-                    type='imports'
-                )
+                if self.verbose:
+                    print(f"   {rel_path} → {imp}")
 
-                print(f"   {rel_path} → {imp}")
+            if show_progress and (done % PARALLEL_CHUNK_SIZE == 0 or done == total):
+                print(f"\r   已处理 {done}/{total} 个文件", end='', flush=True)
+
+        if show_progress and total:
+            print()
+
+        # 所有节点加入后再批量加边，节点顺序与文件顺序一致
+        self.graph.add_edges_from(edges, weight=1, type='imports')
 
         print(f"   共构建 {self.graph.number_of_nodes()} 个节点，{self.graph.number_of_edges()} 条边")
 
+        if self.cache is not None:
+            self.changes['removed'] = self.cache.removed()
+            print(f"   缓存命中 {self.cache.hits} 个文件，重新读取 {self.cache.misses} 个"
+                  f"（新增 {len(self.changes['added'])}，修改 {len(self.changes['modified'])}，"
+                  f"删除 {len(self.changes['removed'])}）")
+        self._context = context
+
+    def save_cache(self):
+        """输出写入成功后再保存缓存，避免中断时缓存与输出不一致"""
+        if self.cache is not None:
+            self.cache.save(self._context, self._analysis)
+
+    def has_changes(self):
+        """与上次缓存相比是否有文件新增、修改或删除"""
+        return any(self.changes.values())
+
     def get_file_type(self, file_path):
         """获取文件类型"""
         parts = str(file_path).split('/')
@@ -162,30 +926,26 @@ class DependencyGraphBuilder:
         else:
             return 'other'
 
-    def count_lines(self, file_path):
-        """统计代码行数"""
-        try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            return len(content.splitlines())
-        except:
-            return 0
-
     def analyze_centrality(self):
         """分析节点中心性，识别核心文件"""
         print("🔍  分析网络中心性...")
 
         try:
-            # PageRank（节点重要性）
-            pagerank = nx.pagerank(self.graph, weight='weight')
-            nx.set_node_attributes(self.graph, pagerank, 'pagerank')
-
-            # 介数中心性（关键路径）
-            betweenness = nx.betweenness_centrality(self.graph)
-            nx.set_node_attributes(self.graph, betweenness, 'betweenness')
+            engine = CentralityEngine(
+                self.graph,
+                samples=self.betweenness_samples,
+                time_budget=self.time_budget
+            )
+            started = time.monotonic()
+            # PageRank（节点重要性）、介数中心性（关键路径）、度数中心性
+            for key, values in engine.run().items():
+                nx.set_node_attributes(self.graph, values, key)
+            self.centrality_info = dict(engine.info, seconds=round(time.monotonic() - started, 3))
 
-            # 度数中心性
-            degree_centrality = nx.degree_centrality(self.graph)
-            nx.set_node_attributes(self.graph, degree_centrality, 'degree')
+            if not engine.info.get('betweenness_exact', True):
+                print(f"   介数中心性按 {engine.info['betweenness_sources']} 个枢纽源点抽样估计")
+            if engine.info.get('pagerank_converged') is False:
+                print(f"⚠️  PageRank 在 {engine.info['pagerank_iterations']} 次迭代后未收敛（时间预算或迭代上限）")
 
             # 识别核心节点
             core_nodes = [
@@ -198,6 +958,51 @@ class DependencyGraphBuilder:
         except Exception as e:
             print(f"⚠️  中心性分析失败: {e}")
 
+    def load_previous_output(self, output_path):
+        """
+        读取上次的输出，用于拓扑未变化时沿用分析结果
+
+        Returns:
+            dict: 上次的摘要、核心节点与中心性（centrality: 属性名 → {节点: 值}）；
+                  不存在、损坏或节点集合不一致时返回None
+        """
+        if graph_store is None:
+            return self._load_previous_json(Path(output_path).with_suffix('.json'))
+
+        try:
+            store = graph_store.GraphStore(output_path)
+            paths = store.paths()
+            if set(paths) != set(self.graph.nodes):
+                return None
+            previous = self.store_summary(store)
+            previous['centrality'] = {key: dict(zip(paths, store[key].tolist())) for key in CENTRALITY_KEYS}
+        except (OSError, ValueError, KeyError):
+            return None
+        return previous
+
+    def _load_previous_json(self, json_path):
+        try:
+            with open(json_path, encoding='utf-8') as f:
+                previous = json.load(f)
+            previous_nodes = {node['id'] for node in previous['nodes']}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if previous_nodes != set(self.graph.nodes):
+            return None
+        previous['centrality'] = {
+            key: {node['id']: node[key] for node in previous['nodes'] if key in node}
+            for key in CENTRALITY_KEYS
+        }
+        return previous
+
+    def reuse_analysis(self, previous):
+        """沿用上次输出中的中心性指标（拓扑未变化时结果相同）"""
+        self.centrality_info = previous.get('metadata', {}).get('centrality')
+        for key, values in previous['centrality'].items():
+            for node, value in values.items():
+                if value == value:  # NaN 表示上次未计算
+                    self.graph.nodes[node][key] = value
+
     def detect_patterns(self):
         """检测架构模式"""
         print("🧠  识别架构模式...")
@@ -226,13 +1031,12 @@ class DependencyGraphBuilder:
                 'evidence': ['Controllers detected', 'Models detected', 'Views directory exists']
             })
 
-        # 检测微服务迹象
-        package_jsons = list(self.root_dir.rglob('package.json'))
-        if len(package_jsons) > 2:
+        # 检测微服务迹象（package.json 在 scan_files 时收集，排除目录不计入）
+        if len(self.package_manifests) > 2:
             patterns.append({
                 'name': 'Possible Microservices',
                 'confidence': 0.6,
-                'evidence': [f"{len(package_jsons)} package.json files found"]
+                'evidence': [f"{len(self.package_manifests)} package.json files found"]
             })
 
         print(f"   识别到 {len(patterns)} 个架构模式")
@@ -240,87 +1044,318 @@ class DependencyGraphBuilder:
         return patterns
 
     def find_cycles(self):
-        """检测循环依赖"""
-        try:
-            cycles = list(nx.simple_cycles(self.graph))
-            if cycles:
-                print(f"⚠️  发现 {len(cycles)} 个循环依赖")
-                return cycles
-            else:
-                print("✅ 未发现循环依赖")
-                return []
-        except:
-            return []
+        """
+        检测循环依赖
+
+        强连通分量（Tarjan，线性时间）给出所有互相依赖的文件组；每个非平凡分量内
+        从度数最高的文件出发做有界 BFS，采样少量代表性的最短环。
+        不枚举全部简单环（数量可能随分量规模指数增长）。
+
+        Returns:
+            tuple: (分量列表 [{'size', 'nodes', 'cycles'}], 全部采样环的列表)
+        """
+        components = []
+        cycles = []
+        for component in nx.strongly_connected_components(self.graph):
+            if len(component) == 1:
+                node = next(iter(component))
+                if not self.graph.has_edge(node, node):
+                    continue
+            components.append(component)
+
+        # 大分量优先；同样大小按文件名排序，保证输出稳定
+        components.sort(key=lambda c: (-len(c), min(c)))
+
+        result = []
+        for component in components:
+            budget = min(self.cycles_per_component, self.max_cycles - len(cycles))
+            samples = self.sample_cycles(component, budget) if budget > 0 else []
+            cycles.extend(samples)
+            result.append({
+                'size': len(component),
+                'nodes': sorted(component),
+                'cycles': samples
+            })
 
-    def generate_structured_data(self):
-        """生成结构化输出"""
-        print("📊 生成结构化数据...")
+        if result:
+            print(f"⚠️  发现 {len(result)} 组循环依赖（涉及 {sum(c['size'] for c in result)} 个文件），"
+                  f"采样 {len(cycles)} 个最短环")
+        else:
+            print("✅ 未发现循环依赖")
+        return result, cycles
+
+    def sample_cycles(self, component, limit):
+        """在一个强连通分量内采样至多 limit 个不重复的最短环（环长不超过 max_cycle_length）"""
+        starts = sorted(component, key=lambda node: (-self.graph.degree(node), node))
+        found = []
+        seen = set()
+        for start in starts[:limit * CYCLE_START_FACTOR]:
+            cycle = self.shortest_cycle_through(start, component)
+            if cycle is None:
+                continue
+            # 以最小节点为起点旋转，作为去重键
+            pivot = cycle.index(min(cycle))
+            cycle = cycle[pivot:] + cycle[:pivot]
+            if tuple(cycle) not in seen:
+                seen.add(tuple(cycle))
+                found.append(cycle)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def shortest_cycle_through(self, start, component):
+        """分量内经过 start 的最短环（BFS，深度受 max_cycle_length 限制），不存在时返回None"""
+        parent = {start: None}
+        frontier = [start]
+        for _ in range(self.max_cycle_length):
+            next_frontier = []
+            for node in frontier:
+                for successor in self.graph.successors(node):
+                    if successor == start:
+                        cycle = [node]
+                        while parent[cycle[-1]] is not None:
+                            cycle.append(parent[cycle[-1]])
+                        return cycle[::-1]
+                    if successor in component and successor not in parent:
+                        parent[successor] = node
+                        next_frontier.append(successor)
+            if not next_frontier:
+                return None
+            frontier = next_frontier
+        return None
 
-        data = {
+    def generate_summary(self, previous=None):
+        """
+        生成摘要：元数据、架构模式与循环依赖
+
+        Args:
+            previous: 拓扑未变化时上次的输出，沿用其中的模式与循环分析
+        """
+        summary = {
             'metadata': {
                 'scan_time': '2025-11-14',
                 'file_count': len(self.files),
                 'node_count': self.graph.number_of_nodes(),
-                'edge_count': self.graph.number_of_edges()
+                'edge_count': self.graph.number_of_edges(),
+                'centrality': self.centrality_info
             },
-            'nodes': [
-                {
-                    'id': node,
-                    **data
-                }
-                for node, data in self.graph.nodes(data=True)
-            ],
-            'edges': [
-                {
-                    'from': u,
-                    'to': v,
-                    **data
-                }
-                for u, v, data in self.graph.edges(data=True)
-            ],
-            'core_nodes': [
-                {
-                    'file': node,
-                    'pagerank': data['pagerank'],
-                    'betweenness': data['betweenness'],
-                    'degree': data['degree']
-                }
-                for node, data in self.graph.nodes(data=True)
-                if data.get('pagerank', 0) > 0.05
-            ],
-            'patterns': self.detect_patterns(),
-            'cycles': self.find_cycles()
+            'patterns': previous['patterns'] if previous else self.detect_patterns()
         }
 
+        if previous and 'cycle_components' in previous:
+            summary['cycle_components'] = previous['cycle_components']
+            summary['cycles'] = previous['cycles']
+        else:
+            summary['cycle_components'], summary['cycles'] = self.find_cycles()
+
+        return summary
+
+    def generate_structured_data(self, previous=None):
+        """生成完整的结构化输出（未安装 numpy 时的 JSON 格式）"""
+        print("📊 生成结构化数据...")
+
+        data = self.generate_summary(previous)
+        data['nodes'] = [
+            {
+                'id': node,
+                **attrs
+            }
+            for node, attrs in self.graph.nodes(data=True)
+        ]
+        data['edges'] = [
+            {
+                'from': u,
+                'to': v,
+                **attrs
+            }
+            for u, v, attrs in self.graph.edges(data=True)
+        ]
+        data['core_nodes'] = [
+            {
+                'file': node,
+                'pagerank': attrs['pagerank'],
+                'betweenness': attrs['betweenness'],
+                'degree': attrs['degree']
+            }
+            for node, attrs in self.graph.nodes(data=True)
+            if attrs.get('pagerank', 0) > 0.05
+        ]
+
         # 按PageRank排序核心节点
         data['core_nodes'].sort(key=lambda x: x['pagerank'], reverse=True)
 
         return data
 
-    def save_graph(self, output_path='cognition/graphs/dependency-graph.json'):
-        """保存依赖图"""
+    def save_graph(self, output_path=DEFAULT_OUTPUT_FILE, previous=None, exports=()):
+        """
+        保存依赖图：紧凑存储（整数 id + 字符串表 + CSR），JSON/GraphML 为可选导出
+
+        Args:
+            output_path: 紧凑存储文件路径（.npz）
+            previous: 见 generate_summary
+            exports: 额外导出的格式（EXPORT_FORMATS 的子集）
+
+        Returns:
+            dict: 摘要与核心节点（用于打印报告）
+        """
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        data = self.generate_structured_data()
+        if graph_store is None:
+            # 未安装 numpy：输出完整 JSON
+            json_path = output_path.with_suffix('.json')
+            data = self.generate_structured_data(previous)
+            with open(json_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            print(f"💾 依赖图已保存到 {json_path}（未安装 numpy，使用 JSON 格式）")
+            if 'graphml' in exports:
+                nx.write_graphml(self.graph, output_path.with_suffix('.graphml'))
+                print(f"💾 GraphML格式已保存到 {output_path.with_suffix('.graphml')}")
+            return data
 
-        with open(output_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        print("📊 生成结构化数据...")
+        summary = self.generate_summary(previous)
+
+        nodes = list(self.graph)
+        index = {node: i for i, node in enumerate(nodes)}
+        attrs = [self.graph.nodes[node] for node in nodes]
+        sources = [index[u] for u, _ in self.graph.edges()]
+        targets = [index[v] for _, v in self.graph.edges()]
+        centrality = {
+            key: [a.get(key, float('nan')) for a in attrs]
+            for key in CENTRALITY_KEYS
+            if any(key in a for a in attrs)
+        }
 
+        # 摘要中的节点换成整数 id
+        summary['cycle_components'] = [
+            dict(component,
+                 nodes=[index[n] for n in component['nodes']],
+                 cycles=[[index[n] for n in cycle] for cycle in component['cycles']])
+            for component in summary['cycle_components']
+        ]
+        summary['cycles'] = [[index[n] for n in cycle] for cycle in summary['cycles']]
+
+        graph_store.write_graph_store(
+            output_path,
+            paths=nodes,
+            types=[a['type'] for a in attrs],
+            sizes=[a['size'] for a in attrs],
+            lines=[a['lines'] for a in attrs],
+            sources=sources,
+            targets=targets,
+            centrality=centrality,
+            summary=summary
+        )
         print(f"💾 依赖图已保存到 {output_path}")
 
-        # 保存为GraphML格式（可用于可视化工具）
-        nx.write_graphml(self.graph, output_path.with_suffix('.graphml'))
-        print(f"💾 GraphML格式已保存到 {output_path.with_suffix('.graphml')}")
+        store = graph_store.GraphStore(output_path)
+        self.export(store, output_path, exports)
+        return self.store_summary(store)
 
+    @staticmethod
+    def store_summary(store):
+        """从紧凑存储读取摘要与核心节点"""
+        data = store.named_summary()
+        data['core_nodes'] = store.core_nodes()
         return data
 
+    @staticmethod
+    def export(store, output_path, exports):
+        """从紧凑存储流式导出 JSON / GraphML"""
+        output_path = Path(output_path)
+        for fmt in exports:
+            target = output_path.with_suffix(f'.{fmt}')
+            if fmt == 'json':
+                graph_store.export_json(store, target)
+            else:
+                graph_store.export_graphml(store, target)
+            print(f"💾 {fmt.upper()} 导出已保存到 {target}")
+
 def main():
     """主入口"""
+    parser = argparse.ArgumentParser(description='AI Runtime - 依赖关系图谱构建器')
+    parser.add_argument('root_dir', nargs='?', default='.', help='项目根目录（默认：当前目录）')
+    parser.add_argument(
+        '--python-path',
+        action='append',
+        default=[],
+        metavar='DIR',
+        help='额外的 Python 模块搜索目录（相对于根目录，可重复）'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=0,
+        metavar='N',
+        help='并行读取文件的进程数（默认：0，即 CPU 核数；1 为串行）'
+    )
+    parser.add_argument('-v', '--verbose', action='store_true', help='逐条打印依赖边')
+    parser.add_argument(
+        '--betweenness-samples',
+        type=int,
+        default=None,
+        metavar='K',
+        help=f'介数中心性抽样的枢纽源点数（默认：不超过 {BETWEENNESS_EXACT_LIMIT} 个节点时精确计算，'
+             f'否则抽样 {DEFAULT_BETWEENNESS_SAMPLES} 个；0 为始终精确）'
+    )
+    parser.add_argument(
+        '--time-budget',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help='中心性分析的时间预算，超时后使用已完成部分的估计值'
+    )
+    parser.add_argument(
+        '--max-cycles',
+        type=int,
+        default=MAX_REPORTED_CYCLES,
+        metavar='N',
+        help=f'报告的示例循环总数上限（默认：{MAX_REPORTED_CYCLES}，每组最多 {CYCLES_PER_COMPONENT} 个）'
+    )
+    parser.add_argument(
+        '--max-cycle-length',
+        type=int,
+        default=MAX_CYCLE_LENGTH,
+        metavar='N',
+        help=f'示例循环的最大长度（默认：{MAX_CYCLE_LENGTH}）'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        default=DEFAULT_OUTPUT_FILE,
+        help=f'依赖图输出文件（默认：{DEFAULT_OUTPUT_FILE}）'
+    )
+    parser.add_argument(
+        '--export',
+        action='append',
+        choices=EXPORT_FORMATS,
+        default=[],
+        help='额外导出的格式，与输出文件同名（可重复：--export json --export graphml）'
+    )
+    parser.add_argument('--no-cache', action='store_true', help='禁用逐文件导入缓存，全量重建')
+    parser.add_argument(
+        '--cache-file',
+        default=DEFAULT_CACHE_FILE,
+        help=f'逐文件导入缓存位置，相对路径相对于根目录（默认：{DEFAULT_CACHE_FILE}）'
+    )
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
     print("AI Runtime - 依赖关系图谱构建器")
     print("=" * 40)
 
-    builder = DependencyGraphBuilder()
+    builder = DependencyGraphBuilder(
+        args.root_dir,
+        python_paths=args.python_path,
+        jobs=jobs,
+        verbose=args.verbose,
+        cache_file=None if args.no_cache else args.cache_file,
+        betweenness_samples=args.betweenness_samples,
+        time_budget=args.time_budget,
+        max_cycles=args.max_cycles,
+        max_cycle_length=args.max_cycle_length
+    )
 
     try:
         # 扫描文件
@@ -329,17 +1364,34 @@ def main():
         # 构建图谱
         builder.build_graph()
 
-        # 分析中心性
-        builder.analyze_centrality()
+        # 拓扑与分析参数均未变化时沿用上次的分析结果
+        previous = None
+        if builder.cache is not None and not builder.topology_changed and not builder.analysis_changed:
+            previous = builder.load_previous_output(args.output)
+
+        if previous is not None and not builder.has_changes():
+            print("✅ 代码文件未变化，沿用上次的依赖图")
+            data = previous
+            if graph_store is not None and args.export:
+                builder.export(graph_store.GraphStore(args.output), args.output, args.export)
+        elif previous is not None:
+            print("♻️  依赖拓扑未变化，沿用上次的中心性、模式与循环分析")
+            builder.reuse_analysis(previous)
+            data = builder.save_graph(args.output, previous=previous, exports=args.export)
+        else:
+            # 分析中心性
+            builder.analyze_centrality()
+
+            # 保存结果
+            data = builder.save_graph(args.output, exports=args.export)
 
-        # 保存结果
-        data = builder.save_graph()
+        builder.save_cache()
 
         # 打印摘要
         print("\n📈 分析报告摘要:")
         print(f"   核心节点数: {len(data['core_nodes'])}")
         print(f"   识别模式: {len(data['patterns'])}")
-        print(f"   循环依赖: {len(data['cycles'])}")
+        print(f"   循环依赖: {len(data.get('cycle_components', data['cycles']))} 组，示例环 {len(data['cycles'])} 个")
 
         if data['core_nodes']:
             print("\n   前3个核心文件:")
@@ -0,0 +1,339 @@
+"""
+AI Runtime - 依赖图紧凑存储
+
+依赖图以未压缩的 .npz 保存（每个成员是一个 .npy 数组，可直接内存映射）：
+
+    format_version      [1]            格式版本
+    string_offsets      int64[m+1]     字符串表偏移；前 n 项为节点路径，其后为类型名
+    string_data         uint8[...]     字符串表 UTF-8 字节
+    node_type           int32[n]       节点类型（字符串表下标）
+    node_size           int64[n]       文件字节数
+    node_lines          int64[n]       文件行数
+    pagerank / betweenness / degree   float64[n]   中心性（未计算时为 NaN）
+    out_indptr / out_indices          CSR 正向邻接（节点 → 其导入的节点）
+    in_indptr / in_indices            CSR 反向邻接（节点 → 导入它的节点）
+    core_ids            int32[k]       核心节点（PageRank > 阈值，按 PageRank 降序）
+    summary_json        uint8[...]     元数据、架构模式与循环依赖（JSON，节点以整数 id 表示）
+
+节点 id 即数组下标。JSON 与 GraphML 是从该文件流式生成的可选导出。
+"""
+
+import json
+import os
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# 核心节点的 PageRank 阈值
+CORE_PAGERANK_THRESHOLD = 0.05
+
+CENTRALITY_KEYS = ('pagerank', 'betweenness', 'degree')
+
+
+def _string_table(strings):
+    """把字符串列表编码为 (偏移, 字节)"""
+    encoded = [s.encode('utf-8', 'surrogateescape') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return offsets, data
+
+
+def _csr(n, rows, cols):
+    """按行分组的 CSR（行内保持输入顺序）"""
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32)
+
+
+def write_graph_store(path, paths, types, sizes, lines, sources, targets, centrality, summary):
+    """
+    逐个成员写入依赖图（未压缩 zip，成员写完即释放）
+
+    Args:
+        path: 输出文件路径（.npz）
+        paths: 节点路径列表，下标即节点 id
+        types: 节点类型列表
+        sizes: 文件字节数列表
+        lines: 文件行数列表
+        sources: 边起点 id 列表
+        targets: 边终点 id 列表
+        centrality: {'pagerank'|'betweenness'|'degree': 按节点 id 排列的值}，未计算的键可缺省
+        summary: 可 JSON 序列化的摘要（元数据、模式、循环依赖）
+    """
+    n = len(paths)
+    type_names = sorted(set(types))
+    type_index = {name: n + i for i, name in enumerate(type_names)}
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+
+    def members():
+        yield 'format_version', np.array([FORMAT_VERSION], dtype=np.int32)
+        offsets, data = _string_table(list(paths) + type_names)
+        yield 'string_offsets', offsets
+        yield 'string_data', data
+        yield 'node_type', np.array([type_index[t] for t in types], dtype=np.int32)
+        yield 'node_size', np.asarray(sizes, dtype=np.int64)
+        yield 'node_lines', np.asarray(lines, dtype=np.int64)
+
+        values = {}
+        for key in CENTRALITY_KEYS:
+            column = centrality.get(key)
+            values[key] = np.full(n, np.nan) if column is None else np.asarray(column, dtype=np.float64)
+            yield key, values[key]
+
+        indptr, indices = _csr(n, sources, targets)
+        yield 'out_indptr', indptr
+        yield 'out_indices', indices
+        indptr, indices = _csr(n, targets, sources)
+        yield 'in_indptr', indptr
+        yield 'in_indices', indices
+
+        pagerank = np.nan_to_num(values['pagerank'], nan=0.0)
+        core = np.flatnonzero(pagerank > CORE_PAGERANK_THRESHOLD)
+        core = core[np.argsort(-pagerank[core], kind='stable')]
+        yield 'core_ids', core.astype(np.int32)
+
+        raw = json.dumps(summary, ensure_ascii=False).encode('utf-8')
+        yield 'summary_json', np.frombuffer(raw, dtype=np.uint8)
+
+    tmp = f"{path}.tmp"
+    with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for name, array in members():
+            with zf.open(name + '.npy', 'w', force_zip64=True) as f:
+                np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+    # 写完再替换，读取方不会看到半个文件
+    os.replace(tmp, path)
+
+
+def _mmap_member(path, info):
+    """内存映射未压缩 zip 中的一个 .npy 成员"""
+    with open(path, 'rb') as f:
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+        name_length = int.from_bytes(local_header[26:28], 'little')
+        extra_length = int.from_bytes(local_header[28:30], 'little')
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if not shape or 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran_order else 'C')
+
+
+class GraphStore:
+    """只读的依赖图存储（数组按需内存映射，只读取用到的部分）"""
+
+    def __init__(self, path, mmap=True):
+        """
+        Args:
+            path: .npz 文件路径
+            mmap: 是否内存映射（否则按需整体读入）
+
+        Raises:
+            OSError: 文件不存在或无法读取
+            ValueError: 格式不支持
+        """
+        self.path = str(path)
+        self._arrays = {}
+        try:
+            with zipfile.ZipFile(self.path) as zf:
+                self._members = {
+                    info.filename[:-4]: info for info in zf.infolist() if info.filename.endswith('.npy')
+                }
+                # 压缩的成员无法映射，退回整体读入
+                self._mmap = mmap and all(
+                    info.compress_type == zipfile.ZIP_STORED for info in self._members.values()
+                )
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"不是有效的依赖图文件: {e}")
+
+        if int(self['format_version'][0]) != FORMAT_VERSION:
+            raise ValueError(f"不支持的依赖图格式版本: {int(self['format_version'][0])}")
+
+    def __getitem__(self, name):
+        if name not in self._arrays:
+            if name not in self._members:
+                raise KeyError(name)
+            if self._mmap:
+                self._arrays[name] = _mmap_member(self.path, self._members[name])
+            else:
+                with zipfile.ZipFile(self.path) as zf, zf.open(self._members[name]) as f:
+                    self._arrays[name] = np.lib.format.read_array(f, allow_pickle=False)
+        return self._arrays[name]
+
+    @property
+    def node_count(self):
+        return len(self['node_size'])
+
+    @property
+    def edge_count(self):
+        return len(self['out_indices'])
+
+    def string(self, i):
+        """字符串表中的第 i 项"""
+        offsets = self['string_offsets']
+        return bytes(self['string_data'][offsets[i]:offsets[i + 1]]).decode('utf-8', 'surrogateescape')
+
+    def path_of(self, node_id):
+        return self.string(int(node_id))
+
+    def paths(self):
+        """全部节点路径（按 id 顺序）"""
+        offsets = self['string_offsets'][:self.node_count + 1].tolist()
+        data = bytes(self['string_data'][:offsets[-1]])
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8', 'surrogateescape') for i in range(self.node_count)]
+
+    def paths_of(self, node_ids):
+        """批量取节点路径（一次读取字符串表，适合大量节点）"""
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        offsets = self['string_offsets']
+        data = bytes(self['string_data'][:offsets[self.node_count]])
+        return [
+            data[start:end].decode('utf-8', 'surrogateescape')
+            for start, end in zip(offsets[node_ids].tolist(), offsets[node_ids + 1].tolist())
+        ]
+
+    def id_of(self, path):
+        """节点路径 → id，不存在时返回None（在字符串表中直接查找，无需建立索引）"""
+        target = path.encode('utf-8', 'surrogateescape')
+        offsets = self['string_offsets'][:self.node_count + 1]
+        data = bytes(self['string_data'][:offsets[-1]])
+        pos = data.find(target)
+        while pos >= 0:
+            # 命中必须恰好是一个完整的路径
+            i = int(np.searchsorted(offsets, pos, side='right')) - 1
+            if offsets[i] == pos and offsets[i + 1] == pos + len(target):
+                return i
+            pos = data.find(target, pos + 1)
+        return None
+
+    def type_of(self, node_id):
+        return self.string(int(self['node_type'][node_id]))
+
+    def successors(self, node_id):
+        """node_id 导入的节点 id"""
+        indptr = self['out_indptr']
+        return self['out_indices'][indptr[node_id]:indptr[node_id + 1]]
+
+    def predecessors(self, node_id):
+        """导入 node_id 的节点 id"""
+        indptr = self['in_indptr']
+        return self['in_indices'][indptr[node_id]:indptr[node_id + 1]]
+
+    def summary(self):
+        """元数据、架构模式与循环依赖（循环依赖中的节点为整数 id）"""
+        return json.loads(bytes(self['summary_json']).decode('utf-8'))
+
+    def node_record(self, node_id):
+        """单个节点的属性（与 JSON 导出中的节点一致）"""
+        record = {
+            'id': self.path_of(node_id),
+            'type': self.type_of(node_id),
+            'size': int(self['node_size'][node_id]),
+            'lines': int(self['node_lines'][node_id])
+        }
+        for key in CENTRALITY_KEYS:
+            value = float(self[key][node_id])
+            if value == value:  # NaN 表示未计算
+                record[key] = value
+        return record
+
+    def core_nodes(self, limit=None):
+        """核心节点（按 PageRank 降序），只读取核心节点对应的数据"""
+        core_ids = self['core_ids'][:limit]
+        return [
+            {
+                'file': self.path_of(node_id),
+                'pagerank': float(self['pagerank'][node_id]),
+                'betweenness': float(self['betweenness'][node_id]),
+                'degree': float(self['degree'][node_id]),
+                'type': self.type_of(node_id)
+            }
+            for node_id in core_ids
+        ]
+
+    def named_summary(self):
+        """摘要中的节点 id 换成路径（用于 JSON 导出）"""
+        summary = self.summary()
+        for component in summary.get('cycle_components', []):
+            component['nodes'] = [self.path_of(i) for i in component['nodes']]
+            component['cycles'] = [[self.path_of(i) for i in cycle] for cycle in component['cycles']]
+        summary['cycles'] = [[self.path_of(i) for i in cycle] for cycle in summary.get('cycles', [])]
+        return summary
+
+
+def export_json(store, output_path):
+    """流式导出为 JSON（每个节点/边一行，不在内存中构建完整结构）"""
+    paths = store.paths()
+    summary = store.named_summary()
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('{\n"metadata": ' + json.dumps(summary.get('metadata', {}), ensure_ascii=False))
+
+        f.write(',\n"nodes": [')
+        for node_id in range(store.node_count):
+            f.write(('\n' if node_id == 0 else ',\n') + json.dumps(store.node_record(node_id), ensure_ascii=False))
+        f.write('\n]')
+
+        f.write(',\n"edges": [')
+        indptr = store['out_indptr']
+        indices = store['out_indices']
+        first = True
+        for source in range(store.node_count):
+            for target in indices[indptr[source]:indptr[source + 1]].tolist():
+                edge = {'from': paths[source], 'to': paths[target], 'weight': 1, 'type': 'imports'}
+                f.write(('\n' if first else ',\n') + json.dumps(edge, ensure_ascii=False))
+                first = False
+        f.write('\n]')
+
+        f.write(',\n"core_nodes": ' + json.dumps(store.core_nodes(), ensure_ascii=False))
+        for key in ('patterns', 'cycle_components', 'cycles'):
+            f.write(f',\n"{key}": ' + json.dumps(summary.get(key, []), ensure_ascii=False))
+        f.write('\n}\n')
+
+
+def export_graphml(store, output_path):
+    """流式导出为 GraphML（与 networkx.write_graphml 的属性定义一致）"""
+    node_keys = [('type', 'string'), ('size', 'long'), ('lines', 'long')]
+    node_keys += [(key, 'double') for key in CENTRALITY_KEYS if not np.isnan(store[key]).all()]
+    paths = store.paths()
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns" '
+                'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                'xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns '
+                'http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n')
+        for i, (name, kind) in enumerate(node_keys):
+            f.write(f'  <key id="d{i}" for="node" attr.name="{name}" attr.type="{kind}" />\n')
+        weight_key, type_key = f'd{len(node_keys)}', f'd{len(node_keys) + 1}'
+        f.write(f'  <key id="{weight_key}" for="edge" attr.name="weight" attr.type="long" />\n')
+        f.write(f'  <key id="{type_key}" for="edge" attr.name="type" attr.type="string" />\n')
+        f.write('  <graph edgedefault="directed">\n')
+
+        for node_id in range(store.node_count):
+            record = store.node_record(node_id)
+            f.write(f'    <node id={quoteattr(paths[node_id])}>\n')
+            for i, (name, _) in enumerate(node_keys):
+                f.write(f'      <data key="d{i}">{escape(str(record[name]))}</data>\n')
+            f.write('    </node>\n')
+
+        indptr = store['out_indptr']
+        indices = store['out_indices']
+        for source in range(store.node_count):
+            for target in indices[indptr[source]:indptr[source + 1]].tolist():
+                f.write(f'    <edge source={quoteattr(paths[source])} target={quoteattr(paths[target])}>\n'
+                        f'      <data key="{weight_key}">1</data>\n'
+                        f'      <data key="{type_key}">imports</data>\n'
+                        '    </edge>\n')
+
+        f.write('  </graph>\n</graphml>\n')
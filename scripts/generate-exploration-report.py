@@ -210,14 +210,19 @@ def generate_report(root_dir='.'):
 
     print("📄 生成探索报告...")
 
-    # 读取依赖图（如果存在）
-    graph_file = root / 'cognition/graphs/dependency-graph.json'
-    graph_data = {}
+    # 读取依赖图（如果存在）：紧凑存储只映射核心节点用到的数组，无需解析整个图
+    graph_file = root / 'cognition/graphs/dependency-graph.npz'
+    json_file = root / 'cognition/graphs/dependency-graph.json'
     core_nodes = []
     if graph_file.exists():
-        with open(graph_file) as f:
-            graph_data = json.load(f)
-            core_nodes = graph_data.get('core_nodes', [])
+        try:
+            from dependency_graph_store import GraphStore
+            core_nodes = GraphStore(graph_file).core_nodes()
+        except (ImportError, OSError, ValueError, KeyError) as e:
+            print(f"⚠️  无法读取依赖图 {graph_file}: {e}")
+    elif json_file.exists():
+        with open(json_file) as f:
+            core_nodes = json.load(f).get('core_nodes', [])
 
     # 技术栈分析
     tech_stack = detect_tech_stack(root_dir)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+AI Runtime - 依赖图查询工具
+内存映射 build-dependency-graph.py 保存的依赖图，无需重建即可回答：
+
+    dependents FILE      传递依赖方（修改 FILE 会影响哪些文件）
+    dependencies FILE    传递依赖（FILE 直接或间接导入了哪些文件）
+    path FROM TO         FROM 到 TO 的最短导入路径
+    top                  按 PageRank（或其他中心性）排名的前 k 个文件
+    stats                节点、边与循环依赖概况
+
+查询只读取用到的数组，在整数 id 上沿 CSR 邻接（反向邻接已预先保存）做逐层 BFS。
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from dependency_graph_store import CENTRALITY_KEYS, GraphStore
+
+# 默认依赖图文件（相对于工作目录）
+DEFAULT_GRAPH_FILE = 'cognition/graphs/dependency-graph.npz'
+
+
+def bfs(indptr, indices, start, target=None, max_depth=None):
+    """
+    从 start 出发沿 CSR 邻接逐层 BFS（每层一次向量化展开）
+
+    Args:
+        indptr, indices: CSR 邻接
+        start: 起点 id
+        target: 到达该 id 后提前结束
+        max_depth: 最大层数（None 表示不限）
+
+    Returns:
+        (dist, parent): 各节点到起点的层数与 BFS 树中的父节点，未到达为 -1
+    """
+    n = len(indptr) - 1
+    dist = np.full(n, -1, dtype=np.int32)
+    parent = np.full(n, -1, dtype=np.int32)
+    dist[start] = 0
+    frontier = np.array([start], dtype=np.int64)
+    depth = 0
+
+    while frontier.size and (max_depth is None or depth < max_depth):
+        if target is not None and dist[target] >= 0:
+            break
+        depth += 1
+
+        # 展开当前层所有节点的邻居
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            break
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        neighbours = indices[offsets]
+        sources = np.repeat(frontier, counts)
+
+        unseen = dist[neighbours] < 0
+        frontier, first = np.unique(neighbours[unseen], return_index=True)
+        dist[frontier] = depth
+        parent[frontier] = sources[unseen][first]
+
+    return dist, parent
+
+
+def resolve_node(store, name):
+    """
+    文件名 → 节点 id：先精确匹配，再按路径后缀唯一匹配
+
+    Raises:
+        ValueError: 找不到或匹配到多个文件
+    """
+    path = Path(name).as_posix()
+    while path.startswith('./'):
+        path = path[2:]
+
+    node_id = store.id_of(path)
+    if node_id is not None:
+        return node_id
+
+    candidates = [i for i, p in enumerate(store.paths()) if p.endswith('/' + path)]
+    if len(candidates) == 1:
+        return candidates[0]
+    if not candidates:
+        raise ValueError(f"依赖图中没有文件: {name}")
+    listed = '\n'.join(f"     - {store.path_of(i)}" for i in candidates[:10])
+    raise ValueError(f"{name} 匹配到 {len(candidates)} 个文件，请指定完整路径:\n{listed}")
+
+
+def reachable(store, name, reverse, max_depth=None):
+    """传递依赖方（reverse=True）或传递依赖，按距离、路径排序"""
+    node_id = resolve_node(store, name)
+    prefix = 'in' if reverse else 'out'
+    dist, _ = bfs(store[f'{prefix}_indptr'], store[f'{prefix}_indices'], node_id, max_depth=max_depth)
+
+    found = np.flatnonzero(dist > 0)
+    nodes = sorted(zip(dist[found].tolist(), store.paths_of(found)))
+    return {
+        'file': store.path_of(node_id),
+        'count': len(nodes),
+        'nodes': [{'file': path, 'distance': distance} for distance, path in nodes]
+    }
+
+
+def shortest_path(store, source, target):
+    """source 沿导入关系到 target 的最短路径，不存在时 path 为空"""
+    source_id = resolve_node(store, source)
+    target_id = resolve_node(store, target)
+    _, parent = bfs(store['out_indptr'], store['out_indices'], source_id, target=target_id)
+
+    path = []
+    if source_id == target_id or parent[target_id] >= 0:
+        node = target_id
+        while node != source_id:
+            path.append(node)
+            node = int(parent[node])
+        path.append(source_id)
+        path.reverse()
+
+    return {
+        'from': store.path_of(source_id),
+        'to': store.path_of(target_id),
+        'path': [store.path_of(i) for i in path]
+    }
+
+
+def top_nodes(store, k, key='pagerank'):
+    """按中心性降序的前 k 个节点（未计算的节点排在最后）"""
+    values = np.asarray(store[key])
+    scores = np.where(np.isnan(values), -np.inf, values)
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return [store.node_record(int(i)) for i in order if scores[i] > -np.inf]
+
+
+def graph_stats(store):
+    """节点、边与循环依赖概况"""
+    summary = store.summary()
+    return {
+        'node_count': store.node_count,
+        'edge_count': store.edge_count,
+        'core_nodes': len(store['core_ids']),
+        'patterns': len(summary.get('patterns', [])),
+        'cycle_components': len(summary.get('cycle_components', [])),
+        'metadata': summary.get('metadata', {})
+    }
+
+
+def print_reachable(result, reverse, limit):
+    title = '依赖方（受影响的文件）' if reverse else '依赖'
+    print(f"🔗 {result['file']} 的传递{title}: {result['count']} 个")
+    shown = result['nodes'][:limit] if limit else result['nodes']
+    distance = None
+    for node in shown:
+        if node['distance'] != distance:
+            distance = node['distance']
+            print(f"\n   距离 {distance}:")
+        print(f"     - {node['file']}")
+    if len(shown) < result['count']:
+        print(f"\n   ...（其余 {result['count'] - len(shown)} 个，使用 --limit 0 显示全部）")
+
+
+def print_path(result):
+    if not result['path']:
+        print(f"🚫 {result['from']} 不会（直接或间接）导入 {result['to']}")
+        return
+    print(f"🛤️  最短路径（{len(result['path']) - 1} 步）:")
+    for i, path in enumerate(result['path']):
+        print(f"   {'  ' * i}{'└─ ' if i else ''}{path}")
+
+
+def print_top(nodes, key):
+    print(f"🏆 {key} 前 {len(nodes)} 的文件:")
+    for rank, node in enumerate(nodes, 1):
+        print(f"   {rank:>3}. {node['id']}: {node[key]:.4f}")
+
+
+def print_stats(stats):
+    print("📈 依赖图概况:")
+    print(f"   节点数: {stats['node_count']}")
+    print(f"   边数: {stats['edge_count']}")
+    print(f"   核心节点数: {stats['core_nodes']}")
+    print(f"   识别模式: {stats['patterns']}")
+    print(f"   循环依赖: {stats['cycle_components']} 组")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='查询已保存的依赖关系图谱')
+    parser.add_argument(
+        '-g', '--graph',
+        default=DEFAULT_GRAPH_FILE,
+        help=f'依赖图文件（默认：{DEFAULT_GRAPH_FILE}）'
+    )
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for command, help_text in (('dependents', '传递依赖方：修改该文件会影响哪些文件'),
+                               ('dependencies', '传递依赖：该文件直接或间接导入了哪些文件')):
+        sub = subparsers.add_parser(command, help=help_text)
+        sub.add_argument('file', help='文件路径（相对于扫描根目录，可只写唯一的路径后缀）')
+        sub.add_argument('-d', '--depth', type=int, default=None, help='最大距离（默认不限）')
+        sub.add_argument('-l', '--limit', type=int, default=50, help='最多显示的文件数，0 表示全部（默认：50）')
+
+    sub = subparsers.add_parser('path', help='两个文件之间的最短导入路径')
+    sub.add_argument('source', help='起点文件')
+    sub.add_argument('target', help='终点文件')
+
+    sub = subparsers.add_parser('top', help='按中心性排名的文件')
+    sub.add_argument('-k', type=int, default=10, help='显示数量（默认：10）')
+    sub.add_argument('--by', choices=CENTRALITY_KEYS, default='pagerank', help='排序指标（默认：pagerank）')
+
+    subparsers.add_parser('stats', help='依赖图概况')
+
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        store = GraphStore(args.graph)
+
+        if args.command in ('dependents', 'dependencies'):
+            reverse = args.command == 'dependents'
+            result = reachable(store, args.file, reverse, max_depth=args.depth)
+            printer = lambda: print_reachable(result, reverse, args.limit)
+        elif args.command == 'path':
+            result = shortest_path(store, args.source, args.target)
+            printer = lambda: print_path(result)
+        elif args.command == 'top':
+            result = top_nodes(store, args.k, args.by)
+            printer = lambda: print_top(result, args.by)
+        else:
+            result = graph_stats(store)
+            printer = lambda: print_stats(result)
+
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+        else:
+            printer()
+            print(f"\n⏱️  查询耗时: {elapsed:.1f} ms")
+
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ 错误: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -44,8 +44,19 @@ echo
 # Step 3: 依赖关系图谱构建
 echo "🕸️  阶段2: 构建依赖关系图谱"
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
-python3 "$ROOT_DIR/.ai-runtime/scripts/build-dependency-graph.py"
+python3 "$ROOT_DIR/.ai-runtime/scripts/build-dependency-graph.py" --export graphml
 echo "✅ 依赖图谱构建完成"
+
+# 依赖图为紧凑存储（.npz），边数从存储头部读取，无需解析整个文件
+GRAPH_FILE="$ROOT_DIR/cognition/graphs/dependency-graph.npz"
+graph_edge_count() {
+  if [ -f "$GRAPH_FILE" ]; then
+    python3 -c 'import sys; sys.path.insert(0, sys.argv[1]); from dependency_graph_store import GraphStore; print(GraphStore(sys.argv[2]).edge_count)' \
+      "$ROOT_DIR/.ai-runtime/scripts" "$GRAPH_FILE" 2>/dev/null || echo "0"
+  else
+    echo "0"
+  fi
+}
 echo
 
 # Step 4: 生成探索报告
@@ -108,7 +119,7 @@ cat >> "$TIMELINE_FILE" << EOF
 - 识别 $(ls $ROOT_DIR/cognition/exploration-reports/*.md 2>/dev/null | wc -l) 个探索报告
 
 **发现**:
-$(if [ -f "$ROOT_DIR/cognition/graphs/dependency-graph.json" ]; then
+$(if [ -f "$GRAPH_FILE" ]; then
   echo "- 依赖图谱已更新"
 fi)
 
@@ -131,9 +142,9 @@ cat > "$NEURAL_FILE" << EOF
 
 基于本次探索构建的连接网络：
 
-$(if [ -f "$ROOT_DIR/cognition/graphs/dependency-graph.json" ]; then
-  echo "依赖图谱: cognition/graphs/dependency-graph.json"
-  echo "连接数: $(cat $ROOT_DIR/cognition/graphs/dependency-graph.json | grep -c '"from"')"
+$(if [ -f "$GRAPH_FILE" ]; then
+  echo "依赖图谱: cognition/graphs/dependency-graph.npz"
+  echo "连接数: $(graph_edge_count)"
 fi)
 
 ## 激活阈值
@@ -186,7 +197,7 @@ cat << EOF > "$STATE_FILE"
   "cognitive_mode": "exploration",
   "memory_layers_updated": ["short-term", "long-term", "episodic"],
   "artifacts": {
-    "dependency_graph": "cognition/graphs/dependency-graph.json",
+    "dependency_graph": "cognition/graphs/dependency-graph.npz",
     "exploration_report": "cognition/exploration-reports/exploration-$TIMESTAMP.md",
     "neural_snapshot": "memory/short-term/neural-connections-$TIMESTAMP.md",
     "timeline_entry": "memory/episodic/timeline.md"
@@ -194,7 +205,7 @@ cat << EOF > "$STATE_FILE"
   "metrics": {
     "files_scanned": $(find "$ROOT_DIR" -name "*.js" -o -name "*.ts" -o -name "*.py" 2>/dev/null | wc -l),
     "patterns_identified": $(ls "$ROOT_DIR"/cognition/exploration-reports/*.md 2>/dev/null | wc -l),
-    "neural_connections": $(if [ -f "$ROOT_DIR/cognition/graphs/dependency-graph.json" ]; then cat "$ROOT_DIR/cognition/graphs/dependency-graph.json" | grep -c '"from"'; else echo "0"; fi)
+    "neural_connections": $(graph_edge_count)
   }
 }
 EOF
@@ -208,15 +219,15 @@ echo "║  📊 探索结果摘要:                                    ║"
 echo "║                                                        ║"
 SCANNED_FILES=$(find "$ROOT_DIR" -name "*.js" -o -name "*.ts" -o -name "*.py" 2>/dev/null | wc -l)
 echo "║     扫描文件: $SCANNED_FILES 个                      ║"
-CONNECTION_COUNT=$(if [ -f "$ROOT_DIR/cognition/graphs/dependency-graph.json" ]; then cat "$ROOT_DIR/cognition/graphs/dependency-graph.json" | grep -c '"from"'; else echo "0"; fi)
+CONNECTION_COUNT=$(graph_edge_count)
 echo "║     神经连接: $CONNECTION_COUNT 条                   ║"
 REPORT_COUNT=$(ls "$ROOT_DIR"/cognition/exploration-reports/*.md 2>/dev/null | wc -l)
 echo "║     生成报告: $REPORT_COUNT 份                       ║"
 echo "║                                                        ║"
 echo "║  💾 生成文件:                                        ║"
 echo "║     - $STATE_FILE        ║"
-if [ -f "$ROOT_DIR/cognition/graphs/dependency-graph.json" ]; then
-  echo "║     - $ROOT_DIR/cognition/graphs/dependency-graph.json ║"
+if [ -f "$GRAPH_FILE" ]; then
+  echo "║     - $ROOT_DIR/cognition/graphs/dependency-graph.npz ║"
 fi
 if [ -f "$ROOT_DIR/memory/short-term/neural-connections-$TIMESTAMP.md" ]; then
   echo "║     - $ROOT_DIR/memory/short-term/neural-connections...║"
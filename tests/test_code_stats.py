@@ -0,0 +1,60 @@
+"""code-stats 分类器测试"""
+
+import importlib.util
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "toolkit" / "python" / "analysis" / "code-stats.py"
+_spec = importlib.util.spec_from_file_location("code_stats", SCRIPT)
+code_stats = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(code_stats)
+
+
+def count_shell(source: str):
+    return code_stats.classifier_for('.sh').count(source.splitlines(keepends=True))
+
+
+def test_heredoc_with_apostrophe():
+    stats = count_shell(
+        "#!/bin/bash\n"
+        "# setup\n"
+        "cat <<EOF\n"
+        "it's here\n"
+        "# not a comment\n"
+        "EOF\n"
+        "# helper\n"
+        "greet() {\n"
+        "  echo hi\n"
+        "}\n"
+    )
+    assert stats['lines'] == 10
+    assert stats['comments'] == 3
+    assert stats['code'] == 7
+    assert stats['functions'] == 1
+
+
+def test_heredoc_variants():
+    stats = count_shell(
+        "cat <<-'END' > out\n"
+        "\tdon't # body\n"
+        "\tEND\n"
+        "cat <<A <<\"B\"\n"
+        "a'\n"
+        "A\n"
+        "b\n"
+        "B\n"
+        "f() { :; } # trailing\n"
+    )
+    assert stats['comments'] == 1
+    assert stats['functions'] == 1
+
+
+def test_unterminated_quote_inside_word_does_not_span_lines():
+    stats = count_shell("echo don't\n# comment\ng() {\n}\n")
+    assert stats['comments'] == 1
+    assert stats['functions'] == 1
+
+
+def test_quoted_string_spanning_lines():
+    stats = count_shell('x="multi\nline # not a comment"\n# comment\n')
+    assert stats['comments'] == 1
+    assert stats['code'] == 2
@@ -0,0 +1,56 @@
+"""memory_discovery 查询测试"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "memory"))
+
+from memory_discovery import MemoryDiscovery  # noqa: E402
+
+# 混合带时区与无时区的时间戳；间隔足够大，结果与本地时区无关
+EVENTS = {
+    "naive-early": "2025-01-01T00:00:00",
+    "utc": "2025-01-02T00:00:00+00:00",
+    "plus8": "2025-01-03T00:00:00+08:00",
+    "naive-late": "2025-01-05T12:00:00",
+}
+ASCENDING = ["naive-early", "utc", "plus8", "naive-late"]
+
+
+def make_discovery(tmp_path: Path) -> MemoryDiscovery:
+    episodic = tmp_path / "episodic"
+    episodic.mkdir()
+    for event_id, timestamp in EVENTS.items():
+        (episodic / f"{event_id}.md").write_text(
+            f'---\nid: {event_id}\ntimestamp: "{timestamp}"\n---\n\n# {event_id}\n',
+            encoding="utf-8",
+        )
+    return MemoryDiscovery(tmp_path)
+
+
+def test_mixed_timezones_query_and_order(tmp_path):
+    discovery = make_discovery(tmp_path)
+
+    assert [e.id for e in discovery.query(order_by="timestamp asc")] == ASCENDING
+    assert [e.id for e in discovery.query(order_by="date desc")] == ASCENDING[::-1]
+    later = discovery.query(where="timestamp >= '2025-01-02T12:00:00+00:00'", order_by="timestamp asc")
+    assert [e.id for e in later] == ["plus8", "naive-late"]
+
+
+def test_mixed_timezones_cursor_pagination(tmp_path):
+    discovery = make_discovery(tmp_path)
+
+    for order_by, expected in (("timestamp asc", ASCENDING), ("timestamp desc", ASCENDING[::-1])):
+        seen, cursor = [], None
+        while True:
+            events, cursor = discovery.query_page(order_by=order_by, limit=1, after=cursor)
+            seen.extend(e.id for e in events)
+            if cursor is None:
+                break
+        assert seen == expected
+
+
+def test_zero_limit_returns_no_events(tmp_path):
+    discovery = make_discovery(tmp_path)
+
+    assert discovery.query_page(limit=0) == ([], None)
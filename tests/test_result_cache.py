@@ -0,0 +1,49 @@
+"""discover 结果缓存测试"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "toolkit"))
+
+from discover.result_cache import CachePolicy, ResultCache  # noqa: E402
+
+POLICY = CachePolicy.from_meta({
+    "结果缓存": {
+        "可缓存": True,
+        "禁用参数": ["-o", "--output"],
+        "值参数": ["--format", "--cache-file"],
+    }
+})
+
+
+def test_allows_rejects_attached_short_option():
+    assert not POLICY.allows(["-oout.json"])
+    assert not POLICY.allows(["--output=out.json"])
+    assert POLICY.allows([".", "--format", "json"])
+
+
+def test_option_values_are_not_inputs():
+    positionals, values = POLICY.split_args(
+        ["src", "--cache-file", "stats.pkl", "--format=json", "--json"])
+    assert positionals == ["src"]
+    assert values == ["stats.pkl", "json"]
+
+
+def test_rewritten_cache_file_keeps_fingerprint(tmp_path, monkeypatch):
+    tool = tmp_path / "tool.py"
+    tool.write_text("print('ok')\n", encoding="utf-8")
+    (tmp_path / "a.py").write_text("x = 1\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    cache = ResultCache(tmp_path / ".results")
+    args = [".", "--cache-file", "stats.pkl"]
+    first = cache.fingerprint(tool, args, POLICY)
+
+    # 工具每次运行都会重写自己的缓存文件
+    (tmp_path / "stats.pkl").write_text("{}", encoding="utf-8")
+    assert cache.fingerprint(tool, args, POLICY) == first
+
+    (tmp_path / "a.py").write_text("x = 2\n", encoding="utf-8")
+    os.utime(tmp_path / "a.py", ns=(1, 1))
+    assert cache.fingerprint(tool, args, POLICY) != first
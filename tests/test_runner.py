@@ -0,0 +1,32 @@
+"""discover 批量运行测试"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "toolkit"))
+
+from discover.runner import ToolInvocation, ToolRunner  # noqa: E402
+
+
+def make_invocation(root: Path, name: str, source: str) -> ToolInvocation:
+    (root / name).write_text(source, encoding="utf-8")
+    tool = SimpleNamespace(tool_id=name, tool_name=name, tool_file=name)
+    return ToolInvocation(tool=tool, args=[])
+
+
+def test_crashed_worker_fails_only_the_batch(tmp_path):
+    crash = make_invocation(tmp_path, "crash.py", "import os\nos._exit(3)\n")
+    echo = make_invocation(tmp_path, "echo.py", "print('ok')\n")
+    shell = make_invocation(tmp_path, "echo.sh", "echo shell\n")
+
+    with ToolRunner(tmp_path, jobs=2) as runner:
+        results = runner.run_batch([crash, shell])
+        assert results[0].status == "failed"
+        assert "异常退出" in results[0].stderr
+        assert results[1].stdout == "shell\n"
+
+        # 损坏的进程池已丢弃，后续批次使用新的进程池
+        results = runner.run_batch([echo])
+        assert results[0].returncode == 0
+        assert results[0].stdout == "ok\n"
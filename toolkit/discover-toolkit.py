@@ -20,6 +20,7 @@ Toolkit Discovery and Management Tool for AI-Runtime
     python3 discover-toolkit.py recommend "分析日志"     # 推荐工具
     python3 discover-toolkit.py search json             # 搜索工具
     python3 discover-toolkit.py run tool-id [args]      # 运行工具
+    python3 discover-toolkit.py refresh                 # 重建工具目录缓存
 
 架构：
     使用模块化设计，包含以下组件：
@@ -27,6 +28,7 @@ Toolkit Discovery and Management Tool for AI-Runtime
     - models/     : 数据模型（Tool, InternalTool, ExternalTool）
     - formatters/ : 输出格式化器（表格/JSON）
     - config/     : 配置文件
+    - cache.py    : 工具目录缓存（.cache/，按目录签名自动失效）
 
 旧版本备份：discover-toolkit.py.old（单文件实现）
 新版本：模块化包结构（discover/）
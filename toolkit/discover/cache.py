@@ -0,0 +1,186 @@
+"""
+Catalogue Cache - 工具目录持久化缓存
+
+将检测器的扫描结果按来源（internal/external）持久化到磁盘，
+以目录签名（目录与 .meta.yml 文件的 mtime/size）作为失效依据，
+避免每次 CLI 调用都重新遍历目录、解析 YAML、探测工具文件。
+"""
+
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 缓存格式版本，模型结构变化时递增以自动失效旧缓存
+CACHE_VERSION = 1
+
+# 默认缓存位置（相对于 toolkit 根目录）
+DEFAULT_CACHE_FILE = Path(".cache") / "discover-catalogue.pickle"
+
+# 签名扫描时跳过的目录名
+SKIP_DIR_NAMES = {"__pycache__", "node_modules"}
+
+
+def directory_signature(
+    roots: Iterable[Path],
+    exclude: Iterable[str] = (),
+    suffix: str = ".meta.yml"
+) -> Tuple:
+    """
+    计算目录树签名
+
+    记录每个子目录的 mtime（覆盖文件新增/删除/重命名）以及
+    每个元数据文件的 mtime/size（覆盖内容修改）。只做 stat，不读文件内容。
+
+    Args:
+        roots: 需要签名的根目录
+        exclude: 根目录下需要跳过的一级子目录名
+        suffix: 需要记录 mtime/size 的文件后缀
+
+    Returns:
+        Tuple: 可比较、可序列化的签名
+    """
+    excluded = set(exclude)
+    entries: List[Tuple[str, int, int]] = []
+
+    for root in roots:
+        if not root.is_dir():
+            entries.append((str(root), -1, -1))
+            continue
+
+        for dirpath, dirnames, filenames in os.walk(root):
+            if dirpath == str(root):
+                dirnames[:] = [d for d in dirnames if d not in excluded]
+            dirnames[:] = sorted(
+                d for d in dirnames
+                if not d.startswith('.') and d not in SKIP_DIR_NAMES
+            )
+
+            if dirpath == str(root):
+                # 根目录的 mtime 不计入：缓存/遥测目录（.cache/、.telemetry/）
+                # 首次创建时会改变它；根目录下元数据文件的增删由文件条目覆盖
+                entries.append((dirpath, 0, 0))
+            else:
+                try:
+                    st = os.stat(dirpath)
+                    entries.append((dirpath, st.st_mtime_ns, 0))
+                except OSError:
+                    continue
+
+            for name in sorted(filenames):
+                if not name.endswith(suffix):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_mtime_ns, st.st_size))
+
+    return tuple(entries)
+
+
+def path_signature() -> Tuple:
+    """
+    计算 PATH 签名
+
+    外部工具的安装状态依赖 PATH，记录 PATH 内容与各目录 mtime，
+    安装/卸载命令后目录 mtime 变化即可触发失效。
+    """
+    entries: List[Tuple[str, int]] = []
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if not directory:
+            continue
+        try:
+            entries.append((directory, os.stat(directory).st_mtime_ns))
+        except OSError:
+            entries.append((directory, -1))
+    return tuple(entries)
+
+
+class CatalogueCache:
+    """工具目录缓存
+
+    缓存文件结构::
+
+        {
+            "version": CACHE_VERSION,
+            "sources": {
+                "internal": {"signature": (...), "tools": [...]},
+                "external": {"signature": (...), "tools": [...]},
+            }
+        }
+    """
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._dirty = False
+
+    def _load(self):
+        """按需读取缓存文件，任何读取错误都视为缓存为空"""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        try:
+            with open(self.cache_file, 'rb') as f:
+                data = pickle.load(f)
+        except Exception:
+            return
+
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self._sources = data.get("sources", {})
+
+    def get(self, source: str, signature: Tuple) -> Optional[List[Any]]:
+        """
+        读取指定来源的缓存工具列表
+
+        Args:
+            source: 来源名称（internal/external）
+            signature: 当前目录签名
+
+        Returns:
+            List: 签名一致时返回缓存的工具列表，否则返回None
+        """
+        self._load()
+        entry = self._sources.get(source)
+        if entry and entry.get("signature") == signature:
+            return entry.get("tools")
+        return None
+
+    def put(self, source: str, signature: Tuple, tools: List[Any]):
+        """写入指定来源的工具列表（调用 save() 后落盘）"""
+        self._load()
+        self._sources[source] = {"signature": signature, "tools": list(tools)}
+        self._dirty = True
+
+    def save(self):
+        """原子写入缓存文件，写入失败时静默跳过（缓存仅用于加速）"""
+        if not self._dirty:
+            return
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(
+                    {"version": CACHE_VERSION, "sources": self._sources},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except Exception:
+            pass
+
+    def clear(self):
+        """删除缓存文件"""
+        self._sources = {}
+        self._loaded = True
+        self._dirty = False
+        try:
+            self.cache_file.unlink()
+        except FileNotFoundError:
+            pass
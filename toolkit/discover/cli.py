@@ -5,7 +5,10 @@ CLI Interface for Toolkit Discovery
 import sys
 import argparse
 from pathlib import Path
+from typing import Optional
 from .discovery import ToolkitDiscovery
+from .runner import ToolRunner, ToolInvocation
+from .result_cache import CachePolicy, ResultCache, DEFAULT_RESULT_CACHE_DIR
 
 
 class ToolkitCLI:
@@ -43,6 +46,9 @@ class ToolkitCLI:
   python -m discover show SERVICE-CHECK-001 # 查看工具详情
   python -m discover recommend '分析日志'   # 推荐工具
   python -m discover search json            # 搜索工具
+  python -m discover run --batch calls.txt  # 批量运行（常驻Python进程）
+  python -m discover run-many BASH-CHECK-DISK-003 SERVICE-CHECK-001 --json
+  python -m discover refresh                # 重建工具目录缓存
             """
         )
 
@@ -57,12 +63,18 @@ class ToolkitCLI:
         # run 命令
         self._add_run_parser(subparsers)
 
+        # run-many 命令
+        self._add_run_many_parser(subparsers)
+
         # recommend 命令
         self._add_recommend_parser(subparsers)
 
         # search 命令
         self._add_search_parser(subparsers)
 
+        # refresh 命令
+        self._add_refresh_parser(subparsers)
+
         return parser
 
     def _add_list_parser(self, subparsers):
@@ -83,9 +95,27 @@ class ToolkitCLI:
     def _add_run_parser(self, subparsers):
         """添加run命令"""
         run_parser = subparsers.add_parser("run", help="运行工具")
-        run_parser.add_argument("tool", help="工具ID或名称")
+        run_parser.add_argument("--batch", metavar="FILE",
+                                help="批量运行：每行一个调用 'TOOL [ARGS...]'，'-' 表示从stdin读取")
+        run_parser.add_argument("--jobs", type=int, default=None,
+                                help="批量运行的并发数（默认CPU核数）")
+        run_parser.add_argument("--cache", action="store_true",
+                                help="对声明了'结果缓存'的幂等工具，输入未变化时回放上次结果")
+        run_parser.add_argument("tool", nargs="?", help="工具ID或名称")
         run_parser.add_argument("args", nargs=argparse.REMAINDER, help="工具参数")
 
+    def _add_run_many_parser(self, subparsers):
+        """添加run-many命令"""
+        run_many_parser = subparsers.add_parser("run-many", help="并发运行多个工具")
+        run_many_parser.add_argument("tools", nargs="*",
+                                     help="工具调用，可带参数: 'BASH-CHECK-DISK-003 /var 90'")
+        run_many_parser.add_argument("--manifest", metavar="FILE",
+                                     help="YAML清单: [{tool: ID, args: [...], timeout: 秒}]")
+        run_many_parser.add_argument("--jobs", type=int, default=None, help="最大并发数（默认CPU核数）")
+        run_many_parser.add_argument("--timeout", type=float, default=None, help="单个工具超时秒数")
+        run_many_parser.add_argument("--json", action="store_true",
+                                     help="stdout输出JSON摘要（工具输出转到stderr）")
+
     def _add_recommend_parser(self, subparsers):
         """添加recommend命令"""
         recommend_parser = subparsers.add_parser("recommend", help="推荐工具")
@@ -96,6 +126,10 @@ class ToolkitCLI:
         search_parser = subparsers.add_parser("search", help="搜索工具")
         search_parser.add_argument("keyword", help="搜索关键词")
 
+    def _add_refresh_parser(self, subparsers):
+        """添加refresh命令"""
+        subparsers.add_parser("refresh", help="重新扫描工具并重建目录缓存")
+
     def _execute_command(self, args) -> int:
         """执行命令"""
         if args.command == "list":
@@ -104,10 +138,14 @@ class ToolkitCLI:
             return self._cmd_show(args)
         elif args.command == "run":
             return self._cmd_run(args)
+        elif args.command == "run-many":
+            return self._cmd_run_many(args)
         elif args.command == "recommend":
             return self._cmd_recommend(args)
         elif args.command == "search":
             return self._cmd_search(args)
+        elif args.command == "refresh":
+            return self._cmd_refresh(args)
 
         return 0
 
@@ -116,21 +154,18 @@ class ToolkitCLI:
         # 判断输出格式
         format_type = "json" if args.json else "table"
 
-        # 获取工具列表
+        # 获取工具列表（仅加载需要展示的来源）
         if args.external:
             tools = self.discovery.external_tools
-        elif args.include_external:
-            tools = self.discovery.all_tools
         else:
-            tools = self.discovery.internal_tools
-
-        # 过滤内部工具
-        if not args.external:
+            # 过滤内部工具
             tools = self.discovery.filter_tools(
                 lang=args.lang,
                 purpose=args.purpose,
                 query=args.query
             )
+            if args.include_external:
+                tools = tools + self.discovery.external_tools
 
         # 输出
         output = self.discovery.format_tools(tools, format_type=format_type)
@@ -145,44 +180,249 @@ class ToolkitCLI:
             return 1
 
         print(self.discovery.format_tool(tool))
+
+        stats = self.discovery.run_stats(tool)
+        if stats:
+            print(self.discovery.table_formatter.format_run_stats(stats))
         return 0
 
-    def _cmd_run(self, args) -> int:
-        """执行run命令"""
-        # 注意: 这里简化处理，实际应该直接从文件执行
-        # 为了保持向后兼容，这里直接调用工具文件
-        import subprocess
+    def _record_run(self, result, mode: str):
+        """记录执行遥测"""
+        self.discovery.telemetry.record(
+            tool_id=result.tool_id,
+            args=result.args,
+            wall=result.duration,
+            returncode=result.returncode,
+            cpu=result.cpu,
+            max_rss_kb=result.max_rss_kb,
+            mode=mode
+        )
 
-        tool = self.discovery.find_tool(args.tool)
+    def _resolve_runnable(self, name_or_id: str):
+        """查找可运行的内部工具，失败时返回 (None, 错误信息)"""
+        tool = self.discovery.find_tool(name_or_id)
         if not tool:
-            print(f"❌ 未找到工具: {args.tool}")
-            return 1
+            return None, f"❌ 未找到工具: {name_or_id}"
 
         # 检查是否有tool_file（仅内部工具有）
         if not hasattr(tool, 'tool_file') or not tool.tool_file:
-            print(f"❌ 外部工具无法直接运行: {args.tool}")
-            return 1
+            return None, f"❌ 外部工具无法直接运行: {name_or_id}"
 
         tool_path = self.toolkit_root / tool.tool_file
         if not tool_path.exists():
-            print(f"❌ 工具文件不存在: {tool_path}")
+            return None, f"❌ 工具文件不存在: {tool_path}"
+
+        return tool, None
+
+    def _cmd_run(self, args) -> int:
+        """执行run命令"""
+        if args.batch:
+            return self._cmd_run_batch(args)
+
+        if not args.tool:
+            print("❌ 请指定工具ID或名称，或使用 --batch FILE")
+            return 1
+
+        tool, error = self._resolve_runnable(args.tool)
+        if not tool:
+            print(error)
             return 1
 
         print(f"🚀 运行工具: {tool.tool_name}")
         print(f"📁 文件: {tool.tool_file}")
+
+        if args.cache:
+            policy = CachePolicy.from_meta(tool.full_meta)
+            if policy is None:
+                print("⚠️  工具未声明结果缓存，直接运行")
+            elif not policy.allows(args.args):
+                print("⚠️  参数包含文件输出等副作用，不使用缓存")
+            else:
+                return self._run_cached(tool, args.args, policy)
+
         print(f"⏳ 正在执行...")
         print("=" * 70)
 
         try:
-            cmd = [str(tool_path)] + args.args
-            result = subprocess.run(cmd, capture_output=False)
+            result = ToolRunner(self.toolkit_root).run(tool, args.args)
+            self._record_run(result, mode="run")
             print("=" * 70)
-            print(f"✅ 执行完成 (退出码: {result.returncode})")
+            print(f"✅ 执行完成 (退出码: {result.returncode}, 耗时: {result.duration:.3f}s)")
             return result.returncode
         except Exception as e:
             print(f"❌ 执行失败: {e}")
             return 1
 
+    def _run_cached(self, tool, tool_args, policy: CachePolicy) -> int:
+        """带结果缓存运行：命中时回放输出与退出码，未命中时捕获输出并写入缓存"""
+        cache = ResultCache(self.toolkit_root / DEFAULT_RESULT_CACHE_DIR)
+        key = cache.fingerprint(self.toolkit_root / tool.tool_file, tool_args, policy)
+        entry = cache.get(key)
+
+        if entry is not None:
+            print(f"♻️  命中结果缓存（输入未变化）")
+            print("=" * 70)
+            returncode = entry["returncode"]
+            stdout, stderr = entry["stdout"], entry["stderr"]
+        else:
+            print(f"⏳ 正在执行（未命中缓存）...")
+            print("=" * 70)
+            result = ToolRunner(self.toolkit_root).run_captured(ToolInvocation(tool=tool, args=tool_args))
+            self._record_run(result, mode="run")
+            returncode, stdout, stderr = result.returncode, result.stdout, result.stderr
+            if returncode in policy.cacheable_exit_codes:
+                cache.put(key, returncode, stdout, stderr)
+
+        sys.stdout.write(stdout)
+        sys.stderr.write(stderr)
+        print("=" * 70)
+        print(f"✅ 执行完成 (退出码: {returncode})")
+        return returncode
+
+    def _cmd_run_batch(self, args) -> int:
+        """执行run --batch：Python工具走常驻进程池，其他工具并发子进程"""
+        import shlex
+
+        if args.batch == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            lines = Path(args.batch).read_text(encoding='utf-8').splitlines()
+
+        invocations = []
+        malformed = 0
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                tool_name, *tool_args = shlex.split(line)
+            except ValueError as e:
+                print(f"❌ 批量文件第 {number} 行无法解析（{e}），已跳过: {line}")
+                malformed += 1
+                continue
+            tool, error = self._resolve_runnable(tool_name)
+            if not tool:
+                print(error)
+                return 1
+            invocations.append(ToolInvocation(tool=tool, args=tool_args))
+
+        if not invocations:
+            print("⚠️  批量文件中没有工具调用")
+            return 1 if malformed else 0
+
+        print(f"🚀 批量运行 {len(invocations)} 个工具调用...")
+        with ToolRunner(self.toolkit_root, jobs=args.jobs) as runner:
+            results = runner.run_batch(invocations)
+
+        for result in results:
+            self._record_run(result, mode="batch")
+            mode = "warm" if result.warm else "subprocess"
+            print("=" * 70)
+            print(f"📦 {result.tool_name} {' '.join(result.args)}")
+            print("-" * 70)
+            if result.stdout:
+                print(result.stdout, end="" if result.stdout.endswith("\n") else "\n")
+            if result.stderr:
+                print(result.stderr, end="" if result.stderr.endswith("\n") else "\n", file=sys.stderr)
+            status = "✅" if result.returncode == 0 else "❌"
+            print(f"{status} 退出码: {result.returncode}  耗时: {result.duration:.3f}s ({mode})")
+
+        print("=" * 70)
+        failed = [r for r in results if r.returncode != 0]
+        print(f"📊 完成 {len(results)} 个调用，失败 {len(failed)} 个" +
+              (f"，跳过无法解析的行 {malformed} 行" if malformed else ""))
+        return 1 if failed or malformed else 0
+
+    def _cmd_run_many(self, args) -> int:
+        """执行run-many命令：asyncio并发运行，输出按行加前缀，最后汇总"""
+        import json
+        import shlex
+
+        specs = []
+        for line in args.tools:
+            try:
+                name, *tool_args = shlex.split(line) or [""]
+            except ValueError as e:
+                print(f"❌ 无法解析工具调用（{e}）: {line}")
+                return 1
+            if name:
+                specs.append({"tool": name, "args": tool_args})
+
+        if args.manifest:
+            import yaml
+
+            manifest = yaml.safe_load(Path(args.manifest).read_text(encoding='utf-8')) or []
+            if isinstance(manifest, dict):
+                manifest = manifest.get("tools", [])
+            for number, entry in enumerate(manifest, 1):
+                if isinstance(entry, str):
+                    entry = {"tool": entry}
+                error = self._manifest_entry_error(entry)
+                if error:
+                    print(f"❌ 清单 {args.manifest} 第 {number} 项{error}: {entry!r}")
+                    return 1
+                specs.append(entry)
+
+        if not specs:
+            print("❌ 请指定至少一个工具或 --manifest FILE")
+            return 1
+
+        invocations = []
+        for spec in specs:
+            tool, error = self._resolve_runnable(str(spec["tool"]))
+            if not tool:
+                print(error)
+                return 1
+            invocations.append(ToolInvocation(
+                tool=tool,
+                args=[str(a) for a in spec.get("args") or []],
+                timeout=spec.get("timeout")
+            ))
+
+        output = sys.stderr if args.json else sys.stdout
+        width = max(len(inv.tool.tool_id) for inv in invocations)
+
+        def on_line(invocation, stream, line):
+            marker = "!" if stream == "stderr" else " "
+            print(f"[{invocation.tool.tool_id:<{width}}]{marker} {line}", file=output, flush=True)
+
+        runner = ToolRunner(self.toolkit_root, jobs=args.jobs)
+        results = runner.run_many(invocations, on_line, timeout=args.timeout)
+
+        for result in results:
+            self._record_run(result, mode="many")
+
+        failed = [r for r in results if r.status != "ok"]
+        if args.json:
+            print(json.dumps({
+                "total": len(results),
+                "failed": len(failed),
+                "results": [r.to_dict() for r in results]
+            }, indent=2, ensure_ascii=False))
+        else:
+            print("=" * 70)
+            for result in results:
+                status = {"ok": "✅", "failed": "❌", "timeout": "⏱️ "}[result.status]
+                print(f"{status} {result.tool_id:<{width}}  退出码: {result.returncode:<4} 耗时: {result.duration:.3f}s")
+            print("=" * 70)
+            print(f"📊 完成 {len(results)} 个工具，失败 {len(failed)} 个")
+
+        return 1 if failed else 0
+
+    @staticmethod
+    def _manifest_entry_error(entry) -> Optional[str]:
+        """校验 run-many 清单条目，返回错误说明（合法时为None）"""
+        if not isinstance(entry, dict):
+            return "应为工具名或包含 tool 字段的映射"
+        if not entry.get("tool"):
+            return "缺少 tool 字段"
+        if not isinstance(entry.get("args") or [], list):
+            return "的 args 应为列表"
+        timeout = entry.get("timeout")
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+            return "的 timeout 应为正数（秒）"
+        return None
+
     def _cmd_recommend(self, args) -> int:
         """执行recommend命令"""
         tools = self.discovery.recommend_tools(args.task)
@@ -218,6 +458,15 @@ class ToolkitCLI:
         print()
         return 0
 
+    def _cmd_refresh(self, args) -> int:
+        """执行refresh命令"""
+        self.discovery.refresh()
+        print(f"🔄 已重新扫描: {len(self.discovery.internal_tools)} 个内部工具, "
+              f"{len(self.discovery.external_tools)} 个外部工具")
+        if self.discovery.cache is not None:
+            print(f"📁 缓存: {self.discovery.cache.cache_file}")
+        return 0
+
 
 def main():
     """主函数"""
@@ -2,19 +2,28 @@
 Base detector interface for toolkit discovery
 """
 
+import bisect
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from ..models import Tool
 
 
 class ToolDetector(ABC):
     """抽象基类：工具检测器"""
 
+    # 来源名称，用作目录缓存的键
+    source = "base"
+
     def __init__(self, root_path: Path):
         self.root = root_path
         self._tools = []
 
+        # 查找索引（按需构建，工具列表变化后自动重建）
+        self._indexed_tools = None
+        self._exact_index: Dict[str, Tool] = {}
+        self._suffixes: List[Tuple[str, int]] = []
+
     @property
     def tools(self) -> List[Tool]:
         """获取检测到的工具列表"""
@@ -46,6 +55,71 @@ class ToolDetector(ABC):
         """
         pass
 
+    @abstractmethod
+    def signature(self) -> Tuple:
+        """
+        计算检测输入的签名
+
+        Returns:
+            Tuple: 签名不变时可直接复用缓存的检测结果
+        """
+        pass
+
+    def _ensure_index(self):
+        """构建 ID/名称哈希表与名称后缀有序表"""
+        if self._indexed_tools is self._tools:
+            return
+
+        exact: Dict[str, Tool] = {}
+        suffixes: List[Tuple[str, int]] = []
+        for position, tool in enumerate(self._tools):
+            # 与线性扫描一致：列表中靠前的工具优先
+            exact.setdefault(tool.tool_id, tool)
+            exact.setdefault(tool.tool_name, tool)
+
+            name = tool.tool_name.lower()
+            suffixes.extend((name[i:], position) for i in range(len(name)))
+
+        suffixes.sort()
+        self._exact_index = exact
+        self._suffixes = suffixes
+        self._indexed_tools = self._tools
+
+    def lookup(self, name_or_id: str) -> Tuple[Optional[Tool], List[Tool]]:
+        """
+        通过索引查找工具
+
+        先按 ID/名称精确匹配（哈希表），再按名称包含关系模糊匹配：
+        子串匹配等价于某个后缀以查询串为前缀，在有序后缀表上二分定位。
+
+        Args:
+            name_or_id: 工具名称或ID
+
+        Returns:
+            Tuple[Optional[Tool], List[Tool]]: (唯一匹配的工具, 所有模糊匹配的工具)
+        """
+        self._ensure_index()
+
+        tool = self._exact_index.get(name_or_id)
+        if tool is not None:
+            return tool, [tool]
+
+        query = name_or_id.lower()
+        start = bisect.bisect_left(self._suffixes, (query, -1))
+        positions = set()
+        for i in range(start, len(self._suffixes)):
+            suffix, position = self._suffixes[i]
+            if not suffix.startswith(query):
+                break
+            positions.add(position)
+
+        matches = [self._tools[position] for position in sorted(positions)]
+        return (matches[0] if len(matches) == 1 else None), matches
+
+    def load(self, tools: List[Tool]):
+        """从缓存载入工具列表，跳过检测"""
+        self._tools = list(tools)
+
     def refresh(self):
         """刷新工具列表"""
         self._tools = self.detect()
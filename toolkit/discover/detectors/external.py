@@ -2,24 +2,41 @@
 External Tool Detector - 检测系统已安装的外部CLI工具
 """
 
-import yaml
-import shutil
+import shlex
+import sys
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from .base import ToolDetector
+from ..cache import directory_signature, path_signature
+from ..path_index import get_path_index
 from ..models import ExternalTool, ToolMetadata
 
 
+def _executable(command: str) -> Optional[str]:
+    """命令行的可执行文件名（argv[0]），命令为空或无法解析时返回None"""
+    try:
+        argv = shlex.split(str(command))
+    except ValueError:
+        argv = str(command).split()
+    return argv[0] if argv else None
+
+
 class ExternalToolDetector(ToolDetector):
     """外部工具检测器
 
     从external/目录扫描.meta.yml文件来发现外部工具配置
     """
 
+    source = "external"
+
     def __init__(self, root_path: Path):
         super().__init__(root_path)
         self._external_dir = root_path / "external"
 
+    def signature(self) -> Tuple:
+        """external/目录签名 + PATH签名（安装状态依赖 PATH）"""
+        return (directory_signature([self._external_dir]), path_signature())
+
     def detect(self) -> List[ExternalTool]:
         """
         扫描external/目录检测外部工具
@@ -36,10 +53,28 @@ class ExternalToolDetector(ToolDetector):
                 if tool:
                     self._tools.append(tool)
 
+        # 基于 PATH 索引一次性解析所有命令的安装状态
+        self._resolve_installed(self._tools)
+
         return self._tools
 
+    def _resolve_installed(self, tools: List[ExternalTool]):
+        """批量检测外部工具是否已安装"""
+        if not tools:
+            return
+
+        executables = {id(tool): _executable(tool.command) for tool in tools}
+        path_index = get_path_index()
+        resolved = path_index.resolve_all(name for name in executables.values() if name)
+        for tool in tools:
+            name = executables[id(tool)]
+            tool.path = resolved[name] if name else None
+            tool.installed = tool.path is not None
+
     def _parse_meta_file(self, meta_file: Path) -> Optional[ExternalTool]:
         """解析外部工具的meta.yml文件"""
+        import yaml  # 延迟导入：缓存命中时无需加载 YAML 解析器
+
         try:
             content = yaml.safe_load(meta_file.read_text(encoding='utf-8'))
             if not content:
@@ -56,11 +91,9 @@ class ExternalToolDetector(ToolDetector):
             command = basic_info.get("命令", "")
             if not command:
                 return None
-
-            # 检测是否已安装
-            command_name = command.split()[0]
-            is_installed = shutil.which(command_name) is not None
-            tool_path = shutil.which(command_name)
+            if not _executable(command):
+                print(f"⚠️  警告: 外部工具命令为空，已跳过 {meta_file}", file=sys.stderr)
+                return None
 
             # 创建metadata
             metadata = ToolMetadata(
@@ -80,9 +113,7 @@ class ExternalToolDetector(ToolDetector):
                 command=command,
                 category=basic_info.get("类别", "unknown"),
                 use_cases=content.get("使用场景", []),
-                install_guide=quick_start.get("安装", ""),
-                installed=is_installed,
-                path=tool_path
+                install_guide=quick_start.get("安装", "")
             )
 
         except Exception as e:
@@ -104,21 +135,9 @@ class ExternalToolDetector(ToolDetector):
         Returns:
             ExternalTool: 找到的工具，如果未找到返回None
         """
-        # 先尝试精确匹配
-        for tool in self._tools:
-            if tool.tool_id == name_or_id or tool.tool_name == name_or_id:
-                return tool
-
-        # 尝试模糊匹配（名称包含）
-        matches = [t for t in self._tools if name_or_id.lower() in t.tool_name.lower()]
-
-        if len(matches) == 1:
-            return matches[0]
-        elif len(matches) > 1:
-            # 不打印，由调用者处理
-            return None
-
-        return None
+        # 多个模糊匹配时不打印，由调用者处理
+        tool, _ = self.lookup(name_or_id)
+        return tool
 
     def get_uninstalled_tools(self) -> List[ExternalTool]:
         """获取未安装的工具列表"""
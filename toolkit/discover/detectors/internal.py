@@ -2,17 +2,50 @@
 Internal Tool Detector - 检测AI-runtime内部创建的工具
 """
 
+import os
 import sys
-import yaml
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from .base import ToolDetector
+from ..cache import directory_signature
 from ..models import InternalTool, ToolMetadata
 
+# 元数据文件数量达到该阈值时才启用进程池（进程启动有固定开销）
+PARALLEL_THRESHOLD = 32
+
+# 每个任务分片包含的元数据文件数
+PARALLEL_CHUNK_SIZE = 8
+
+# 工具文件候选扩展名
+TOOL_EXTENSIONS = ['.sh', '.py', '.js', '.ts', '.java', '.go', '.rs']
+
+
+def _parse_meta_worker(root: Path, meta_file: Path) -> Tuple[Optional[InternalTool], Optional[str]]:
+    """进程池任务：解析单个元数据文件，错误以字符串返回由主进程统一报告"""
+    try:
+        return InternalToolDetector.parse_meta_file(root, meta_file), None
+    except Exception as e:
+        return None, str(e)
+
 
 class InternalToolDetector(ToolDetector):
     """内部工具检测器"""
 
+    source = "internal"
+
+    # 不属于内部工具的顶层目录（external/ 由 ExternalToolDetector 负责）
+    EXCLUDED_DIRS = ('discover', 'external')
+
+    def __init__(self, root_path: Path, max_workers: Optional[int] = None):
+        super().__init__(root_path)
+        # 并行解析的进程数，None 表示使用 CPU 核数
+        self.max_workers = max_workers
+
+    def signature(self) -> Tuple:
+        """工具包目录签名（不含 discover 包与 external/ 配置）"""
+        return directory_signature([self.root], exclude=self.EXCLUDED_DIRS)
+
     def detect(self) -> List[InternalTool]:
         """
         扫描工具包目录检测内部工具
@@ -28,76 +61,101 @@ class InternalToolDetector(ToolDetector):
             # 这里可以扩展registry解析逻辑
             pass
 
-        # 扫描所有语言目录
-        for lang_dir in self.root.iterdir():
-            if lang_dir.is_dir() and not lang_dir.name.startswith('.') and lang_dir.name != 'discover':
-                self._scan_language_directory(lang_dir)
+        # 收集所有语言目录下的元数据文件（排序保证结果顺序确定）
+        meta_files: List[Path] = []
+        for lang_dir in sorted(self.root.iterdir()):
+            if lang_dir.is_dir() and not lang_dir.name.startswith('.') and lang_dir.name not in self.EXCLUDED_DIRS:
+                meta_files.extend(sorted(lang_dir.rglob("*.meta.yml")))
+
+        for meta_file, (tool, error) in zip(meta_files, self._parse_meta_files(meta_files)):
+            if error is not None:
+                print(f"⚠️  警告: 解析元数据文件失败 {meta_file}: {error}", file=sys.stderr)
+            elif tool:
+                self._tools.append(tool)
 
         return self._tools
 
-    def _scan_language_directory(self, lang_dir: Path):
-        """扫描语言目录下的工具"""
-        for meta_file in lang_dir.rglob("*.meta.yml"):
+    def _parse_meta_files(self, meta_files: List[Path]) -> List[Tuple[Optional[InternalTool], Optional[str]]]:
+        """解析元数据文件列表，文件较多时分片并行解析，结果与输入顺序一致"""
+        workers = self.max_workers or os.cpu_count() or 1
+        if len(meta_files) >= PARALLEL_THRESHOLD and workers > 1:
             try:
-                tool = self._parse_meta_file(meta_file)
-                if tool:
-                    self._tools.append(tool)
-            except Exception as e:
-                print(f"⚠️  解析失败 {meta_file}: {e}", file=sys.stderr)
-
-    def _parse_meta_file(self, meta_file: Path) -> Optional[InternalTool]:
-        """解析元数据文件"""
-        try:
-            content = yaml.safe_load(meta_file.read_text(encoding='utf-8'))
-            if not content:
-                return None
-
-            # 获取工具文件
-            tool_file = self._find_tool_file(meta_file)
-
-            # 解析基本信息
-            basic_info = content.get("基本信息", {})
-
-            # 创建metadata
-            metadata = ToolMetadata(
-                tool_id=content.get("tool_id", "unknown"),
-                tool_name=content.get("tool_name", "未命名工具"),
-                description=content.get("功能描述", {}).get("简介", ""),
-                purpose=content.get("用途分类", [])
-            )
-
-            # 解析上次使用信息
-            last_use = content.get("上次使用", {})
-            if last_use:
-                metadata.satisfaction = last_use.get("满意度", 0.0)
-
-            return InternalTool(
-                metadata=metadata,
-                meta_file=str(meta_file.relative_to(self.root)),
-                tool_file=str(tool_file.relative_to(self.root)) if tool_file else None,
-                language=basic_info.get("语言", "unknown"),
-                file=basic_info.get("文件", "unknown"),
-                complexity=basic_info.get("复杂度", "unknown"),
-                usage=content.get("使用方法", {}),
-                full_meta=content
-            )
-
-        except Exception as e:
-            print(f"⚠️  警告: 解析元数据文件失败 {meta_file}: {e}", file=sys.stderr)
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    return list(executor.map(
+                        _parse_meta_worker,
+                        [self.root] * len(meta_files),
+                        meta_files,
+                        chunksize=PARALLEL_CHUNK_SIZE
+                    ))
+            except (OSError, RuntimeError) as e:
+                # 进程池不可用（受限环境等）时退回串行
+                print(f"⚠️  并行解析不可用，改为串行: {e}", file=sys.stderr)
+
+        return [_parse_meta_worker(self.root, meta_file) for meta_file in meta_files]
+
+    @staticmethod
+    def parse_meta_file(root: Path, meta_file: Path) -> Optional[InternalTool]:
+        """
+        解析元数据文件（无副作用，可在子进程中执行）
+
+        Args:
+            root: 工具包根目录
+            meta_file: 元数据文件路径
+
+        Returns:
+            InternalTool: 解析得到的工具，内容为空时返回None
+
+        Raises:
+            Exception: 读取或解析失败
+        """
+        import yaml  # 延迟导入：缓存命中时无需加载 YAML 解析器
+
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        content = yaml.load(meta_file.read_text(encoding='utf-8'), Loader=loader)
+        if not content:
             return None
 
-    def _find_tool_file(self, meta_file: Path) -> Optional[Path]:
+        # 获取工具文件
+        tool_file = InternalToolDetector._find_tool_file(meta_file)
+
+        # 解析基本信息
+        basic_info = content.get("基本信息", {})
+
+        # 创建metadata
+        metadata = ToolMetadata(
+            tool_id=content.get("tool_id", "unknown"),
+            tool_name=content.get("tool_name", "未命名工具"),
+            description=content.get("功能描述", {}).get("简介", ""),
+            purpose=content.get("用途分类", [])
+        )
+
+        # 解析上次使用信息
+        last_use = content.get("上次使用", {})
+        if last_use:
+            metadata.satisfaction = last_use.get("满意度", 0.0)
+
+        return InternalTool(
+            metadata=metadata,
+            meta_file=str(meta_file.relative_to(root)),
+            tool_file=str(tool_file.relative_to(root)) if tool_file else None,
+            language=basic_info.get("语言", "unknown"),
+            file=basic_info.get("文件", "unknown"),
+            complexity=basic_info.get("复杂度", "unknown"),
+            usage=content.get("使用方法", {}),
+            full_meta=content
+        )
+
+    @staticmethod
+    def _find_tool_file(meta_file: Path) -> Optional[Path]:
         """查找与meta文件对应的工具文件"""
-        possible_extensions = ['.sh', '.py', '.js', '.ts', '.java', '.go', '.rs']
-
-        for ext in possible_extensions:
+        for ext in TOOL_EXTENSIONS:
             possible_file = meta_file.with_suffix(ext)
             if possible_file.exists():
                 return possible_file
 
         # 如果没找到，尝试与meta文件同名（去掉.meta部分）
         name_without_meta = meta_file.stem.replace('.meta', '')
-        for ext in possible_extensions:
+        for ext in TOOL_EXTENSIONS:
             possible_file = meta_file.parent / f"{name_without_meta}{ext}"
             if possible_file.exists():
                 return possible_file
@@ -114,23 +172,13 @@ class InternalToolDetector(ToolDetector):
         Returns:
             InternalTool: 找到的工具，如果未找到返回None
         """
-        # 先尝试精确匹配
-        for tool in self._tools:
-            if tool.tool_id == name_or_id or tool.tool_name == name_or_id:
-                return tool
-
-        # 尝试模糊匹配（名称包含）
-        matches = [t for t in self._tools if name_or_id.lower() in t.tool_name.lower()]
-
-        if len(matches) == 1:
-            return matches[0]
-        elif len(matches) > 1:
+        tool, matches = self.lookup(name_or_id)
+        if tool is None and len(matches) > 1:
             print(f"⚠️  找到多个匹配工具:")
-            for i, tool in enumerate(matches[:5], 1):
-                print(f"  {i}. {tool.tool_name} ({tool.tool_id})")
-            return None
+            for i, match in enumerate(matches[:5], 1):
+                print(f"  {i}. {match.tool_name} ({match.tool_id})")
 
-        return None
+        return tool
 
     def refresh(self):
         """刷新工具列表"""
@@ -3,40 +3,104 @@ Main Discovery Orchestrator - 协调内部和外部工具检测
 """
 
 from pathlib import Path
-from typing import List, Optional
-from .detectors import InternalToolDetector, ExternalToolDetector
+from typing import Dict, List, Optional, Tuple
+from .cache import CatalogueCache, DEFAULT_CACHE_FILE
+from .detectors import ToolDetector, InternalToolDetector, ExternalToolDetector
 from .models import Tool, InternalTool, ExternalTool
 from .formatters import ToolFormatter, TableFormatter, JsonFormatter
+from .search import SearchIndex
+from .telemetry import TelemetryLog, ToolRunStats, DEFAULT_TELEMETRY_FILE
 
 
 class ToolkitDiscovery:
     """工具包发现主类 - 协调所有检测器"""
 
-    def __init__(self, toolkit_root: Path):
+    def __init__(self, toolkit_root: Path, use_cache: bool = True):
         self.root = toolkit_root
         self.internal_detector = InternalToolDetector(toolkit_root)
         self.external_detector = ExternalToolDetector(toolkit_root)
 
+        # 目录缓存（签名一致时跳过扫描）
+        self.cache = CatalogueCache(toolkit_root / DEFAULT_CACHE_FILE) if use_cache else None
+
+        # 执行遥测日志
+        self.telemetry = TelemetryLog(toolkit_root / DEFAULT_TELEMETRY_FILE)
+
         # 格式化器
         self.table_formatter = TableFormatter()
         self.json_formatter = JsonFormatter()
 
-        # 初始化时加载所有工具
-        self.refresh()
+        # 已加载的来源；各来源在首次访问时才检测（或从缓存载入）
+        self._loaded_sources = set()
+
+        # 检索索引（按来源组合缓存，refresh 时失效）
+        self._search_indexes: Dict[Tuple[str, ...], SearchIndex] = {}
+
+    @property
+    def detectors(self) -> List[ToolDetector]:
+        """所有检测器"""
+        return [self.internal_detector, self.external_detector]
+
+    def _ensure_loaded(self, detector: ToolDetector):
+        """按需加载单个来源：缓存命中直接载入，否则扫描并写回缓存"""
+        if detector.source in self._loaded_sources:
+            return
+
+        if self.cache is None:
+            detector.refresh()
+        else:
+            signature = detector.signature()
+            tools = self.cache.get(detector.source, signature)
+            if tools is not None:
+                detector.load(tools)
+            else:
+                detector.refresh()
+                self.cache.put(detector.source, signature, detector.tools)
+                self.cache.save()
+
+        self._loaded_sources.add(detector.source)
+
+    def load(self):
+        """立即加载所有来源"""
+        for detector in self.detectors:
+            self._ensure_loaded(detector)
 
     def refresh(self):
-        """刷新所有工具列表"""
-        self.internal_detector.refresh()
-        self.external_detector.refresh()
+        """强制重新扫描所有工具列表并更新缓存"""
+        for detector in self.detectors:
+            signature = detector.signature() if self.cache is not None else None
+            detector.refresh()
+            if self.cache is not None:
+                self.cache.put(detector.source, signature, detector.tools)
+            self._loaded_sources.add(detector.source)
+
+        self._search_indexes.clear()
+        if self.cache is not None:
+            self.cache.save()
+
+    def _search_index(self, *detectors: ToolDetector) -> SearchIndex:
+        """获取指定来源的检索索引（首次使用时构建）"""
+        key = tuple(detector.source for detector in detectors)
+        index = self._search_indexes.get(key)
+        if index is None:
+            tools: List[Tool] = []
+            for detector in detectors:
+                self._ensure_loaded(detector)
+                tools.extend(detector.tools)
+            index = SearchIndex(tools)
+            self._search_indexes[key] = index
+        return index
 
     @property
     def internal_tools(self) -> List[InternalTool]:
-        """获取内部工具列表"""
+        """获取内部工具列表（首次访问时加载）"""
+        self._ensure_loaded(self.internal_detector)
         return self.internal_detector.tools
 
     @property
     def external_tools(self) -> List[ExternalTool]:
-        """获取外部工具列表"""
+        """获取外部工具列表（首次访问时加载）"""
+        self._ensure_loaded(self.external_detector)
         return self.external_detector.tools
 
     @property
@@ -68,7 +132,7 @@ class ToolkitDiscovery:
 
     def find_tool(self, name_or_id: str) -> Optional[Tool]:
         """
-        查找工具（同时搜索内部和外部）
+        查找工具（按来源依次搜索内部和外部，命中即停止）
 
         Args:
             name_or_id: 工具名称或ID
@@ -76,15 +140,11 @@ class ToolkitDiscovery:
         Returns:
             Tool: 找到的工具，如果未找到返回None
         """
-        # 先搜索内部工具
-        tool = self.internal_detector.find_tool(name_or_id)
-        if tool:
-            return tool
-
-        # 再搜索外部工具
-        tool = self.external_detector.find_tool(name_or_id)
-        if tool:
-            return tool
+        for detector in self.detectors:
+            self._ensure_loaded(detector)
+            tool = detector.find_tool(name_or_id)
+            if tool:
+                return tool
 
         return None
 
@@ -130,26 +190,10 @@ class ToolkitDiscovery:
             keyword: 搜索关键词
 
         Returns:
-            List[Tool]: 匹配的工具列表
+            List[Tool]: 匹配的工具列表（按相关度排序）
         """
-        keyword_lower = keyword.lower()
-
-        # 搜索内部工具
-        internal_matches = [
-            t for t in self.internal_tools
-            if (keyword_lower in t.tool_name.lower() or
-                keyword_lower in t.description.lower())
-        ]
-
-        # 搜索外部工具
-        external_matches = [
-            t for t in self.external_tools
-            if (keyword_lower in t.tool_name.lower() or
-                keyword_lower in t.description.lower() or
-                keyword_lower in t.category.lower())
-        ]
-
-        return internal_matches + external_matches
+        index = self._search_index(self.internal_detector, self.external_detector)
+        return [tool for tool, _ in index.search(keyword)]
 
     def recommend_tools(self, task_description: str) -> List[InternalTool]:
         """
@@ -161,29 +205,23 @@ class ToolkitDiscovery:
         Returns:
             List[InternalTool]: 推荐的工具列表（按匹配度排序）
         """
-        keywords = task_description.lower().split()
-
-        # 简单的推荐算法：匹配关键词数量
-        scores = {}
-        for tool in self.internal_tools:
-            score = 0
-            tool_text = (
-                tool.tool_name + ' ' +
-                tool.description + ' ' +
-                ' '.join(tool.metadata.purpose)
-            ).lower()
-
-            for keyword in keywords:
-                if keyword in tool_text:
-                    score += 1
-
-            if score > 0:
-                scores[tool] = score
-
-        # 按分数排序
-        sorted_tools = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-
-        return [tool for tool, _ in sorted_tools[:5]]  # 返回前5个
+        index = self._search_index(self.internal_detector)
+        ranked = index.search(task_description)
+
+        # 结合执行遥测：优先推荐快速、可靠的工具
+        stats = self.telemetry.stats()
+        if stats:
+            ranked = sorted(
+                ((tool, score * stats[tool.tool_id].ranking_factor if tool.tool_id in stats else score)
+                 for tool, score in ranked),
+                key=lambda item: -item[1]
+            )
+
+        return [tool for tool, _ in ranked[:5]]  # 返回前5个
+
+    def run_stats(self, tool: Tool) -> Optional[ToolRunStats]:
+        """获取工具的执行统计（来自遥测日志）"""
+        return self.telemetry.stats_for(tool.tool_id)
 
     def format_tools(
         self,
@@ -173,6 +173,19 @@ class TableFormatter(ToolFormatter):
 
         return "\n".join(lines)
 
+    def format_run_stats(self, stats) -> str:
+        """格式化执行遥测统计"""
+        lines = [
+            "⏱️  执行统计:",
+            f"  运行次数: {stats.runs}  成功率: {stats.success_rate:.0%}",
+            f"  耗时: p50 {stats.p50:.3f}s  p90 {stats.p90:.3f}s  p99 {stats.p99:.3f}s",
+        ]
+        if stats.mean_cpu is not None:
+            lines.append(f"  平均CPU: {stats.mean_cpu:.3f}s")
+        if stats.max_rss_kb is not None:
+            lines.append(f"  最大内存: {stats.max_rss_kb / 1024:.1f} MB")
+        return "\n".join(lines) + "\n"
+
     def _format_generic_tool(self, tool: Tool) -> str:
         """格式化通用工具详情"""
         return f"\n{'=' * 70}\n📦 {tool.tool_name} ({tool.tool_id})\n{'=' * 70}\n  描述: {tool.description}\n{'=' * 70}\n\n"
@@ -0,0 +1,127 @@
+"""
+PATH Index - 批量解析命令路径
+
+shutil.which 每次调用都会 stat 一遍 PATH 中的所有目录。外部工具较多、
+PATH 较长时，逐个调用的开销会主导 `list --external`。
+
+PathIndex 对每个 PATH 目录只做一次 os.scandir，建立 命令名 → 候选目录
+的映射；解析时仅对命中的候选做可执行检查。索引按 PATH 内容与各目录
+mtime 缓存，目录未变化时直接复用。
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import path_signature
+
+
+def _pathext() -> List[str]:
+    """Windows 下可执行文件扩展名（小写），其他平台为空"""
+    if os.name != 'nt':
+        return []
+    return [ext.lower() for ext in os.environ.get("PATHEXT", ".EXE;.BAT;.CMD").split(os.pathsep) if ext]
+
+
+def _is_executable(path: str) -> bool:
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+class PathIndex:
+    """PATH 目录索引：命令名 → 按 PATH 顺序排列的候选路径"""
+
+    # 目录列表缓存：目录 → (mtime_ns, 文件名列表)，跨索引实例复用
+    _listing_cache: Dict[str, Tuple[int, List[str]]] = {}
+
+    def __init__(self, directories: Iterable[str]):
+        self.directories = [d for d in directories if d]
+        self._candidates: Dict[str, List[str]] = {}
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._build()
+
+    def _build(self):
+        """逐个目录 scandir 一次，建立候选映射"""
+        exts = _pathext()
+        seen_dirs = set()
+
+        for directory in self.directories:
+            norm = os.path.normcase(os.path.abspath(directory))
+            if norm in seen_dirs:
+                continue
+            seen_dirs.add(norm)
+
+            for name in self._list_directory(directory):
+                path = os.path.join(directory, name)
+                key = os.path.normcase(name)
+                self._candidates.setdefault(key, []).append(path)
+
+                # Windows: "rg.exe" 同时以 "rg" 登记
+                if exts:
+                    stem, ext = os.path.splitext(key)
+                    if ext.lower() in exts:
+                        self._candidates.setdefault(stem, []).append(path)
+
+    @classmethod
+    def _list_directory(cls, directory: str) -> List[str]:
+        """列出目录中的条目名，按目录 mtime 缓存"""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+
+        cached = cls._listing_cache.get(directory)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with os.scandir(directory) as it:
+                names = [entry.name for entry in it if not entry.is_dir()]
+        except OSError:
+            names = []
+
+        cls._listing_cache[directory] = (mtime, names)
+        return names
+
+    def which(self, command: str) -> Optional[str]:
+        """
+        解析命令路径（语义同 shutil.which）
+
+        Args:
+            command: 命令名或路径
+
+        Returns:
+            str: 第一个可执行的匹配路径，未找到返回None
+        """
+        if command in self._resolved:
+            return self._resolved[command]
+
+        if os.path.dirname(command):
+            # 带目录的命令不查 PATH
+            result = command if _is_executable(command) else None
+        else:
+            result = None
+            for path in self._candidates.get(os.path.normcase(command), []):
+                if _is_executable(path):
+                    result = path
+                    break
+
+        self._resolved[command] = result
+        return result
+
+    def resolve_all(self, commands: Iterable[str]) -> Dict[str, Optional[str]]:
+        """一次性解析多个命令"""
+        return {command: self.which(command) for command in commands}
+
+
+# 索引缓存：PATH 签名（内容 + 各目录 mtime）→ PathIndex
+_INDEX_CACHE: Dict[Tuple, PathIndex] = {}
+
+
+def get_path_index() -> PathIndex:
+    """获取当前 PATH 的索引，PATH 与目录均未变化时复用已有索引"""
+    signature = path_signature()
+    index = _INDEX_CACHE.get(signature)
+    if index is None:
+        _INDEX_CACHE.clear()
+        index = PathIndex(directory for directory, _ in signature)
+        _INDEX_CACHE[signature] = index
+    return index
@@ -0,0 +1,225 @@
+"""
+Result Cache - 幂等工具的执行结果缓存
+
+工具在 .meta.yml 中声明可缓存性：
+
+    结果缓存:
+      可缓存: true
+      默认输入: ["."]                 # 参数中没有已存在路径时的输入路径
+      排除: [".git", "node_modules"]  # 计算输入指纹时跳过的目录名
+      禁用参数: ["-o", "--output"]    # 含这些参数时不使用缓存（有文件副作用）
+      值参数: ["--format"]            # 带值但值不是输入路径的选项（其值不计入输入指纹）
+
+指纹 = 工具文件内容哈希 + argv + 工作目录 + 输入路径树哈希（相对路径/mtime/size）。
+输入路径取参数中已存在的位置参数；值参数的值不算输入，且从输入路径树哈希中剔除
+（如 --cache-file 指向输入目录内、每次运行都会重写的文件）。
+命中时回放 stdout/stderr 与退出码；磁盘占用超过上限时按最近使用时间淘汰。
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+# 默认缓存目录（相对于 toolkit 根目录）
+DEFAULT_RESULT_CACHE_DIR = Path(".cache") / "results"
+
+# 默认磁盘占用上限
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 默认排除的目录名
+DEFAULT_EXCLUDES = [".git", "__pycache__"]
+
+
+@dataclass
+class CachePolicy:
+    """工具声明的缓存策略"""
+    default_inputs: List[str] = field(default_factory=lambda: ["."])
+    excludes: List[str] = field(default_factory=lambda: list(DEFAULT_EXCLUDES))
+    disabling_args: List[str] = field(default_factory=list)
+    value_args: List[str] = field(default_factory=list)
+    cacheable_exit_codes: List[int] = field(default_factory=lambda: [0])
+
+    @classmethod
+    def from_meta(cls, meta: Optional[Dict[str, Any]]) -> Optional['CachePolicy']:
+        """从元数据解析缓存策略，未声明可缓存时返回None"""
+        section = (meta or {}).get("结果缓存") or {}
+        if not section.get("可缓存"):
+            return None
+
+        policy = cls()
+        if section.get("默认输入"):
+            policy.default_inputs = [str(p) for p in section["默认输入"]]
+        if section.get("排除"):
+            policy.excludes = list(DEFAULT_EXCLUDES) + [str(p) for p in section["排除"]]
+        if section.get("禁用参数"):
+            policy.disabling_args = [str(a) for a in section["禁用参数"]]
+        if section.get("值参数"):
+            policy.value_args = [str(a) for a in section["值参数"]]
+        if section.get("可缓存退出码"):
+            policy.cacheable_exit_codes = [int(c) for c in section["可缓存退出码"]]
+        return policy
+
+    def allows(self, args: List[str]) -> bool:
+        """参数是否允许使用缓存"""
+        for arg in args:
+            name = arg.split("=", 1)[0]
+            if name in self.disabling_args:
+                return False
+            # 短选项的值可以紧跟在后面（-oout.json）
+            if not arg.startswith("--") and arg[:2] in self.disabling_args:
+                return False
+        return True
+
+    def split_args(self, args: List[str]):
+        """
+        区分位置参数与值参数的值
+
+        Returns:
+            (positionals, option_values): 不以 - 开头且不是值参数值的参数；值参数的值
+        """
+        positionals, option_values = [], []
+        expecting_value = False
+        for arg in args:
+            if expecting_value:
+                option_values.append(arg)
+                expecting_value = False
+            elif arg.startswith("-"):
+                name, sep, value = arg.partition("=")
+                if name in self.value_args:
+                    if sep:
+                        option_values.append(value)
+                    else:
+                        expecting_value = True
+                elif not arg.startswith("--") and arg[:2] in self.value_args and len(arg) > 2:
+                    option_values.append(arg[2:])
+            else:
+                positionals.append(arg)
+        return positionals, option_values
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tree_digest(path: Path, excludes: List[str], ignored: Optional[Set[str]] = None) -> str:
+    """
+    输入路径树哈希：只 stat，不读取文件内容
+
+    Args:
+        path: 输入文件或目录
+        excludes: 跳过的目录名
+        ignored: 跳过的绝对路径（文件或目录）
+    """
+    digest = hashlib.sha1()
+    excluded = set(excludes)
+    ignored = ignored or set()
+
+    if path.is_file():
+        st = path.stat()
+        digest.update(f"{path.name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = sorted(d for d in dirnames
+                             if d not in excluded and os.path.join(dirpath, d) not in ignored)
+        rel_dir = os.path.relpath(dirpath, path)
+        for name in sorted(filenames):
+            if os.path.join(dirpath, name) in ignored:
+                continue
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            digest.update(f"{rel_dir}/{name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode('utf-8', 'surrogateescape'))
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """磁盘结果缓存（大小受限，LRU 淘汰）"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def fingerprint(self, tool_path: Path, args: List[str], policy: CachePolicy) -> str:
+        """计算一次调用的缓存键"""
+        cwd = Path.cwd()
+        positionals, option_values = policy.split_args(args)
+        inputs = [arg for arg in positionals if (cwd / arg).exists()]
+        if not inputs:
+            inputs = policy.default_inputs
+        ignored = {str((cwd / value).resolve()) for value in option_values if value}
+
+        digest = hashlib.sha256()
+        digest.update(_file_digest(tool_path).encode())
+        digest.update(json.dumps([str(cwd), list(args)], ensure_ascii=False).encode('utf-8'))
+        for item in inputs:
+            resolved = (cwd / item).resolve()
+            digest.update(str(resolved).encode('utf-8', 'surrogateescape'))
+            if resolved.exists():
+                digest.update(tree_digest(resolved, policy.excludes, ignored).encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存结果，命中时刷新最近使用时间"""
+        path = self._entry_path(key)
+        try:
+            entry = json.loads(path.read_text(encoding='utf-8'))
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key: str, returncode: int, stdout: str, stderr: str):
+        """写入缓存结果并按需淘汰"""
+        path = self._entry_path(key)
+        entry = {
+            "created": time.time(),
+            "returncode": returncode,
+            "stdout": stdout,
+            "stderr": stderr,
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp, path)
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        """总大小超过上限时，删除最久未使用的条目"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,480 @@
+"""
+Tool Runner - 工具执行器
+
+- 单次运行：按工具语言选择解释器，输出直接流向终端
+- 批量运行：Python 工具在预先 fork 的常驻进程中通过 runpy 执行，
+  复用已启动的解释器与已导入的模块，argv 与 stdout/stderr（文件描述符级）每次调用独立；
+  其他工具（bash/node 等）通过子进程并发执行，并发数有上限
+- 并发多工具运行：asyncio 子进程池，单工具超时，输出按行加前缀实时复用
+"""
+
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .models import InternalTool
+from .telemetry import rusage_to_stats, self_rusage
+
+# 按扩展名选择解释器（未列出的扩展名直接执行）
+INTERPRETERS: Dict[str, List[str]] = {
+    '.py': [sys.executable],
+    '.sh': ['bash'],
+    '.js': ['node'],
+    '.ts': ['npx', 'ts-node'],
+}
+
+# 常驻进程启动时预先导入的模块，工具再次导入时直接命中 sys.modules
+WARM_MODULES = [
+    'argparse', 'collections', 'datetime', 'json', 'pathlib', 're',
+    'subprocess', 'typing',
+]
+
+
+@dataclass
+class RunResult:
+    """单次工具执行结果"""
+    tool_id: str
+    tool_name: str
+    args: List[str]
+    returncode: int
+    stdout: str = ""
+    stderr: str = ""
+    duration: float = 0.0
+    warm: bool = False
+    timed_out: bool = False
+    cpu: Optional[float] = None
+    max_rss_kb: Optional[int] = None
+
+    @property
+    def status(self) -> str:
+        """执行状态：ok / failed / timeout"""
+        if self.timed_out:
+            return "timeout"
+        return "ok" if self.returncode == 0 else "failed"
+
+    def to_dict(self) -> dict:
+        """转换为 JSON 摘要（不含输出内容）"""
+        return {
+            "tool_id": self.tool_id,
+            "tool_name": self.tool_name,
+            "args": self.args,
+            "status": self.status,
+            "returncode": self.returncode,
+            "duration": round(self.duration, 3),
+        }
+
+
+@dataclass
+class ToolInvocation:
+    """一次工具调用"""
+    tool: InternalTool
+    args: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+
+
+# 超时退出码（与 coreutils timeout 一致）
+TIMEOUT_RETURNCODE = 124
+
+# 并发运行时每次从管道读取的字节数（自行分行，单行长度不受 StreamReader 上限约束）
+PIPE_READ_SIZE = 1 << 16
+
+
+def _wait_with_rusage(proc: subprocess.Popen) -> Tuple[int, Optional[float], Optional[int]]:
+    """等待子进程结束并获取其自身的资源使用 (退出码, CPU秒, 最大RSS KB)
+
+    使用 os.wait4 按 pid 回收，并发运行多个子进程时统计互不混淆。
+    """
+    if hasattr(os, 'wait4'):
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        except ChildProcessError:
+            pass
+        else:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            cpu, max_rss = rusage_to_stats(usage)
+            return proc.returncode, cpu, max_rss
+
+    return proc.wait(), None, None
+
+
+def _warm_worker():
+    """常驻进程初始化：预导入常用模块"""
+    import importlib
+
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def _run_python_in_worker(path: str, args: List[str], cwd: str) -> Tuple[int, str, str, float, Optional[float], Optional[int]]:
+    """在常驻进程中以 __main__ 身份执行 Python 工具，隔离 argv/stdout/stderr/cwd
+
+    stdout/stderr 在文件描述符级重定向到临时文件，直接写 fd 1/2 的输出
+    与工具派生的子进程输出也一并捕获。
+    CPU 时间为本次调用前后的差值；最大 RSS 为常驻进程的峰值（上界）。
+    """
+    import runpy
+
+    saved_argv, saved_stdout, saved_stderr = sys.argv, sys.stdout, sys.stderr
+    saved_path = list(sys.path)
+    returncode = 0
+    usage_before = self_rusage()
+    start = time.perf_counter()
+
+    with tempfile.TemporaryFile() as out_file, tempfile.TemporaryFile() as err_file:
+        saved_stdout.flush()
+        saved_stderr.flush()
+        saved_fds = os.dup(1), os.dup(2)
+        os.dup2(out_file.fileno(), 1)
+        os.dup2(err_file.fileno(), 2)
+        try:
+            os.chdir(cwd)
+            sys.argv = [path] + list(args)
+            sys.path.insert(0, os.path.dirname(path))
+            sys.stdout = open(1, 'w', buffering=1, encoding='utf-8', errors='backslashreplace', closefd=False)
+            sys.stderr = open(2, 'w', buffering=1, encoding='utf-8', errors='backslashreplace', closefd=False)
+            runpy.run_path(path, run_name='__main__')
+        except SystemExit as e:
+            if e.code is None:
+                returncode = 0
+            elif isinstance(e.code, int):
+                returncode = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                returncode = 1
+        except BaseException:
+            traceback.print_exc()
+            returncode = 1
+        finally:
+            for stream in (sys.stdout, sys.stderr):
+                try:
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+            sys.argv, sys.stdout, sys.stderr = saved_argv, saved_stdout, saved_stderr
+            sys.path[:] = saved_path
+
+        outputs = []
+        for captured in (out_file, err_file):
+            captured.seek(0)
+            outputs.append(captured.read().decode('utf-8', errors='replace'))
+
+    duration = time.perf_counter() - start
+    cpu = max_rss = None
+    usage_after = self_rusage()
+    if usage_before and usage_after:
+        cpu = usage_after[0] - usage_before[0]
+        max_rss = usage_after[1]
+
+    return returncode, outputs[0], outputs[1], duration, cpu, max_rss
+
+
+class ToolRunner:
+    """工具执行器"""
+
+    def __init__(self, toolkit_root: Path, jobs: Optional[int] = None):
+        self.toolkit_root = toolkit_root
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self._python_pool = None
+        self._python_workers = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """关闭常驻进程池"""
+        if self._python_pool is not None:
+            self._python_pool.shutdown(wait=True)
+            self._python_pool = None
+
+    def tool_path(self, tool: InternalTool) -> Path:
+        """工具文件绝对路径"""
+        return self.toolkit_root / tool.tool_file
+
+    def command_for(self, tool: InternalTool, args: List[str]) -> List[str]:
+        """构建工具的执行命令"""
+        path = self.tool_path(tool)
+        interpreter = INTERPRETERS.get(path.suffix)
+        if interpreter is None:
+            return [str(path)] + list(args)
+        return interpreter + [str(path)] + list(args)
+
+    def run(self, tool: InternalTool, args: List[str]) -> RunResult:
+        """运行单个工具，输出直接流向终端"""
+        start = time.perf_counter()
+        proc = subprocess.Popen(self.command_for(tool, args))
+        try:
+            returncode, cpu, max_rss = _wait_with_rusage(proc)
+        except KeyboardInterrupt:
+            proc.kill()
+            proc.wait()
+            raise
+
+        return RunResult(
+            tool_id=tool.tool_id,
+            tool_name=tool.tool_name,
+            args=list(args),
+            returncode=returncode,
+            duration=time.perf_counter() - start,
+            cpu=cpu,
+            max_rss_kb=max_rss
+        )
+
+    def run_batch(self, invocations: List[ToolInvocation]) -> List[RunResult]:
+        """
+        批量运行工具
+
+        Python 工具分发到常驻进程池，其他工具在线程池中以子进程并发执行。
+        两类工具同时存在时按数量比例划分 jobs，总并发数不超过 jobs；
+        jobs 为 1 时两类工具先后执行。
+
+        Args:
+            invocations: 工具调用列表
+
+        Returns:
+            List[RunResult]: 与输入顺序一致的执行结果
+        """
+        python_jobs = []
+        shell_jobs = []
+        for position, invocation in enumerate(invocations):
+            if self.tool_path(invocation.tool).suffix == '.py':
+                python_jobs.append((position, invocation))
+            else:
+                shell_jobs.append((position, invocation))
+
+        results: List[Optional[RunResult]] = [None] * len(invocations)
+
+        python_workers = shell_workers = self.jobs
+        overlap = bool(python_jobs and shell_jobs) and self.jobs > 1
+        if overlap:
+            share = round(self.jobs * len(python_jobs) / len(invocations))
+            python_workers = min(max(1, share), self.jobs - 1)
+            shell_workers = self.jobs - python_workers
+
+        pending = []
+        if python_jobs:
+            pool = self._get_python_pool(python_workers)
+            cwd = os.getcwd()
+            for position, invocation in python_jobs:
+                future = pool.submit(
+                    _run_python_in_worker,
+                    str(self.tool_path(invocation.tool)), invocation.args, cwd
+                )
+                pending.append((position, invocation, future))
+
+        if overlap:
+            self._run_shell_jobs(shell_jobs, shell_workers, results)
+        self._collect_python_jobs(pending, results)
+        if shell_jobs and not overlap:
+            self._run_shell_jobs(shell_jobs, shell_workers, results)
+
+        return results
+
+    def _run_shell_jobs(self, jobs, workers: int, results: List[Optional[RunResult]]):
+        """在线程池中以子进程并发运行非 Python 工具"""
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                (position, executor.submit(self.run_captured, invocation))
+                for position, invocation in jobs
+            ]
+            for position, future in futures:
+                results[position] = future.result()
+
+    def _collect_python_jobs(self, pending, results: List[Optional[RunResult]]):
+        """收集常驻进程池的结果；工作进程异常退出时记为失败，并丢弃损坏的进程池"""
+        broken = False
+        for position, invocation, future in pending:
+            try:
+                returncode, stdout, stderr, duration, cpu, max_rss = future.result()
+            except BrokenProcessPool:
+                # 工具调用 os._exit 或被 OOM 杀死后，池中所有未完成的任务都会失败
+                broken = True
+                returncode, stdout, duration, cpu, max_rss = 1, "", 0.0, None, None
+                stderr = "常驻工作进程异常退出（os._exit、被信号终止或内存不足），结果不可用\n"
+            results[position] = RunResult(
+                tool_id=invocation.tool.tool_id,
+                tool_name=invocation.tool.tool_name,
+                args=list(invocation.args),
+                returncode=returncode,
+                stdout=stdout,
+                stderr=stderr,
+                duration=duration,
+                warm=True,
+                cpu=cpu,
+                max_rss_kb=max_rss
+            )
+
+        if broken:
+            self._python_pool.shutdown(wait=False)
+            self._python_pool = None
+
+    def _get_python_pool(self, workers: int):
+        """创建（或复用）预先 fork 的常驻 Python 进程池
+
+        使用 ProcessPoolExecutor 而非 multiprocessing.Pool：后者的工作进程是
+        守护进程，工具自身再创建进程池（如 --jobs）时会失败。
+        进程数变化时重建进程池。
+        """
+        if self._python_pool is not None and self._python_workers != workers:
+            self.close()
+        if self._python_pool is None:
+            import multiprocessing
+
+            method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._python_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_warm_worker
+            )
+            self._python_workers = workers
+        return self._python_pool
+
+    def run_captured(self, invocation: ToolInvocation) -> RunResult:
+        """以子进程运行工具并捕获输出"""
+        start = time.perf_counter()
+        cpu = max_rss = None
+        try:
+            proc = subprocess.Popen(
+                self.command_for(invocation.tool, invocation.args),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except OSError as e:
+            returncode, stdout, stderr = 127, "", f"{e}\n"
+        else:
+            # 读取线程排空管道，主线程用 wait4 回收以获取该子进程的资源使用
+            outputs = {}
+            readers = [
+                threading.Thread(target=lambda n=name, s=stream: outputs.__setitem__(n, s.read()))
+                for name, stream in (("stdout", proc.stdout), ("stderr", proc.stderr))
+            ]
+            for reader in readers:
+                reader.start()
+            returncode, cpu, max_rss = _wait_with_rusage(proc)
+            for reader in readers:
+                reader.join()
+            proc.stdout.close()
+            proc.stderr.close()
+            stdout, stderr = outputs.get("stdout", ""), outputs.get("stderr", "")
+
+        return RunResult(
+            tool_id=invocation.tool.tool_id,
+            tool_name=invocation.tool.tool_name,
+            args=list(invocation.args),
+            returncode=returncode,
+            stdout=stdout,
+            stderr=stderr,
+            duration=time.perf_counter() - start,
+            cpu=cpu,
+            max_rss_kb=max_rss
+        )
+
+    def run_many(
+        self,
+        invocations: List[ToolInvocation],
+        on_line: Callable[[ToolInvocation, str, str], None],
+        timeout: Optional[float] = None
+    ) -> List[RunResult]:
+        """
+        并发运行多个工具（asyncio 子进程池）
+
+        Args:
+            invocations: 工具调用列表
+            on_line: 输出回调 (调用, 流名称 stdout/stderr, 行内容)，按到达顺序调用
+            timeout: 默认单工具超时秒数（调用自身的 timeout 优先）
+
+        Returns:
+            List[RunResult]: 与输入顺序一致的执行结果（输出已通过回调交付，不再保存）
+        """
+        return asyncio.run(self._run_many(invocations, on_line, timeout))
+
+    async def _run_many(self, invocations, on_line, timeout) -> List[RunResult]:
+        semaphore = asyncio.Semaphore(self.jobs)
+
+        async def run_one(invocation: ToolInvocation) -> RunResult:
+            async with semaphore:
+                return await self._run_async(invocation, on_line, invocation.timeout or timeout)
+
+        return list(await asyncio.gather(*(run_one(inv) for inv in invocations)))
+
+    async def _run_async(self, invocation, on_line, timeout) -> RunResult:
+        """运行单个工具，逐行转发输出，超时则终止进程"""
+        start = time.perf_counter()
+        result = RunResult(
+            tool_id=invocation.tool.tool_id,
+            tool_name=invocation.tool.tool_name,
+            args=list(invocation.args),
+            returncode=0
+        )
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *self.command_for(invocation.tool, invocation.args),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            on_line(invocation, "stderr", str(e))
+            result.returncode = 127
+            result.duration = time.perf_counter() - start
+            return result
+
+        def emit(name, line):
+            on_line(invocation, name, line.decode('utf-8', errors='replace'))
+
+        async def pump(stream, name):
+            buffer = bytearray()
+            while True:
+                chunk = await stream.read(PIPE_READ_SIZE)
+                if not chunk:
+                    break
+                buffer += chunk
+                if b'\n' in chunk:
+                    *lines, rest = bytes(buffer).split(b'\n')
+                    buffer = bytearray(rest)
+                    for line in lines:
+                        emit(name, line)
+            if buffer:
+                emit(name, bytes(buffer))
+
+        readers = asyncio.gather(pump(proc.stdout, "stdout"), pump(proc.stderr, "stderr"))
+        try:
+            await asyncio.wait_for(asyncio.shield(readers), timeout=timeout)
+            # 管道已关闭但进程仍在运行时，等待时间计入同一超时预算
+            remaining = None if timeout is None else max(0.0, timeout - (time.perf_counter() - start))
+            result.returncode = await asyncio.wait_for(proc.wait(), timeout=remaining)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            try:
+                # 子进程派生的后台进程可能仍持有管道，不无限等待
+                await asyncio.wait_for(readers, timeout=1)
+            except asyncio.TimeoutError:
+                pass
+            result.returncode = TIMEOUT_RETURNCODE
+            result.timed_out = True
+
+        result.duration = time.perf_counter() - start
+        return result
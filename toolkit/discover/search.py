@@ -0,0 +1,176 @@
+"""
+Search Engine - 工具倒排索引与 BM25 排序
+
+为 search/recommend 提供排序检索：
+- 分词：ASCII 单词 + CJK 单字/双字 n-gram（支持 "分析日志" 这类无空格中文任务描述）
+- 索引字段：名称、ID、描述、用途、使用场景、使用示例、分类（按字段加权）
+- 打分：BM25，ASCII 查询词支持前缀扩展（"mon" → "monitor"）
+"""
+
+import bisect
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from .models import Tool, InternalTool, ExternalTool
+
+# 字段权重：通过重复词频实现（简化版 BM25F）
+FIELD_WEIGHTS = {
+    "name": 3,
+    "id": 2,
+    "description": 2,
+    "purpose": 1,
+    "category": 1,
+    "use_cases": 1,
+    "examples": 1,
+}
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 前缀扩展命中的折扣系数
+PREFIX_DISCOUNT = 0.5
+
+# 相对最高分的最低分数比例，过滤仅命中零散单字的弱相关结果
+MIN_RELATIVE_SCORE = 0.25
+
+_ASCII_WORD = re.compile(r"[a-z0-9]+")
+_CJK_RUN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词
+
+    ASCII 部分按字母数字切分；CJK 连续片段产出单字与相邻双字，
+    使 "分析日志" 可以匹配 "日志分析器"。
+    """
+    if not text:
+        return []
+
+    text = text.lower()
+    tokens = _ASCII_WORD.findall(text)
+
+    for run in _CJK_RUN.findall(text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+
+    return tokens
+
+
+def _flatten(value) -> Iterable[str]:
+    """展开元数据中的字符串/列表/字典值"""
+    if value is None:
+        return
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield str(key)
+            yield from _flatten(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten(item)
+    else:
+        yield str(value)
+
+
+def tool_fields(tool: Tool) -> Dict[str, str]:
+    """提取工具的可检索字段文本"""
+    fields = {
+        "name": tool.tool_name,
+        "id": tool.tool_id,
+        "description": tool.description,
+        "purpose": " ".join(tool.metadata.purpose),
+    }
+
+    if isinstance(tool, InternalTool):
+        meta = tool.full_meta or {}
+        fields["use_cases"] = " ".join(_flatten(meta.get("使用场景")))
+        fields["examples"] = " ".join(_flatten(tool.usage.get("示例") if tool.usage else None))
+    elif isinstance(tool, ExternalTool):
+        fields["category"] = tool.category
+        fields["use_cases"] = " ".join(_flatten(tool.use_cases))
+
+    return fields
+
+
+class SearchIndex:
+    """基于倒排索引的 BM25 检索"""
+
+    def __init__(self, tools: List[Tool]):
+        self.tools = list(tools)
+        # term → [(文档序号, 加权词频)]
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._doc_lengths: List[int] = []
+        self._vocabulary: List[str] = []
+        self._avg_length = 0.0
+        self._build()
+
+    def _build(self):
+        for doc_id, tool in enumerate(self.tools):
+            counts: Counter = Counter()
+            for field_name, text in tool_fields(tool).items():
+                weight = FIELD_WEIGHTS.get(field_name, 1)
+                for token in tokenize(text):
+                    counts[token] += weight
+
+            for term, freq in counts.items():
+                self._postings[term].append((doc_id, freq))
+            self._doc_lengths.append(sum(counts.values()))
+
+        self._vocabulary = sorted(self._postings)
+        if self._doc_lengths:
+            self._avg_length = sum(self._doc_lengths) / len(self._doc_lengths)
+
+    def _idf(self, term: str) -> float:
+        n = len(self.tools)
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """查询词扩展：精确匹配 + ASCII 前缀匹配（带折扣）"""
+        expansions = []
+        if term in self._postings:
+            expansions.append((term, 1.0))
+
+        if term.isascii() and len(term) >= 2:
+            start = bisect.bisect_left(self._vocabulary, term)
+            for candidate in self._vocabulary[start:]:
+                if not candidate.startswith(term):
+                    break
+                if candidate != term:
+                    expansions.append((candidate, PREFIX_DISCOUNT))
+
+        return expansions
+
+    def search(self, query: str, limit: int = 0) -> List[Tuple[Tool, float]]:
+        """
+        检索工具
+
+        Args:
+            query: 查询文本（关键词或任务描述）
+            limit: 返回数量上限，0 表示不限
+
+        Returns:
+            List[Tuple[Tool, float]]: 按分数降序排列的 (工具, 分数)
+        """
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term, query_freq in Counter(tokenize(query)).items():
+            for expanded, factor in self._expand(term):
+                idf = self._idf(expanded) * factor * query_freq
+                for doc_id, freq in self._postings[expanded]:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / self._avg_length)
+                    scores[doc_id] += idf * freq * (BM25_K1 + 1) / (freq + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if ranked:
+            threshold = ranked[0][1] * MIN_RELATIVE_SCORE
+            ranked = [item for item in ranked if item[1] >= threshold]
+        if limit:
+            ranked = ranked[:limit]
+
+        return [(self.tools[doc_id], score) for doc_id, score in ranked]
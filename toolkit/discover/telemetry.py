@@ -0,0 +1,274 @@
+"""
+Execution Telemetry - 工具执行遥测
+
+每次 `discover run` 追加一条紧凑记录到只追加日志（JSON Lines）：
+
+    {"t": 时间戳, "id": 工具ID, "a": 参数哈希, "w": 墙钟秒, "c": CPU秒,
+     "m": 最大RSS(KB), "x": 退出码, "mode": run/batch/many}
+
+聚合为每个工具的延迟分位数与成功率，供 show 展示、recommend 排序使用。
+
+聚合结果（每个工具最近 STATS_WINDOW 条记录的窗口）保存在日志旁的快照中，
+快照记录已并入的日志偏移，每次只读取新增的部分；日志超过 ROTATE_BYTES 时
+轮转为 runs.jsonl.1（只保留一份），读取开销与历史总量无关。
+"""
+
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 默认日志位置（相对于 toolkit 根目录）
+DEFAULT_TELEMETRY_FILE = Path(".telemetry") / "runs.jsonl"
+
+# 聚合时每个工具保留的最近记录数
+STATS_WINDOW = 1000
+
+# 日志超过该大小时轮转（记录已并入快照）
+ROTATE_BYTES = 1 << 20
+
+# 聚合快照文件名（与日志同目录）及格式版本
+SNAPSHOT_FILE_NAME = "stats.json"
+SNAPSHOT_VERSION = 1
+
+# recommend 参考遥测数据所需的最少运行次数
+MIN_RUNS_FOR_RANKING = 3
+
+
+def argv_hash(args: List[str]) -> str:
+    """参数列表的短哈希（不记录原始参数，避免泄露路径等信息）"""
+    raw = json.dumps(list(args), ensure_ascii=False).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()[:12]
+
+
+def rusage_to_stats(usage) -> tuple:
+    """从 rusage 结构提取 (CPU秒, 最大RSS KB)"""
+    cpu = usage.ru_utime + usage.ru_stime
+    max_rss = usage.ru_maxrss
+    if sys.platform == 'darwin':
+        max_rss //= 1024  # macOS 单位为字节
+    return cpu, max_rss
+
+
+def self_rusage() -> Optional[tuple]:
+    """当前进程的 (CPU秒, 最大RSS KB)，平台不支持时返回None"""
+    if resource is None:
+        return None
+    return rusage_to_stats(resource.getrusage(resource.RUSAGE_SELF))
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """线性插值分位数（输入需已排序）"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+@dataclass
+class ToolRunStats:
+    """单个工具的执行统计"""
+    tool_id: str
+    runs: int
+    success_rate: float
+    p50: float
+    p90: float
+    p99: float
+    mean_cpu: Optional[float] = None
+    max_rss_kb: Optional[int] = None
+
+    @property
+    def ranking_factor(self) -> float:
+        """
+        recommend 排序系数：可靠且快速的工具得分更高
+
+        成功率线性加权；延迟按 p50 取对数衰减（0.1s 内几乎不扣分，10s 约减半）。
+        运行次数不足时不调整。
+        """
+        if self.runs < MIN_RUNS_FOR_RANKING:
+            return 1.0
+        reliability = 0.5 + 0.5 * self.success_rate
+        speed = 1.0 / (1.0 + 0.5 * math.log10(1.0 + self.p50))
+        return reliability * speed
+
+
+class TelemetryLog:
+    """只追加的执行遥测日志"""
+
+    def __init__(self, log_file: Path):
+        self.log_file = log_file
+        self.snapshot_file = log_file.with_name(SNAPSHOT_FILE_NAME)
+        self.rotated_file = log_file.with_name(log_file.name + ".1")
+        self._stats: Optional[Dict[str, ToolRunStats]] = None
+
+    def record(
+        self,
+        tool_id: str,
+        args: List[str],
+        wall: float,
+        returncode: int,
+        cpu: Optional[float] = None,
+        max_rss_kb: Optional[int] = None,
+        mode: str = "run"
+    ):
+        """追加一条执行记录，写入失败时静默跳过（遥测不影响工具执行）"""
+        entry = {
+            "t": round(time.time(), 3),
+            "id": tool_id,
+            "a": argv_hash(args),
+            "w": round(wall, 4),
+            "c": None if cpu is None else round(cpu, 4),
+            "m": max_rss_kb,
+            "x": returncode,
+            "mode": mode,
+        }
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+        try:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            # O_APPEND 单次 write，多个进程并发追加时行不交错
+            fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode('utf-8'))
+            finally:
+                os.close(fd)
+        except OSError:
+            return
+
+        self._stats = None
+
+    @staticmethod
+    def _inode(path: Path) -> Optional[int]:
+        try:
+            return os.stat(path).st_ino
+        except OSError:
+            return None
+
+    @staticmethod
+    def _fold(path: Path, offset: int, windows: Dict[str, Deque[tuple]]) -> int:
+        """把日志 offset 之后的完整行并入各工具的窗口，返回新的偏移"""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # 尚未写完的行留到下次
+                    offset += len(raw)
+                    try:
+                        entry = json.loads(raw)
+                        windows[entry["id"]].append((entry["w"], entry.get("c"), entry.get("m"), entry.get("x")))
+                    except (ValueError, KeyError, TypeError):
+                        continue  # 跳过损坏的行（例如写入中断）
+        except OSError:
+            pass
+        return offset
+
+    def _load_snapshot(self) -> Tuple[Optional[int], int, Dict[str, Deque[tuple]]]:
+        """读取聚合快照：(已并入日志的 inode, 偏移, 各工具窗口)，不可用时从头开始"""
+        windows: Dict[str, Deque[tuple]] = defaultdict(lambda: deque(maxlen=STATS_WINDOW))
+        try:
+            with open(self.snapshot_file, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION:
+                return None, 0, windows
+            for tool_id, records in data["tools"].items():
+                windows[tool_id].extend(tuple(record) for record in records)
+            return data["inode"], int(data["offset"]), windows
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            windows.clear()
+            return None, 0, windows
+
+    def _save_snapshot(self, inode: Optional[int], offset: int, windows: Dict[str, Deque[tuple]]):
+        """原子写入聚合快照，失败时静默跳过（下次重新并入）"""
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "inode": inode,
+            "offset": offset,
+            "tools": {tool_id: list(records) for tool_id, records in windows.items()},
+        }
+        tmp_file = self.snapshot_file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_file, self.snapshot_file)
+        except OSError:
+            try:
+                tmp_file.unlink()
+            except OSError:
+                pass
+
+    def _read_windows(self) -> Dict[str, Deque[tuple]]:
+        """从快照出发并入日志新增的记录，必要时轮转日志，返回各工具最近的记录"""
+        inode, offset, windows = self._load_snapshot()
+        saved = (inode, offset)
+
+        current = self._inode(self.log_file)
+        if inode is not None and inode != current:
+            # 日志已被（其他进程）轮转：先读完旧日志中尚未并入的部分
+            if self._inode(self.rotated_file) == inode:
+                self._fold(self.rotated_file, offset, windows)
+            offset = 0
+        inode = current
+
+        if current is not None:
+            offset = self._fold(self.log_file, offset, windows)
+            if offset >= ROTATE_BYTES:
+                try:
+                    os.replace(self.log_file, self.rotated_file)
+                except OSError:
+                    pass
+                else:
+                    # 轮转前刚追加的记录
+                    self._fold(self.rotated_file, offset, windows)
+                    inode, offset = None, 0
+                    saved = None
+
+        if (inode, offset) != saved:
+            self._save_snapshot(inode, offset, windows)
+        return windows
+
+    def stats(self) -> Dict[str, ToolRunStats]:
+        """聚合所有工具的执行统计"""
+        if self._stats is not None:
+            return self._stats
+
+        result: Dict[str, ToolRunStats] = {}
+        for tool_id, entries in self._read_windows().items():
+            walls = sorted(wall for wall, _, _, _ in entries)
+            cpus = [cpu for _, cpu, _, _ in entries if cpu is not None]
+            rss = [max_rss for _, _, max_rss, _ in entries if max_rss is not None]
+            successes = sum(1 for _, _, _, returncode in entries if returncode == 0)
+
+            result[tool_id] = ToolRunStats(
+                tool_id=tool_id,
+                runs=len(entries),
+                success_rate=successes / len(entries),
+                p50=percentile(walls, 0.50),
+                p90=percentile(walls, 0.90),
+                p99=percentile(walls, 0.99),
+                mean_cpu=sum(cpus) / len(cpus) if cpus else None,
+                max_rss_kb=max(rss) if rss else None
+            )
+
+        self._stats = result
+        return result
+
+    def stats_for(self, tool_id: str) -> Optional[ToolRunStats]:
+        """获取单个工具的执行统计"""
+        return self.stats().get(tool_id)
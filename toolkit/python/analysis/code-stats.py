@@ -6,14 +6,675 @@
 import os
 import sys
 import re
+import json
+import hashlib
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, TextIO, Tuple
 import argparse
 
+# 统计字段
+STAT_KEYS = ('lines', 'code', 'comments', 'blank', 'functions', 'classes', 'imports')
+
+# 遍历时默认忽略的目录/文件名（gitignore 风格通配符，按名称匹配）
+IGNORE_PATTERNS = [
+    '.git', '.svn', '.hg', '__pycache__', 'node_modules',
+    'venv', 'env', '.venv', 'dist', 'build', '*.egg-info'
+]
+
+# 支持的文件类型
+SUPPORTED_EXTENSIONS = {'.py', '.js', '.ts', '.java', '.cpp', '.c', '.h', '.sh'}
+
+# --jobs 模式下每个任务分片包含的文件数（摊薄进程间通信开销）
+PARALLEL_CHUNK_SIZE = 64
+
+# --jobs 模式下每个进程最多在途的分片数
+PARALLEL_CHUNKS_IN_FLIGHT = 2
+
+# 流式读取的缓冲区大小
+READ_BUFFER_SIZE = 1 << 16
+
+# 逐文件缓存格式版本，统计规则变化时递增以自动失效旧缓存
+CACHE_VERSION = 2
+
+
+def default_cache_path(project_path: Path) -> Path:
+    """默认缓存文件位置：$XDG_CACHE_HOME/ai-runtime/code-stats/<项目路径哈希>.json"""
+    cache_root = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+    key = hashlib.sha1(str(Path(project_path).resolve()).encode('utf-8')).hexdigest()[:16]
+    return cache_root / 'ai-runtime' / 'code-stats' / f'{key}.json'
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """gitignore 风格通配符 → 正则：* 和 ? 不跨目录，** 跨任意层目录"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**', i):
+            i += 2
+            if i < n and pattern[i] == '/':
+                out.append('(?:.*/)?')
+                i += 1
+            else:
+                out.append('.*')
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[' and pattern.find(']', i + 2) != -1:
+            end = pattern.find(']', i + 2)
+            body = pattern[i + 1:end].replace('\\', '\\\\')
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append(f'[{body}]')
+            i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class IgnoreRules:
+    """一组 gitignore 风格的忽略规则（支持 ! 否定、目录限定 /、锚定路径与 ** 通配）"""
+
+    def __init__(self, patterns: Iterable[str], base: str = ''):
+        # 规则所在目录相对于遍历根目录的前缀（'' 或 'sub/dir/'）
+        self.base = base
+        self.rules: List[Tuple[Any, bool, bool, bool]] = []
+
+        for line in patterns:
+            line = line.rstrip('\r\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\'):
+                line = line[1:]  # \# 或 \! 转义
+
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+
+            # 含 / 的规则相对规则文件所在目录锚定，否则匹配任意层级的名称
+            anchored = '/' in line
+            regex = re.compile(_glob_to_regex(line.lstrip('/')))
+            self.rules.append((regex, negate, dir_only, anchored))
+
+    @classmethod
+    def from_gitignore(cls, gitignore: str, base: str) -> Optional['IgnoreRules']:
+        """读取 .gitignore，没有有效规则时返回None"""
+        try:
+            with open(gitignore, encoding='utf-8', errors='replace') as f:
+                rules = cls(f, base)
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, rel_path: str, name: str, is_dir: bool) -> Optional[bool]:
+        """
+        检查路径是否被忽略
+
+        Args:
+            rel_path: 相对于遍历根目录的路径
+            name: 文件/目录名
+            is_dir: 是否为目录
+
+        Returns:
+            True 忽略，False 被否定规则重新包含，None 没有规则匹配
+        """
+        local = rel_path[len(self.base):]
+        # 后出现的规则优先
+        for regex, negate, dir_only, anchored in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(local if anchored else name):
+                return not negate
+        return None
+
+
+def _empty_stats() -> Dict[str, int]:
+    return {key: 0 for key in STAT_KEYS}
+
+
+class LineClassifier:
+    """
+    逐行分类器基类：流式读入文本行，统计代码/注释/空行与函数/类/导入
+
+    子类按语言注册到 CLASSIFIERS；每个文件使用新实例（分类器带跨行状态）。
+    同时含代码与注释的行计入两者（与原统计口径一致）。
+    """
+
+    # 以下正则作用于去除注释和字符串内容后的代码文本
+    FUNCTION_RE: Optional[Any] = None
+    CLASS_RE: Optional[Any] = None
+    IMPORT_RE: Optional[Any] = None
+
+    def count(self, lines: Iterable[str]) -> Dict[str, int]:
+        file_stats = _empty_stats()
+        for line in lines:
+            self.classify(line, file_stats)
+        return file_stats
+
+    def classify(self, line: str, file_stats: Dict[str, int]):
+        """分类单行并累加到 file_stats"""
+        file_stats['lines'] += 1
+        if not line.strip():
+            file_stats['blank'] += 1
+            return
+
+        code, has_comment = self.split_line(line)
+        if has_comment:
+            file_stats['comments'] += 1
+        if code.strip():
+            file_stats['code'] += 1
+            self.count_definitions(code, file_stats)
+        elif not has_comment:
+            # 例如只含字符串续行的内容
+            file_stats['code'] += 1
+
+    def split_line(self, line: str) -> Tuple[str, bool]:
+        """返回 (去除注释与字符串内容后的代码文本, 是否含注释)"""
+        return line, False
+
+    def count_definitions(self, code: str, file_stats: Dict[str, int]):
+        if self.FUNCTION_RE is not None:
+            file_stats['functions'] += len(self.FUNCTION_RE.findall(code))
+        if self.CLASS_RE is not None and self.CLASS_RE.search(code):
+            file_stats['classes'] += 1
+        if self.IMPORT_RE is not None and self.IMPORT_RE.search(code):
+            file_stats['imports'] += 1
+
+
+class CFamilyClassifier(LineClassifier):
+    """C 风格注释（// 与 /* */），跳过字符串内的注释标记"""
+
+    SPECIAL_RE = re.compile(r'//|/\*|["\'`]')
+    STRING_END_RE = {
+        '"': re.compile(r'(?:[^"\\]|\\.)*"'),
+        "'": re.compile(r"(?:[^'\\]|\\.)*'"),
+        '`': re.compile(r'(?:[^`\\]|\\.)*`'),
+    }
+    # 可以跨行的字符串引号（JS/TS 模板字符串）
+    MULTILINE_QUOTES = ''
+
+    def __init__(self):
+        self.in_block_comment = False
+        self.open_quote: Optional[str] = None
+
+    def split_line(self, line: str) -> Tuple[str, bool]:
+        code = []
+        has_comment = False
+        i, n = 0, len(line)
+
+        while i < n:
+            if self.in_block_comment:
+                has_comment = True
+                end = line.find('*/', i)
+                if end == -1:
+                    break
+                self.in_block_comment = False
+                i = end + 2
+                continue
+
+            if self.open_quote is not None:
+                match = self.STRING_END_RE[self.open_quote].match(line, i)
+                if match is None:
+                    break
+                code.append(self.open_quote)
+                self.open_quote = None
+                i = match.end()
+                continue
+
+            match = self.SPECIAL_RE.search(line, i)
+            if match is None:
+                code.append(line[i:])
+                break
+
+            code.append(line[i:match.start()])
+            token = match.group()
+            if token == '//':
+                has_comment = True
+                break
+            if token == '/*':
+                self.in_block_comment = True
+                i = match.end()
+                continue
+
+            # 字符串：内容替换为空字符串，避免其中的关键字被计数
+            code.append(token)
+            end = self.STRING_END_RE[token].match(line, match.end())
+            if end is None:
+                if token in self.MULTILINE_QUOTES:
+                    self.open_quote = token
+                else:
+                    code.append(token)
+                break
+            code.append(token)
+            i = end.end()
+
+        return ''.join(code), has_comment
+
+
+class JavaScriptClassifier(CFamilyClassifier):
+    """JavaScript / TypeScript"""
+
+    MULTILINE_QUOTES = '`'
+    FUNCTION_RE = re.compile(r'\bfunction\b|=>')
+    # 类/对象中的方法简写：name(...) {
+    METHOD_RE = re.compile(r'^\s*(?:(?:static|async|get|set|public|private|protected)\s+)*\*?([\w$]+)\s*\([^()]*\)\s*(?::[^{]*)?\{')
+    NOT_METHODS = {'if', 'for', 'while', 'switch', 'catch', 'function', 'with'}
+    CLASS_RE = re.compile(r'(?<![\w.$])class\s+[\w$]')
+    IMPORT_RE = re.compile(r'^\s*import\b|^\s*export\b.*\bfrom\s*["\']|\brequire\s*\(')
+
+    def count_definitions(self, code: str, file_stats: Dict[str, int]):
+        super().count_definitions(code, file_stats)
+        match = self.METHOD_RE.match(code)
+        if match and match.group(1) not in self.NOT_METHODS:
+            file_stats['functions'] += 1
+
+
+class JavaClassifier(CFamilyClassifier):
+    """Java：方法声明为「类型 名称(」且不以分号结尾"""
+
+    # 第一个 ( 之前的文本（修饰符、注解、返回类型、名称）
+    DECLARATION_PREFIX_RE = re.compile(r'[\w\s<>\[\],.?@]+')
+    NOT_DECLARATIONS = {
+        'return', 'new', 'throw', 'else', 'case', 'if', 'for', 'while', 'switch',
+        'do', 'yield', 'await', 'package', 'import'
+    }
+    CLASS_RE = re.compile(r'(?<![\w.])(?:class|interface|enum|record)\s+\w')
+    IMPORT_RE = re.compile(r'^\s*import\s')
+
+    def count_definitions(self, code: str, file_stats: Dict[str, int]):
+        super().count_definitions(code, file_stats)
+
+        paren = code.find('(')
+        if paren <= 0 or code.rstrip().endswith(';'):
+            return
+        prefix = code[:paren].strip()
+        words = prefix.replace('*', ' ').replace('&', ' ').split()
+        if len(words) >= 2 and words[0] not in self.NOT_DECLARATIONS \
+                and self.DECLARATION_PREFIX_RE.fullmatch(prefix):
+            file_stats['functions'] += 1
+
+
+class CClassifier(JavaClassifier):
+    """C / C++：函数定义、class/struct/union 定义（不含前置声明）、#include"""
+
+    DECLARATION_PREFIX_RE = re.compile(r'[\w\s<>\[\],:*&~]+')
+    NOT_DECLARATIONS = JavaClassifier.NOT_DECLARATIONS | {'sizeof', 'goto', 'delete', 'typedef'}
+    CLASS_RE = re.compile(r'^\s*(?:typedef\s+)?(?:class|struct|union)\s+\w+\s*(?:[:{]|$)')
+    IMPORT_RE = re.compile(r'^\s*#\s*include\b')
+
+
+class HashCommentClassifier(LineClassifier):
+    """
+    # 行注释语言（Shell），引号内与词中间的 # 不算注释（如 $#、${#var}）
+
+    here-document（<<WORD、<<-WORD、<<'WORD'）的正文直到结束行都按代码行计，
+    不解析其中的引号与注释；词中间的引号（如 it's）在本行未闭合时按普通字符处理。
+    """
+
+    QUOTE_RE = re.compile(r'#|["\']|<<')
+    STRING_END_RE = {
+        '"': re.compile(r'(?:[^"\\]|\\.)*"'),
+        "'": re.compile(r"[^']*'"),
+    }
+    HEREDOC_RE = re.compile(r"""<<(?!<)(-?)[ \t]*(?:'([^'\n]*)'|"([^"\n]*)"|\\?([A-Za-z_][\w.-]*))""")
+    FUNCTION_RE = re.compile(r'^\s*(?:function\s+[\w.:-]+|[\w.:-]+\s*\(\s*\)\s*(?:\{|$))')
+    IMPORT_RE = re.compile(r'^\s*(?:source|\.)\s+\S')
+
+    def __init__(self):
+        self.open_quote: Optional[str] = None
+        # 待读取的 here-document：(结束词, 是否忽略行首制表符)，按出现顺序
+        self.heredocs: List[Tuple[str, bool]] = []
+
+    def split_line(self, line: str) -> Tuple[str, bool]:
+        if self.heredocs:
+            word, strip_tabs = self.heredocs[0]
+            text = line.rstrip('\r\n')
+            if (text.lstrip('\t') if strip_tabs else text) == word:
+                self.heredocs.pop(0)
+            return '', False
+
+        code = []
+        heredocs = []
+        i, n = 0, len(line)
+
+        while i < n:
+            if self.open_quote is not None:
+                match = self.STRING_END_RE[self.open_quote].match(line, i)
+                if match is None:
+                    break
+                code.append(self.open_quote)
+                self.open_quote = None
+                i = match.end()
+                continue
+
+            match = self.QUOTE_RE.search(line, i)
+            if match is None:
+                code.append(line[i:])
+                break
+
+            start = match.start()
+            code.append(line[i:start])
+            token = match.group()
+            if token == '#':
+                # 只有位于词首的 # 才开始注释
+                if start == 0 or line[start - 1] in ' \t;&|(':
+                    self.heredocs.extend(heredocs)
+                    return ''.join(code), True
+                code.append('#')
+                i = start + 1
+                continue
+
+            if token == '<<':
+                heredoc = self.HEREDOC_RE.match(line, start)
+                code.append('<<')
+                if heredoc is None:
+                    i = start + 2
+                    continue
+                word = next(group for group in heredoc.groups()[1:] if group is not None)
+                heredocs.append((word, heredoc.group(1) == '-'))
+                i = heredoc.end()
+                continue
+
+            code.append(token)
+            end = self.STRING_END_RE[token].match(line, match.end())
+            if end is None and start > 0 and line[start - 1].isalnum():
+                # 词中间未闭合的引号（如 it's）不延续到后续行
+                i = match.end()
+                continue
+            self.open_quote = token
+            i = match.end()
+
+        self.heredocs.extend(heredocs)
+        return ''.join(code), False
+
+
+class PythonClassifier(LineClassifier):
+    """
+    Python：单遍扫描字符串、注释与括号深度（与 tokenize 的划分一致）
+
+    - 注释行：含 # 注释，或属于文档字符串（逻辑行开头、独立成句的字符串）
+    - 代码行：注释与文档字符串以外的内容（含普通多行字符串所跨的行）
+    - 逻辑行开头、以及括号外 ; 或 : 之后的 def/class/import/from 计数
+
+    tokenize 在 Python 3.11 及以前为纯 Python 实现，逐 token 处理比逐行扫描慢约 5 倍，
+    因此这里只按行做一次正则扫描；在标准库上的分类结果与 tokenize 逐文件一致。
+    """
+
+    SPECIAL_RE = re.compile(r'[#\'"]')
+    # 字符串前缀（r/b/u/f 组合）不算作字符串之前的代码
+    PREFIX_RE = re.compile(r'(?<!\w)[rRbBuUfF]{1,2}$')
+    STRING_END_RE = {
+        '"""': re.compile(r'(?:[^"\\]|\\.|"(?!""))*"""', re.S),
+        "'''": re.compile(r"(?:[^'\\]|\\.|'(?!''))*'''", re.S),
+        '"': re.compile(r'(?:[^"\\\n]|\\.)*"', re.S),
+        "'": re.compile(r"(?:[^'\\\n]|\\.)*'", re.S),
+    }
+    KEYWORD_RE = re.compile(r'[()\[\]{}]|(?P<sep>^|[;:])\s*(?:async\s+)?(?P<kw>def|class|import|from)\b')
+    KEYWORD_HINT_RE = re.compile(r'\b(?:def|class|import|from)\b')
+    DEFINITION_KEYS = {'def': 'functions', 'class': 'classes', 'import': 'imports', 'from': 'imports'}
+
+    def count(self, lines: Iterable[str]) -> Dict[str, int]:
+        # 热路径：单循环 + 局部变量，避免逐行方法调用
+        special_search = self.SPECIAL_RE.search
+        hint_search = self.KEYWORD_HINT_RE.search
+        string_end = self.STRING_END_RE
+        definitions = {'functions': 0, 'classes': 0, 'imports': 0}
+        total = code_lines = comment_lines = blank_lines = 0
+
+        open_quote: Optional[str] = None  # 跨行未闭合的字符串引号
+        open_is_doc = False               # 该字符串是否为文档字符串候选
+        doc_lines = 0                     # 文档字符串候选已跨越、尚未定性的行数
+        depth = 0                         # 括号嵌套深度
+        continued = False                 # 上一行以反斜杠续行
+
+        for line in lines:
+            total += 1
+            has_code = has_comment = False
+            i = 0
+
+            if open_quote is None:
+                starts_logical = depth == 0 and not continued
+                match = special_search(line)
+                if match is None:
+                    if not line.strip():
+                        blank_lines += 1
+                        continue
+                    # 快速路径：不含字符串与注释的纯代码行（最常见）
+                    code_lines += 1
+                    depth = self._scan_keywords(line, depth, starts_logical, definitions, hint_search)
+                    continued = line.rstrip('\r\n').endswith('\\')
+                    continue
+            else:
+                starts_logical = False
+                end = string_end[open_quote].match(line)
+                if end is None:
+                    if open_is_doc:
+                        doc_lines += 1
+                    else:
+                        code_lines += 1
+                    continue
+
+                i = end.end()
+                if open_is_doc:
+                    rest = line[i:].strip()
+                    if not rest or rest[0] == '#':
+                        comment_lines += doc_lines
+                        has_comment = True
+                    else:
+                        code_lines += doc_lines
+                        has_code = True
+                else:
+                    has_code = True
+                open_quote = None
+                open_is_doc = False
+                doc_lines = 0
+                match = special_search(line, i)
+
+            code = []
+            while True:
+                if match is None:
+                    code.append(line[i:])
+                    break
+
+                start = match.start()
+                segment = line[i:start]
+                char = line[start]
+                if char == '#':
+                    code.append(segment)
+                    if not has_code and segment.strip():
+                        has_code = True
+                    has_comment = True
+                    break
+
+                if segment and segment[-1] in 'rRbBuUfF':
+                    segment = self.PREFIX_RE.sub('', segment)
+                code.append(segment)
+                if not has_code and segment.strip():
+                    has_code = True
+                quote = char * 3 if line.startswith(char * 3, start) else char
+
+                # 字符串出现在逻辑行开头（此前无任何代码）时可能是文档字符串
+                candidate = starts_logical and not has_code and not has_comment
+                end = string_end[quote].match(line, start + len(quote))
+                if end is None:
+                    if len(quote) == 3 or line.rstrip('\r\n').endswith('\\'):
+                        open_quote = quote
+                        open_is_doc = candidate
+                        if candidate:
+                            doc_lines = 1  # 本行待字符串闭合后定性
+                    if not candidate:
+                        has_code = True
+                    break
+
+                i = end.end()
+                rest = line[i:].strip() if candidate else None
+                if candidate and (not rest or rest[0] == '#'):
+                    has_comment = True
+                else:
+                    has_code = True
+                    code.append('""')
+                match = special_search(line, i)
+
+            if doc_lines and open_is_doc and open_quote is not None and not has_code and not has_comment:
+                continue
+
+            code_text = ''.join(code)
+            depth = self._scan_keywords(code_text, depth, starts_logical, definitions, hint_search)
+            continued = open_quote is None and code_text.rstrip('\r\n').endswith('\\')
+
+            if has_code or code_text.strip():
+                code_lines += 1
+            if has_comment:
+                comment_lines += 1
+
+        return {
+            'lines': total,
+            # 文件结束时仍未闭合的字符串按代码计
+            'code': code_lines + doc_lines,
+            'comments': comment_lines,
+            'blank': blank_lines,
+            **definitions
+        }
+
+    @classmethod
+    def _scan_keywords(cls, code_text: str, depth: int, starts_logical: bool,
+                       definitions: Dict[str, int], hint_search) -> int:
+        """跟踪括号深度并统计语句开头的 def/class/import/from，返回新的括号深度"""
+        if not ('def' in code_text or 'class' in code_text or 'import' in code_text or 'from' in code_text) \
+                or hint_search(code_text) is None:
+            # 不含关键字时只需更新括号深度
+            depth += (code_text.count('(') + code_text.count('[') + code_text.count('{')
+                      - code_text.count(')') - code_text.count(']') - code_text.count('}'))
+            return depth if depth > 0 else 0
+
+        for match in cls.KEYWORD_RE.finditer(code_text):
+            keyword = match.group('kw')
+            if keyword is None:
+                if match.group() in '([{':
+                    depth += 1
+                elif depth > 0:
+                    depth -= 1
+            elif depth == 0 and (match.group('sep') or starts_logical):
+                definitions[cls.DEFINITION_KEYS[keyword]] += 1
+        return depth
+
+
+# 扩展名 → 分类器
+CLASSIFIERS: Dict[str, type] = {
+    '.py': PythonClassifier,
+    '.js': JavaScriptClassifier,
+    '.ts': JavaScriptClassifier,
+    '.java': JavaClassifier,
+    '.c': CClassifier,
+    '.h': CClassifier,
+    '.cpp': CClassifier,
+    '.sh': HashCommentClassifier,
+}
+
+
+def classifier_for(ext: str) -> LineClassifier:
+    """获取扩展名对应的分类器实例（未注册的扩展名使用 C 风格注释规则）"""
+    return CLASSIFIERS.get(ext, CFamilyClassifier)()
+
+
+def _decoded_lines(raw_lines: Iterable[bytes], digest=None) -> Iterator[str]:
+    """逐行按 UTF-8 解码（跳过 BOM），给定 digest 时同时更新内容哈希"""
+    decode = 'utf-8-sig'
+    for raw in raw_lines:
+        if digest is not None:
+            digest.update(raw)
+        yield raw.decode(decode)
+        decode = 'utf-8'
+
+
+def _analyze_chunk(paths: List[Tuple[str, str]]) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+    """进程池任务：分析一组 (路径, 扩展名)，返回每个文件的 (file_stats, 内容哈希)"""
+    analyzer = CodeStats(Path('.'))
+    return [analyzer.analyze_stream(Path(path), ext) for path, ext in paths]
+
+
+class StatsCache:
+    """逐文件统计缓存：路径 → (mtime, size, 内容哈希, file_stats)"""
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.seen: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if data.get('version') == CACHE_VERSION:
+            self.entries = data.get('files', {})
+
+    def lookup(self, key: str, st: os.stat_result) -> Optional[Dict[str, Any]]:
+        """mtime 与 size 均未变化时直接返回缓存的统计"""
+        entry = self.entries.get(key)
+        if entry and entry['mtime'] == st.st_mtime_ns and entry['size'] == st.st_size:
+            self.hits += 1
+            self.seen[key] = entry
+            return entry['stats']
+        return None
+
+    def lookup_hash(self, key: str, st: os.stat_result, digest: str) -> Optional[Dict[str, Any]]:
+        """mtime 变化但内容哈希一致（如 touch / checkout）时复用统计"""
+        entry = self.entries.get(key)
+        if entry and entry['hash'] == digest:
+            self.hits += 1
+            self.store(key, st, digest, entry['stats'], count_miss=False)
+            return entry['stats']
+        return None
+
+    def store(self, key: str, st: os.stat_result, digest: str, file_stats: Dict[str, Any],
+              count_miss: bool = True):
+        if count_miss:
+            self.misses += 1
+        self.seen[key] = {
+            'mtime': st.st_mtime_ns,
+            'size': st.st_size,
+            'hash': digest,
+            'stats': file_stats
+        }
+
+    def save(self):
+        """只保存本次出现过的文件（已删除文件的条目随之淘汰）"""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps({'version': CACHE_VERSION, 'files': self.seen}), encoding='utf-8')
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            print(f"⚠️  警告: 无法写入缓存 {self.cache_file}: {e}", file=sys.stderr)
+
 
 class CodeStats:
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, cache: Optional[StatsCache] = None,
+                 excludes: Optional[List[str]] = None, use_gitignore: bool = True):
         self.project_path = Path(project_path)
+        self.cache = cache
+        self.ignore_rules = IgnoreRules(IGNORE_PATTERNS + list(excludes or []))
+        self.use_gitignore = use_gitignore
+        # 最近一次 analyze_directory 的耗时（秒），用于报告吞吐量
+        self.elapsed = 0.0
         self.stats: Dict[str, Any] = {
             'files': 0,
             'total_lines': 0,
@@ -28,124 +689,208 @@ class CodeStats:
 
     def analyze_file(self, file_path: Path) -> Dict[str, Any]:
         """分析单个文件"""
-        file_stats = {
-            'lines': 0,
-            'code': 0,
-            'comments': 0,
-            'blank': 0,
-            'functions': 0,
-            'classes': 0,
-            'imports': 0
-        }
+        return self.analyze_stream(file_path)[0]
 
-        try:
-            content = file_path.read_text(encoding='utf-8')
-            lines = content.splitlines()
+    def analyze_stream(self, file_path: Path, ext: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        按缓冲块流式读取并分类（内存占用与文件大小无关）
 
-            in_block_comment = False
+        Args:
+            file_path: 文件路径
+            ext: 扩展名（决定使用的分类器），默认取文件后缀
 
-            for line in lines:
-                file_stats['lines'] += 1
-                stripped = line.strip()
+        Returns:
+            (file_stats, 内容哈希)，无法读取或解码时哈希为None
+        """
+        classifier = classifier_for(ext or file_path.suffix.lower())
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(file_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+                file_stats = classifier.count(_decoded_lines(f, digest))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"⚠️  警告: 无法读取文件 {file_path}: {e}", file=sys.stderr)
+            return _empty_stats(), None
+        return file_stats, digest.hexdigest()
 
-                # 空行
-                if not stripped:
-                    file_stats['blank'] += 1
-                    continue
+    def _lookup_cache(self, file_path: Path,
+                      entry: Optional[os.DirEntry] = None) -> Tuple[Optional[Dict[str, Any]], Optional[os.stat_result]]:
+        """按 mtime/size 查询逐文件缓存，返回 (缓存统计, stat结果)；有 DirEntry 时复用其 stat"""
+        if self.cache is None:
+            return None, None
+        try:
+            st = entry.stat() if entry is not None else file_path.stat()
+        except OSError:
+            return None, None
+        return self.cache.lookup(os.path.abspath(file_path), st), st
 
-                # 块注释检测
-                if '/*' in stripped and not in_block_comment:
-                    in_block_comment = True
-                    file_stats['comments'] += 1
-                    continue
+    def _store_cache(self, file_path: Path, st: Optional[os.stat_result], digest: Optional[str],
+                     file_stats: Dict[str, Any]) -> Dict[str, Any]:
+        """内容哈希未变时复用缓存统计，否则写入新统计"""
+        if self.cache is None or st is None or digest is None:
+            return file_stats
+        key = os.path.abspath(file_path)
+        cached = self.cache.lookup_hash(key, st, digest)
+        if cached is not None:
+            return cached
+        self.cache.store(key, st, digest, file_stats)
+        return file_stats
 
-                if in_block_comment:
-                    file_stats['comments'] += 1
-                    if '*/' in stripped:
-                        in_block_comment = False
-                    continue
+    def analyze_file_cached(self, file_path: Path, entry: Optional[os.DirEntry] = None,
+                            ext: Optional[str] = None) -> Dict[str, Any]:
+        """分析单个文件，优先使用逐文件缓存"""
+        if self.cache is None:
+            return self.analyze_stream(file_path, ext)[0]
 
-                # 行注释
-                if stripped.startswith('#') or stripped.startswith('//'):
-                    file_stats['comments'] += 1
-                    continue
+        cached, st = self._lookup_cache(file_path, entry)
+        if cached is not None:
+            return cached
 
-                if '#' in stripped and not stripped.startswith('"') and not stripped.startswith("'"):
-                    file_stats['comments'] += 1
-                    file_stats['code'] += 1
-                    continue
+        file_stats, digest = self.analyze_stream(file_path, ext)
+        return self._store_cache(file_path, st, digest, file_stats)
 
-                # 代码行
-                file_stats['code'] += 1
+    def iter_source_files(self, directory: Path) -> Iterator[Tuple[Path, str, os.DirEntry]]:
+        """
+        基于 os.scandir 的剪枝遍历，产出 (文件路径, 扩展名, DirEntry)
 
-                # 函数/类检测
-                if 'def ' in line and 'class ' not in line:
-                    file_stats['functions'] += 1
-                elif 'class ' in line:
-                    file_stats['classes'] += 1
-                elif 'import ' in line or 'from ' in line:
-                    file_stats['imports'] += 1
+        被忽略的目录在进入前剪掉（node_modules 等不会被读取），
+        沿途的 .gitignore 按 git 语义叠加，深层规则优先。
+        """
+        yield from self._walk(str(directory), '', [self.ignore_rules])
 
-            return file_stats
+    def _walk(self, directory: str, rel_dir: str,
+              rules: List[IgnoreRules]) -> Iterator[Tuple[Path, str, os.DirEntry]]:
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as e:
+            print(f"⚠️  警告: 无法读取目录 {directory}: {e}", file=sys.stderr)
+            return
 
-        except Exception as e:
-            print(f"⚠️  警告: 无法读取文件 {file_path}: {e}", file=sys.stderr)
-            return file_stats
+        if self.use_gitignore:
+            for entry in entries:
+                if entry.name == '.gitignore':
+                    gitignore = IgnoreRules.from_gitignore(entry.path, rel_dir)
+                    if gitignore is not None:
+                        rules = rules + [gitignore]
+                    break
 
-    def analyze_directory(self, directory: Path):
-        """递归分析目录"""
-        ignore_patterns = {
-            '.git', '.svn', '.hg', '__pycache__', 'node_modules',
-            'venv', 'env', '.venv', 'dist', 'build', '*.egg-info'
-        }
+        # 与 Path 拼接保持一致（'.' 下的条目不带 './' 前缀）
+        prefix = '' if directory == '.' else os.path.join(directory, '')
 
-        for item in directory.iterdir():
-            # 忽略模式
-            if any(pattern in str(item) for pattern in ignore_patterns):
+        for entry in entries:
+            name = entry.name
+            is_dir = entry.is_dir()
+            rel_path = rel_dir + name
+
+            if self._is_ignored(rules, rel_path, name, is_dir):
                 continue
 
-            if item.is_dir():
-                self.analyze_directory(item)
-            elif item.is_file():
-                # 支持的文件类型
-                supported_ext = {'.py', '.js', '.ts', '.java', '.cpp', '.c', '.h', '.sh'}
-                ext = item.suffix.lower()
-
-                if ext in supported_ext:
-                    file_stats = self.analyze_file(item)
-
-                    # 更新全局统计
-                    self.stats['files'] += 1
-                    self.stats['total_lines'] += file_stats['lines']
-                    self.stats['code_lines'] += file_stats['code']
-                    self.stats['comment_lines'] += file_stats['comments']
-                    self.stats['blank_lines'] += file_stats['blank']
-                    self.stats['functions'] += file_stats['functions']
-                    self.stats['classes'] += file_stats['classes']
-                    self.stats['imports'] += file_stats['imports']
-
-                    # 按扩展名分组
-                    if ext not in self.stats['by_extension']:
-                        self.stats['by_extension'][ext] = {
-                            'files': 0,
-                            'lines': 0,
-                            'code': 0,
-                            'comments': 0,
-                            'blank': 0,
-                            'functions': 0,
-                            'classes': 0,
-                            'imports': 0
-                        }
-
-                    ext_stats = self.stats['by_extension'][ext]
-                    ext_stats['files'] += 1
-                    ext_stats['lines'] += file_stats['lines']
-                    ext_stats['code'] += file_stats['code']
-                    ext_stats['comments'] += file_stats['comments']
-                    ext_stats['blank'] += file_stats['blank']
-                    ext_stats['functions'] += file_stats['functions']
-                    ext_stats['classes'] += file_stats['classes']
-                    ext_stats['imports'] += file_stats['imports']
+            if is_dir:
+                yield from self._walk(prefix + name, rel_path + '/', rules)
+            elif entry.is_file():
+                ext = os.path.splitext(name)[1].lower()
+                if ext in SUPPORTED_EXTENSIONS:
+                    yield Path(prefix + name), ext, entry
+
+    def is_ignored_path(self, rel_path: str) -> bool:
+        """按默认忽略规则与 --exclude 检查相对路径（逐级检查所在目录）"""
+        parts = rel_path.split('/')
+        for depth in range(1, len(parts) + 1):
+            if self._is_ignored([self.ignore_rules], '/'.join(parts[:depth]), parts[depth - 1], depth < len(parts)):
+                return True
+        return False
+
+    @staticmethod
+    def _is_ignored(rules: List[IgnoreRules], rel_path: str, name: str, is_dir: bool) -> bool:
+        for rule_set in reversed(rules):
+            result = rule_set.match(rel_path, name, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def analyze_directory(self, directory: Path, jobs: int = 1,
+                          on_file: Optional[Callable[[Path, str, Dict[str, Any]], None]] = None):
+        """递归分析目录
+
+        Args:
+            directory: 目录路径
+            jobs: 并行进程数，大于 1 时分片分发到进程池
+            on_file: 每分析完一个文件即回调 (路径, 扩展名, file_stats)，用于流式输出
+        """
+        started = time.perf_counter()
+        for file_path, ext, file_stats in self.iter_file_stats(directory, jobs):
+            self.add_file_stats(ext, file_stats)
+            if on_file is not None:
+                on_file(file_path, ext, file_stats)
+        self.elapsed = time.perf_counter() - started
+
+    def iter_file_stats(self, directory: Path, jobs: int = 1) -> Iterator[Tuple[Path, str, Dict[str, Any]]]:
+        """按遍历顺序产出 (路径, 扩展名, file_stats)，并行与串行的顺序一致"""
+        if jobs <= 1:
+            for file_path, ext, entry in self.iter_source_files(directory):
+                yield file_path, ext, self.analyze_file_cached(file_path, entry, ext)
+            return
+
+        # 边遍历边分发，在途分片数有上限，内存占用与文件总数无关
+        files = self.iter_source_files(directory)
+        in_flight: deque = deque()
+        exhausted = False
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            while True:
+                while not exhausted and len(in_flight) < jobs * PARALLEL_CHUNKS_IN_FLIGHT:
+                    chunk = list(islice(files, PARALLEL_CHUNK_SIZE))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    in_flight.append(self._submit_chunk(executor, chunk))
+                if not in_flight:
+                    break
+                yield from self._collect_chunk(*in_flight.popleft())
+
+    def _submit_chunk(self, executor: ProcessPoolExecutor, chunk: List[Tuple[Path, str, os.DirEntry]]):
+        """缓存命中的文件在主进程直接取用，其余提交到进程池"""
+        results: List[Optional[Dict[str, Any]]] = []
+        stats: List[Optional[os.stat_result]] = []
+        misses = []
+        for position, (file_path, ext, entry) in enumerate(chunk):
+            cached, st = self._lookup_cache(file_path, entry)
+            results.append(cached)
+            stats.append(st)
+            if cached is None:
+                misses.append(position)
+
+        future = None
+        if misses:
+            future = executor.submit(_analyze_chunk, [(str(chunk[i][0]), chunk[i][1]) for i in misses])
+        return chunk, results, stats, misses, future
+
+    def _collect_chunk(self, chunk, results, stats, misses, future) -> Iterator[Tuple[Path, str, Dict[str, Any]]]:
+        if future is not None:
+            for position, (file_stats, digest) in zip(misses, future.result()):
+                results[position] = self._store_cache(chunk[position][0], stats[position], digest, file_stats)
+
+        for (file_path, ext, _), file_stats in zip(chunk, results):
+            yield file_path, ext, file_stats
+
+    def add_file_stats(self, ext: str, file_stats: Dict[str, Any]):
+        """将单个文件的统计合并到全局与按扩展名统计"""
+        self.stats['files'] += 1
+        self.stats['total_lines'] += file_stats['lines']
+        self.stats['code_lines'] += file_stats['code']
+        self.stats['comment_lines'] += file_stats['comments']
+        self.stats['blank_lines'] += file_stats['blank']
+        self.stats['functions'] += file_stats['functions']
+        self.stats['classes'] += file_stats['classes']
+        self.stats['imports'] += file_stats['imports']
+
+        # 按扩展名分组
+        if ext not in self.stats['by_extension']:
+            self.stats['by_extension'][ext] = {'files': 0, **{key: 0 for key in STAT_KEYS}}
+
+        ext_stats = self.stats['by_extension'][ext]
+        ext_stats['files'] += 1
+        for key in STAT_KEYS:
+            ext_stats[key] += file_stats[key]
 
     def calculate_complexity_score(self) -> float:
         """计算代码复杂度分数"""
@@ -169,31 +914,38 @@ class CodeStats:
         complexity = (size_score + comment_score + func_score) / 3 * 100
         return min(complexity, 100.0)
 
-    def print_report(self):
-        """打印分析报告"""
-        print("📊 代码统计报告")
-        print("=" * 60)
-        print(f"项目路径: {self.project_path}")
-        print("=" * 60)
-        print()
+    def print_report(self, out: Optional[TextIO] = None):
+        """打印分析报告
+
+        Args:
+            out: 输出流，默认为标准输出
+        """
+        emit = partial(print, file=out)
+        emit("📊 代码统计报告")
+        emit("=" * 60)
+        emit(f"项目路径: {self.project_path}")
+        emit("=" * 60)
+        emit()
 
         if self.stats['files'] == 0:
-            print("⚠️  未找到支持的代码文件")
+            emit("⚠️  未找到支持的代码文件")
             return
 
         # 总体统计
-        print("📁 总体统计:")
-        print("-" * 60)
-        print(f"文件总数: {self.stats['files']:,}")
-        print(f"总行数: {self.stats['total_lines']:,}")
-        print(f"代码行数: {self.stats['code_lines']:,} ({self.stats['code_lines']/self.stats['total_lines']*100:.1f}%)")
-        print(f"注释行数: {self.stats['comment_lines']:,} ({self.stats['comment_lines']/self.stats['total_lines']*100:.1f}%)")
-        print(f"空行行数: {self.stats['blank_lines']:,} ({self.stats['blank_lines']/self.stats['total_lines']*100:.1f}%)")
-        print()
-        print(f"函数总数: {self.stats['functions']:,}")
-        print(f"类总数: {self.stats['classes']:,}")
-        print(f"导入语句: {self.stats['imports']:,}")
-        print()
+        emit("📁 总体统计:")
+        emit("-" * 60)
+        emit(f"文件总数: {self.stats['files']:,}")
+        emit(f"总行数: {self.stats['total_lines']:,}")
+        emit(f"代码行数: {self.stats['code_lines']:,} ({self.stats['code_lines']/self.stats['total_lines']*100:.1f}%)")
+        emit(f"注释行数: {self.stats['comment_lines']:,} ({self.stats['comment_lines']/self.stats['total_lines']*100:.1f}%)")
+        emit(f"空行行数: {self.stats['blank_lines']:,} ({self.stats['blank_lines']/self.stats['total_lines']*100:.1f}%)")
+        emit()
+        emit(f"函数总数: {self.stats['functions']:,}")
+        emit(f"类总数: {self.stats['classes']:,}")
+        emit(f"导入语句: {self.stats['imports']:,}")
+        if self.elapsed > 0:
+            emit(f"分析速度: {self.stats['total_lines'] / self.elapsed:,.0f} 行/秒（耗时 {self.elapsed:.2f} 秒）")
+        emit()
 
         # 复杂度评分
         complexity = self.calculate_complexity_score()
@@ -207,21 +959,21 @@ class CodeStats:
             complexity_color = "\033[91m"  # 红色
             complexity_level = "高"
 
-        print(f"代码复杂度: {complexity_color}{complexity:.1f} ({complexity_level})\033[0m")
-        print()
+        emit(f"代码复杂度: {complexity_color}{complexity:.1f} ({complexity_level})\033[0m")
+        emit()
 
         # 按文件类型统计
         if self.stats['by_extension']:
-            print("📂 按文件类型统计:")
-            print("-" * 60)
-            print(f"{'类型':<10} {'文件数':>10} {'总行数':>12} {'代码行':>12} {'注释':>10} {'函数':>10} {'类':>8}")
-            print("-" * 60)
+            emit("📂 按文件类型统计:")
+            emit("-" * 60)
+            emit(f"{'类型':<10} {'文件数':>10} {'总行数':>12} {'代码行':>12} {'注释':>10} {'函数':>10} {'类':>8}")
+            emit("-" * 60)
 
             for ext, stats in sorted(self.stats['by_extension'].items()):
-                print(f"{ext:<10} {stats['files']:>10,} {stats['lines']:>12,} {stats['code']:>12,} "
+                emit(f"{ext:<10} {stats['files']:>10,} {stats['lines']:>12,} {stats['code']:>12,} "
                       f"{stats['comments']:>10,} {stats['functions']:>10,} {stats['classes']:>8,}")
 
-            print()
+            emit()
 
         # 健康评分
         health_score = 0
@@ -257,47 +1009,355 @@ class CodeStats:
         else:
             health_issues.append(f"平均函数数偏高 ({avg_funcs_per_file:.1f}个/文件)")
 
-        print("🏥 代码健康度:")
-        print("-" * 60)
-        print(f"健康评分: {health_score}/100")
+        emit("🏥 代码健康度:")
+        emit("-" * 60)
+        emit(f"健康评分: {health_score}/100")
 
         if health_issues:
-            print()
-            print("⚠️  发现的问题:")
+            emit()
+            emit("⚠️  发现的问题:")
             for issue in health_issues:
-                print(f"  - {issue}")
+                emit(f"  - {issue}")
         else:
-            print("✅ 代码健康状况良好")
+            emit("✅ 代码健康状况良好")
 
-        print()
+        emit()
 
         # 建议
-        print("💡 建议:")
-        print("-" * 60)
+        emit("💡 建议:")
+        emit("-" * 60)
 
         if comment_ratio < 0.1:
-            print("  - 增加代码注释，提高可维护性")
+            emit("  - 增加代码注释，提高可维护性")
 
         if avg_file_size > 500:
-            print("  - 考虑拆分大文件，遵循单一职责原则")
+            emit("  - 考虑拆分大文件，遵循单一职责原则")
 
         if len(self.stats['by_extension']) > 5:
-            print("  - 项目包含多种语言，注意依赖管理")
+            emit("  - 项目包含多种语言，注意依赖管理")
         elif len(self.stats['by_extension']) == 1:
-            print("  - 单一语言项目，结构清晰")
+            emit("  - 单一语言项目，结构清晰")
 
         if self.stats['classes'] > 0:
             avg_methods_per_class = self.stats['functions'] / max(self.stats['classes'], 1)
             if avg_methods_per_class > 20:
-                print("  - 类的职责可能过重，考虑拆分类")
+                emit("  - 类的职责可能过重，考虑拆分类")
 
         if health_score >= 80:
-            print("  - ✅ 代码质量良好，继续保持")
+            emit("  - ✅ 代码质量良好，继续保持")
+
+        emit()
+        emit("=" * 60)
+        emit("代码统计完成")
+        emit("=" * 60)
+
+
+def _blob_lines(stream, size: int) -> Iterator[bytes]:
+    """从 git cat-file --batch 输出中逐行读取一个 blob（恰好 size 字节，外加结尾换行）"""
+    remaining = size
+    while remaining > 0:
+        # 只以 blob 剩余字节限长，超长的行也完整读出，与 analyze_stream 的分行一致
+        raw = stream.readline(remaining)
+        if not raw:
+            raise EOFError("git cat-file 输出提前结束")
+        remaining -= len(raw)
+        yield raw
+    stream.read(1)
+
+
+class GitDiffStats:
+    """
+    两个修订之间的差异统计
+
+    变更文件列表来自 git diff --name-status，两侧内容通过同一个
+    git cat-file --batch 进程按 blob 流式读取（无需检出），
+    因此耗时只与变更规模相关。
+    """
+
+    STATUS_KEYS = {'A': 'added', 'D': 'deleted', 'M': 'modified', 'T': 'modified', 'R': 'renamed', 'C': 'added'}
+
+    def __init__(self, project_path: Path, base: str, head: str, analyzer: CodeStats):
+        self.project_path = Path(project_path)
+        self.base = base
+        self.head = head
+        self.analyzer = analyzer
+        self.elapsed = 0.0
+        self.stats: Dict[str, Any] = {
+            'base': base,
+            'head': head,
+            'files': {'added': 0, 'deleted': 0, 'modified': 0, 'renamed': 0},
+            'delta': _empty_stats(),
+            'by_extension': {}
+        }
+
+    @classmethod
+    def from_range(cls, project_path: Path, spec: str, analyzer: CodeStats) -> 'GitDiffStats':
+        """
+        解析修订范围：A..B、A...B（以合并基点为基准）或单个修订（与 HEAD 比较）
+
+        Raises:
+            RuntimeError: git 命令失败
+        """
+        if '...' in spec:
+            base, head = spec.split('...', 1)
+            head = head or 'HEAD'
+            base = cls._git(project_path, 'merge-base', base or 'HEAD', head).strip()
+        elif '..' in spec:
+            base, head = spec.split('..', 1)
+            base, head = base or 'HEAD', head or 'HEAD'
+        else:
+            base, head = spec, 'HEAD'
+        return cls(project_path, base, head, analyzer)
+
+    @staticmethod
+    def _git(project_path: Path, *args: str) -> str:
+        result = subprocess.run(
+            ['git', *args],
+            cwd=project_path,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"git {args[0]} 失败")
+        return result.stdout
+
+    def changed_files(self) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        获取变更文件（限于项目路径内、受支持且未被忽略的文件）
+
+        Returns:
+            [(状态, 旧路径, 新路径)]，新增文件旧路径为None，删除文件新路径为None
+        """
+        output = self._git(
+            self.project_path, 'diff', '--name-status', '-z', '-M', '--relative',
+            self.base, self.head, '--'
+        )
+        fields = output.split('\0')
+        changes = []
+        i = 0
+        while i < len(fields) and fields[i]:
+            status = fields[i][0]
+            if status in 'RC':
+                old_path, new_path = fields[i + 1], fields[i + 2]
+                i += 3
+            else:
+                old_path = new_path = fields[i + 1]
+                i += 2
+                if status == 'A':
+                    old_path = None
+                elif status == 'D':
+                    new_path = None
+
+            if status not in self.STATUS_KEYS:
+                continue
+            path = new_path or old_path
+            if os.path.splitext(path)[1].lower() not in SUPPORTED_EXTENSIONS or self.analyzer.is_ignored_path(path):
+                continue
+            changes.append((status, old_path, new_path))
+        return changes
+
+    def analyze(self, on_file: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        分析所有变更文件并累计差异
+
+        Args:
+            on_file: 每个文件分析完成后回调其差异记录，用于流式输出
+        """
+        started = time.perf_counter()
+        changes = self.changed_files()
+
+        with subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            cwd=self.project_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        ) as proc:
+            try:
+                for status, old_path, new_path in changes:
+                    ext = os.path.splitext(new_path or old_path)[1].lower()
+                    old_stats = self._blob_stats(proc, self.base, old_path, ext)
+                    new_stats = self._blob_stats(proc, self.head, new_path, ext)
+                    record = self.add_file_delta(status, old_path, new_path, ext, old_stats, new_stats)
+                    if on_file is not None:
+                        on_file(record)
+            finally:
+                proc.stdin.close()
+
+        self.elapsed = time.perf_counter() - started
+
+    def _blob_stats(self, proc: subprocess.Popen, rev: str, path: Optional[str], ext: str) -> Dict[str, int]:
+        """读取 rev:path 的 blob 并分类，路径为None（新增/删除的另一侧）时返回全零"""
+        if path is None:
+            return _empty_stats()
+
+        proc.stdin.write(f"{rev}:./{path}\n".encode('utf-8', 'surrogateescape'))
+        proc.stdin.flush()
+        header = proc.stdout.readline().decode('utf-8', 'replace').split()
+        if len(header) != 3 or header[1] != 'blob':
+            print(f"⚠️  警告: 无法读取 {rev}:{path}", file=sys.stderr)
+            return _empty_stats()
+
+        lines = _blob_lines(proc.stdout, int(header[2]))
+        try:
+            return classifier_for(ext).count(_decoded_lines(lines))
+        except UnicodeDecodeError as e:
+            print(f"⚠️  警告: 无法读取文件 {rev}:{path}: {e}", file=sys.stderr)
+            return _empty_stats()
+        finally:
+            # 解码失败时读完剩余内容，保持与 cat-file 输出同步
+            for _ in lines:
+                pass
+
+    def add_file_delta(self, status: str, old_path: Optional[str], new_path: Optional[str], ext: str,
+                       old_stats: Dict[str, int], new_stats: Dict[str, int]) -> Dict[str, Any]:
+        """累计单个文件的差异，返回该文件的差异记录"""
+        delta = {key: new_stats[key] - old_stats[key] for key in STAT_KEYS}
 
-        print()
-        print("=" * 60)
-        print("代码统计完成")
-        print("=" * 60)
+        self.stats['files'][self.STATUS_KEYS[status]] += 1
+        for key in STAT_KEYS:
+            self.stats['delta'][key] += delta[key]
+
+        if ext not in self.stats['by_extension']:
+            self.stats['by_extension'][ext] = {'files': 0, **_empty_stats()}
+        ext_stats = self.stats['by_extension'][ext]
+        ext_stats['files'] += 1
+        for key in STAT_KEYS:
+            ext_stats[key] += delta[key]
+
+        return {
+            'status': status,
+            'path': new_path or old_path,
+            'old_path': old_path if status in 'RC' else None,
+            'ext': ext,
+            **delta
+        }
+
+    @staticmethod
+    def format_record(record: Dict[str, Any]) -> str:
+        """单个文件差异的文本行"""
+        path = record['path']
+        if record['old_path']:
+            path = f"{record['old_path']} → {path}"
+        return (f"{record['status']:<3} {record['lines']:>+8,} {record['code']:>+8,} "
+                f"{record['comments']:>+8,} {record['functions']:>+6,}  {path}")
+
+    def print_report(self, out: Optional[TextIO] = None):
+        """打印差异报告
+
+        Args:
+            out: 输出流，默认为标准输出
+        """
+        emit = partial(print, file=out)
+        files = self.stats['files']
+        delta = self.stats['delta']
+
+        emit("📊 代码统计差异报告")
+        emit("=" * 60)
+        emit(f"项目路径: {self.project_path}")
+        emit(f"修订范围: {self.base} → {self.head}")
+        emit("=" * 60)
+        emit()
+
+        changed = sum(files.values())
+        if changed == 0:
+            emit("✅ 没有受支持的代码文件发生变化")
+            return
+
+        emit("📁 总体变化:")
+        emit("-" * 60)
+        emit(f"变更文件: {changed:,}（新增 {files['added']}，删除 {files['deleted']}，"
+             f"修改 {files['modified']}，重命名 {files['renamed']}）")
+        emit(f"总行数: {delta['lines']:+,}")
+        emit(f"代码行数: {delta['code']:+,}")
+        emit(f"注释行数: {delta['comments']:+,}")
+        emit(f"空行行数: {delta['blank']:+,}")
+        emit()
+        emit(f"函数: {delta['functions']:+,}")
+        emit(f"类: {delta['classes']:+,}")
+        emit(f"导入语句: {delta['imports']:+,}")
+        if self.elapsed > 0:
+            emit(f"分析耗时: {self.elapsed:.2f} 秒")
+        emit()
+
+        emit("📂 按文件类型:")
+        emit("-" * 60)
+        emit(f"{'类型':<10} {'文件数':>8} {'总行数':>10} {'代码行':>10} {'注释':>8} {'函数':>8} {'类':>6}")
+        emit("-" * 60)
+        for ext, stats in sorted(self.stats['by_extension'].items()):
+            emit(f"{ext:<10} {stats['files']:>8,} {stats['lines']:>+10,} {stats['code']:>+10,} "
+                 f"{stats['comments']:>+8,} {stats['functions']:>+8,} {stats['classes']:>+6,}")
+        emit()
+
+
+class PerFileWriter:
+    """逐文件流式输出：每分析完一个文件立即写出一条记录，全部完成后写出汇总"""
+
+    TEXT_HEADER = f"{'总行数':>8} {'代码行':>8} {'注释':>8} {'空行':>8}  文件"
+
+    def __init__(self, out: TextIO, output_format: str, text_header: Optional[str] = None):
+        self.out = out
+        self.format = output_format
+        self.count = 0
+
+        if output_format == 'json':
+            out.write('{"files": [')
+        elif output_format == 'text':
+            out.write((text_header or self.TEXT_HEADER) + '\n')
+
+    def write_file(self, file_path: Path, ext: str, file_stats: Dict[str, Any]):
+        """写出单个文件的统计"""
+        text_line = (f"{file_stats['lines']:>8,} {file_stats['code']:>8,} {file_stats['comments']:>8,} "
+                     f"{file_stats['blank']:>8,}  {file_path}")
+        self.write_record({'path': str(file_path), 'ext': ext, **file_stats}, text_line)
+
+    def write_record(self, record: Dict[str, Any], text_line: str):
+        """写出一条记录并立即刷新，下游可以边分析边消费"""
+        if self.format == 'ndjson':
+            self.out.write(json.dumps({'type': 'file', **record}, ensure_ascii=False) + '\n')
+        elif self.format == 'json':
+            self.out.write((',\n  ' if self.count else '\n  ') + json.dumps(record, ensure_ascii=False))
+        else:
+            self.out.write(text_line + '\n')
+        self.count += 1
+        self.out.flush()
+
+    def finish(self, analyzer):
+        """写出汇总（analyzer 为 CodeStats 或 GitDiffStats）"""
+        if self.format == 'json':
+            self.out.write('\n], "summary": ' + json.dumps(analyzer.stats, ensure_ascii=False) + '}\n')
+        else:
+            if self.format == 'text':
+                self.out.write('\n')
+            write_summary(analyzer, self.out, self.format)
+
+
+def write_summary(analyzer, out: TextIO, output_format: str):
+    """按格式写出汇总统计（analyzer 为 CodeStats 或 GitDiffStats）"""
+    if output_format == 'json':
+        out.write(json.dumps(analyzer.stats, indent=2, ensure_ascii=False) + '\n')
+    elif output_format == 'ndjson':
+        out.write(json.dumps({'type': 'summary', **analyzer.stats}, ensure_ascii=False) + '\n')
+    else:
+        analyzer.print_report(out)
+
+
+def run_diff(analyzer: CodeStats, spec: str, out: TextIO, output_format: str, per_file: bool):
+    """差异模式：只分析两个修订之间变更的文件并输出差异"""
+    diff_stats = GitDiffStats.from_range(analyzer.project_path, spec, analyzer)
+
+    writer = None
+    if per_file:
+        header = f"{'状态':<3} {'总行数':>8} {'代码行':>8} {'注释':>8} {'函数':>6}  文件"
+        writer = PerFileWriter(out, output_format, text_header=header)
+
+    diff_stats.analyze(
+        on_file=(lambda record: writer.write_record(record, GitDiffStats.format_record(record))) if writer else None
+    )
+
+    if writer is not None:
+        writer.finish(diff_stats)
+    else:
+        write_summary(diff_stats, out, output_format)
 
 
 def main():
@@ -309,7 +1369,13 @@ def main():
   python3 code-stats.py .                    # 分析当前目录
   python3 code-stats.py /path/to/project     # 分析指定项目
   python3 code-stats.py . --json             # JSON格式输出
+  python3 code-stats.py . --per-file --format ndjson  # 逐文件流式输出（NDJSON），最后一行为汇总
   python3 code-stats.py . --output report.md # 保存报告
+  python3 code-stats.py . --no-cache         # 忽略逐文件缓存，全部重新分析
+  python3 code-stats.py . --jobs 8           # 8 个进程并行分析（结果与串行一致）
+  python3 code-stats.py . --exclude "*.min.js" --exclude "vendor/"
+  python3 code-stats.py . --since origin/main          # 只统计相对 origin/main 的变更
+  python3 code-stats.py . --diff v1.0..v1.1 --json     # 两个修订之间的差异
         """
     )
 
@@ -323,7 +1389,19 @@ def main():
     parser.add_argument(
         '--json',
         action='store_true',
-        help='JSON格式输出'
+        help='JSON格式输出（等同于 --format json）'
+    )
+
+    parser.add_argument(
+        '--format',
+        choices=['text', 'json', 'ndjson'],
+        help='输出格式（默认: text）'
+    )
+
+    parser.add_argument(
+        '--per-file',
+        action='store_true',
+        help='逐文件输出统计：每分析完一个文件立即输出，最后输出汇总'
     )
 
     parser.add_argument(
@@ -331,30 +1409,100 @@ def main():
         help='输出报告到文件'
     )
 
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='不使用逐文件统计缓存（强制重新分析所有文件）'
+    )
+
+    parser.add_argument(
+        '--cache-file',
+        help='逐文件统计缓存位置（默认: ~/.cache/ai-runtime/code-stats/）'
+    )
+
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='PATTERN',
+        help='额外忽略的路径（gitignore 风格通配符，可重复，如 "*.min.js"、"docs/**"）'
+    )
+
+    parser.add_argument(
+        '--no-gitignore',
+        action='store_true',
+        help='不读取 .gitignore 规则'
+    )
+
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='并行分析的进程数（默认: 1，串行；0 表示使用 CPU 核数）'
+    )
+
+    revisions = parser.add_mutually_exclusive_group()
+    revisions.add_argument(
+        '--since',
+        metavar='REV',
+        help='只统计 REV 到 HEAD 之间变更的文件，输出差异'
+    )
+    revisions.add_argument(
+        '--diff',
+        metavar='A..B',
+        help='只统计两个修订之间变更的文件，输出差异（A...B 以合并基点为基准）'
+    )
+
     args = parser.parse_args()
 
     if not os.path.exists(args.project_path):
         print(f"❌ 错误: 路径不存在: {args.project_path}")
         sys.exit(1)
 
-    analyzer = CodeStats(args.project_path)
-    analyzer.analyze_directory(Path(args.project_path))
-
-    if args.json:
-        import json
-        print(json.dumps(analyzer.stats, indent=2))
-    elif args.output:
-        # 重定向输出到文件
-        with open(args.output, 'w', encoding='utf-8') as f:
-            old_stdout = sys.stdout
-            sys.stdout = f
+    # 差异模式直接读取 git blob，不使用逐文件缓存
+    diff_spec = args.diff or args.since
+    cache = None
+    if not args.no_cache and not diff_spec:
+        cache_file = Path(args.cache_file) if args.cache_file else default_cache_path(Path(args.project_path))
+        cache = StatsCache(cache_file)
+
+    analyzer = CodeStats(
+        args.project_path,
+        cache=cache,
+        excludes=args.exclude,
+        use_gitignore=not args.no_gitignore
+    )
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    output_format = args.format or ('json' if args.json else 'text')
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if diff_spec:
             try:
-                analyzer.print_report()
-            finally:
-                sys.stdout = old_stdout
-        print(f"✅ 报告已保存: {args.output}")
-    else:
-        analyzer.print_report()
+                run_diff(analyzer, diff_spec, out, output_format, args.per_file)
+            except (RuntimeError, OSError) as e:
+                print(f"❌ 错误: git 差异统计失败: {e}", file=sys.stderr)
+                sys.exit(1)
+            return
+
+        writer = PerFileWriter(out, output_format) if args.per_file else None
+        analyzer.analyze_directory(
+            Path(args.project_path),
+            jobs=jobs,
+            on_file=writer.write_file if writer else None
+        )
+
+        if cache is not None:
+            cache.save()
+
+        if writer is not None:
+            writer.finish(analyzer)
+        else:
+            write_summary(analyzer, out, output_format)
+    finally:
+        if args.output:
+            out.close()
+            print(f"✅ 报告已保存: {args.output}")
 
     sys.exit(0)
 